@@ -0,0 +1,46 @@
+# Measures per-object memory of ClientSession and the cost of updating one
+# of its attributes, both outside and inside a session.
+#
+#   python scripts/bench_subject_attributes.py
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from model.local_model.models import ClientSession  # noqa: E402
+from utils.model_managing.subject_session import SubjectSession  # noqa: E402
+
+N = 10000
+NUMBER = 100000
+
+
+def measure_memory() -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    subjects = [ClientSession(client_id=i) for i in range(N)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    size = sum(s.size_diff for s in after.compare_to(before, 'filename'))
+    del subjects
+    return size / N
+
+
+def measure_update(tracked: bool) -> float:
+    s = ClientSession(client_id=0)
+    session = SubjectSession({s}) if tracked else None
+
+    t = min(timeit.repeat(lambda: setattr(s, 'ix', 1),
+                          repeat=5, number=NUMBER)) / NUMBER
+
+    if session is not None:
+        session.close(commit=False)
+    return t
+
+
+print(f'memory per object:         {measure_memory():8.1f} B')
+print(f'update outside a session:  {measure_update(False) * 1e9:8.1f} ns')
+print(f'update inside a session:   {measure_update(True) * 1e9:8.1f} ns')
@@ -0,0 +1,55 @@
+# Measures SubjectManager session open/close cost for a growing number of
+# managed subjects. The cost should stay flat, as sessions only pay for the
+# subjects they touch.
+#
+#   python scripts/bench_subject_session.py
+
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from model.local_model.models import ClientSession  # noqa: E402
+from utils.model_managing.subject_manager import SubjectManager  # noqa: E402
+
+SIZES = [10, 100, 1000, 10000, 100000]
+REPEAT = 5
+NUMBER = 1000
+
+
+def create_manager() -> SubjectManager:
+    sm = SubjectManager()
+    # no notification context needed, only the session cost is measured
+    sm.get_notifier().set_context_factory(lambda: None)
+    return sm
+
+
+def populate(sm: SubjectManager, n: int):
+    with sm.create_session() as session:
+        for i in range(n):
+            session.add(ClientSession(client_id=i))
+        session.commit()
+
+
+def open_close(sm: SubjectManager):
+    with sm.create_session() as session:
+        session.commit()
+
+
+def touch_one(sm: SubjectManager):
+    with sm.create_session() as session:
+        s = session.get(ClientSession, 0, True)
+        s.ix = s.ix + 1
+        session.commit()
+
+
+print(f'{"subjects":>10} {"open/close [us]":>16} {"touch one [us]":>16}')
+for n in SIZES:
+    sm = create_manager()
+    populate(sm, n)
+    empty = min(timeit.repeat(lambda: open_close(sm),
+                              repeat=REPEAT, number=NUMBER)) / NUMBER
+    touch = min(timeit.repeat(lambda: touch_one(sm),
+                              repeat=REPEAT, number=NUMBER)) / NUMBER
+    print(f'{n:>10} {empty * 1e6:>16.2f} {touch * 1e6:>16.2f}')
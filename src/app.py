@@ -6,7 +6,12 @@ from flask_injector import FlaskInjector, singleton
 from flask_socketio import SocketIO
 
 
+from interface.services.auto_scheduler_service import AutoSchedulerService
+from interface.services.client_progress_service import ClientProgressService
 from interface.services.client_request_service import ClientRequestService
+from interface.services.data_cache_service import DataCacheService
+from interface.services.heartbeat_service import HeartbeatService
+from interface.services.job_dispatch_service import JobDispatchService
 from interface.services.update_event_service import UpdateEventService
 from interface.socket_namespaces.client import ClientEventNamespace
 from interface.socket_namespaces.update import UpdateEventNamespace
@@ -14,7 +19,10 @@ from utils.db.db_context import DBContext
 from interface.services.client_connection_service import ClientConnectionService
 from interface.http_endpoints.clients import clients_pb
 from interface.http_endpoints.jobs import jobs_pb
+from interface.http_endpoints.snapshot import snapshot_pb
+from interface.http_endpoints.updates import updates_pb
 from utils.model_managing.subject_manager import SubjectManager
+from utils.registry.connection_registry import create_connection_registry
 
 
 logging.basicConfig(level=logging.DEBUG)
@@ -24,35 +32,75 @@ PORT = 5000
 with open('sql_test_cfg.json', 'r') as f:
     cfg = DBContext.Config.from_dict(json.load(f))
 
+with open('server_cfg.json', 'r') as f:
+    server_cfg = json.load(f)
+
+
+app = Flask(__name__)
+# a message queue (e.g. redis://) lets emits reach sockets of other processes
+socketio = SocketIO(app, cors_allowed_origins="*",
+                    message_queue=server_cfg.get('message_queue'))
 
 sm = SubjectManager()
 db = DBContext(cfg)
 
-ues = UpdateEventService(db, sm)
-ccs = ClientConnectionService(sm)
+ues = UpdateEventService(
+    db, sm, socketio,
+    UpdateEventService.Config.from_dict(server_cfg.get('update_events', {})))
+ccs = ClientConnectionService(
+    sm, socketio,
+    create_connection_registry(
+        server_cfg.get('connections', {}).get('registry', 'memory://')),
+    server_cfg.get('connections', {}).get('lease_ttl'))
 crs = ClientRequestService(ccs)
+cps = ClientProgressService(
+    sm, socketio,
+    ClientProgressService.Config.from_dict(
+        server_cfg.get('client_progress', {})))
+hbs = HeartbeatService(
+    db, ccs, socketio,
+    HeartbeatService.Config.from_dict(server_cfg.get('heartbeats', {})))
+dcs = DataCacheService(
+    db, DataCacheService.Config.from_dict(server_cfg.get('data_cache', {})))
+jds = JobDispatchService(
+    db, ccs, socketio,
+    JobDispatchService.Config.from_dict(server_cfg.get('dispatch', {})))
+scheduler = AutoSchedulerService(
+    db, sm, ccs, jds, socketio,
+    AutoSchedulerService.Config.from_dict(server_cfg.get('scheduler', {})))
 
 
 def configure(binder):
+    binder.bind(AutoSchedulerService, to=scheduler, scope=singleton)
     binder.bind(DBContext, to=db, scope=singleton)
     binder.bind(ClientConnectionService, to=ccs, scope=singleton)
     binder.bind(ClientRequestService, to=crs, scope=singleton)
+    binder.bind(DataCacheService, to=dcs, scope=singleton)
+    binder.bind(ClientProgressService, to=cps, scope=singleton)
+    binder.bind(HeartbeatService, to=hbs, scope=singleton)
+    binder.bind(JobDispatchService, to=jds, scope=singleton)
     binder.bind(SubjectManager, to=sm, scope=singleton)
+    binder.bind(UpdateEventService, to=ues, scope=singleton)
 
 
-app = Flask(__name__)
 app.register_blueprint(clients_pb)
 app.register_blueprint(jobs_pb)
+app.register_blueprint(snapshot_pb)
+app.register_blueprint(updates_pb)
 
 
 CORS(app, resources={r"/*": {"origins": "*"}}, automatic_options=True)
 
-socketio = SocketIO(app, cors_allowed_origins="*")
-socketio.on_namespace(ClientEventNamespace(db, ccs))
-socketio.on_namespace(UpdateEventNamespace())
+socketio.on_namespace(ClientEventNamespace(db, ccs, cps, hbs, jds, dcs))
+socketio.on_namespace(UpdateEventNamespace(ues))
 
 
 FlaskInjector(app=app, modules=[configure])
 
 if __name__ == '__main__':
+    ues.start()
+    ccs.start()
+    cps.start()
+    hbs.start()
+    scheduler.start()
     socketio.run(app, use_reloader=True, debug=True, port=PORT)
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 import enum
 
 from model.db_model import models
+from model.db_model.matching import client_resources, job_requirements
+from model.local_model import models as local_model
 
 
 @dataclass
@@ -12,19 +14,23 @@ class ClientDO:
     name: str
     connected: bool
     state: str
+    capabilities: dict
 
     @staticmethod
     def create(client: models.Client, is_connected: bool):
         return ClientDO(client.id,
                         client.name,
                         is_connected,
-                        client.state.value)
+                        client.state.value,
+                        client_resources(client).to_dict())
 
     @staticmethod
-    def filter_updates(updates: dict):
-        updates = {k: updates[k] for k in updates
-                   if k in ['name', 'state']}
-        return updates
+    def filter_updates(client: models.Client, updates: dict):
+        filtered = {k: updates[k] for k in updates
+                    if k in ['name', 'state']}
+        if any(k in updates for k in ['cores', 'memory', 'labels']):
+            filtered['capabilities'] = client_resources(client).to_dict()
+        return filtered
 
 
 @dataclass
@@ -37,6 +43,52 @@ class ClientProgressDO:
     estimated_epoch_time: float
     estimated_total_time: float
 
+    # phases repeated in every epoch, in order
+    EPOCH_PHASES = ('TRAINING', 'VALIDATION')
+
+    @staticmethod
+    def create(session: local_model.ClientSession):
+        # estimates are remaining times in seconds, -1 if unknown
+        phase = session.phase.value
+        times = session.estimated_times
+
+        percentage = 0.
+        phase_time = -1.
+        if session.count > 0:
+            percentage = 100. * session.ix / session.count
+            if session.time_per_ix > 0:
+                phase_time = (session.count - session.ix) * session.time_per_ix
+
+        def sum_times(phases) -> float:
+            if any(p not in times for p in phases):
+                return -1.
+            return sum(times[p] for p in phases)
+
+        epoch_time = phase_time
+        if phase in ClientProgressDO.EPOCH_PHASES and phase_time >= 0:
+            ix = ClientProgressDO.EPOCH_PHASES.index(phase)
+            later = sum_times(ClientProgressDO.EPOCH_PHASES[ix + 1:])
+            epoch_time = phase_time + later if later >= 0 else -1.
+
+        total_time = -1.
+        full_epoch = sum_times(ClientProgressDO.EPOCH_PHASES)
+        epochs_left = session.max_epoch - session.epoch
+        if phase == 'FINALIZING':
+            total_time = phase_time
+        elif session.max_epoch >= 0 and epoch_time >= 0 and full_epoch >= 0:
+            if phase != 'PREPARATION':
+                epochs_left -= 1
+            total_time = (epoch_time + max(epochs_left, 0) * full_epoch
+                          + times.get('FINALIZING', 0.))
+
+        return ClientProgressDO(client_id=session.client_id,
+                                phase=phase,
+                                message=session.message,
+                                percentage=percentage,
+                                estimated_phase_time=phase_time,
+                                estimated_epoch_time=epoch_time,
+                                estimated_total_time=total_time)
+
 
 @dataclass
 class JobSessionDO:
@@ -64,6 +116,11 @@ class JobDO:
     config: dict
     name: str
     description: str
+    priority: int
+    estimated_work: float | None
+    requirements: dict
+    dependencies: list[int]
+    pending_dependencies: int
 
     @staticmethod
     def from_db(job: models.Job):
@@ -80,13 +137,19 @@ class JobDO:
                      rank=rank,
                      config=job.configuration,
                      name=job.name,
-                     description=job.description)
+                     description=job.description,
+                     priority=job.priority,
+                     estimated_work=job.estimated_work,
+                     requirements=job_requirements(job).to_dict(),
+                     dependencies=[d.id for d in job.dependencies],
+                     pending_dependencies=job.pending_dependencies)
 
     @staticmethod
     def filter_updates(updates: dict):
         updates = {k: updates[k] for k in updates
                    if k in ['state', 'sub_state', 'client_id', 'rank', 'config',
-                            'name', 'description']}
+                            'name', 'description', 'priority',
+                            'estimated_work', 'pending_dependencies']}
 
         updates.update({k: v.value
                         for k, v in updates.items()
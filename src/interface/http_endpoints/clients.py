@@ -1,15 +1,17 @@
 
 import logging
 
-from flask import Blueprint
+from flask import Blueprint, request
 from flask_injector import inject
 
 from interface.http_endpoints.http_utils\
-      import bad_request, internal_server_error, ok
+      import bad_request, internal_server_error, not_found, ok
 from model.exeptions import IndexValueError
 from interface.services.client_request_service import ClientRequestService
 from utils.db.db_context import DBContext
 from interface.services.client_connection_service import ClientConnectionService
+from interface.services.auto_scheduler_service import AutoSchedulerService
+from interface.services.client_progress_service import ClientProgressService
 from model.db_model.client_manager import ClientManager
 from interface.data_objects import ClientDO
 from utils.http_utils import Param, get_request_parameters
@@ -94,10 +96,47 @@ def server_request(rs: ClientRequestService, db: DBContext):
 def get_clients(db: DBContext, ccs: ClientConnectionService):
     with db.create_session() as session:
         return [
-            ClientDO(
-                id=c.id,
-                name=c.name,
-                state=c.state.value,
-                connected=ccs.is_connected(c.id)
-            ) for c in ClientManager.all(session)
+            ClientDO.create(c, ccs.is_connected(c.id))
+            for c in ClientManager.all(session)
         ], 200
+
+
+@clients_pb.route('/client/<int:client_id>/eligible_jobs', methods=['GET'])
+@inject
+def get_eligible_jobs(client_id: int, db: DBContext):
+    # unassigned jobs (by priority) whose requirements the client meets
+    with db.create_session() as session:
+        try:
+            jobs = ClientManager(session, client_id, True).eligible_jobs()
+        except IndexValueError as e:
+            return not_found(str(e))
+        return [j.id for j in jobs], 200
+
+
+@clients_pb.route('/clients/forecast', methods=['GET'])
+@inject
+def get_forecast(scheduler: AutoSchedulerService):
+    # expected remaining time and finish time of each ACTIVE client's
+    # schedule, based on estimated job work and measured client speeds
+    return scheduler.forecast(), 200
+
+
+@clients_pb.route('/client/<int:client_id>/progress_history',
+                  methods=['GET'])
+@inject
+def get_progress_history(client_id: int, cps: ClientProgressService):
+    # optional query arguments: since (unix time), limit (record count),
+    # malformed values are ignored
+    since = request.args.get('since', type=float)
+    limit = request.args.get('limit', type=int)
+
+    if limit is not None and limit < 0:
+        return bad_request('limit must not be negative')
+
+    history = cps.get_history(client_id, since, limit)
+    if history is None:
+        return not_found(f'no progress history for client {client_id}')
+
+    return {'id': client_id} | {
+        name: history[name].tolist() for name in history.dtype.names
+    }, 200
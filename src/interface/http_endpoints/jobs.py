@@ -9,9 +9,14 @@ from interface.http_endpoints.http_utils \
       import bad_request, internal_server_error, not_found, ok
 from utils.db.db_context import DBContext
 from model.exeptions import IndexValueError, StateError
+from model.db_model.client_manager import ClientManager
 from model.db_model.job_manager import JobManager
 from interface.data_objects import JobDO, JobSessionDO
+from interface.services.data_cache_service import DataCacheService
+from interface.services.job_dispatch_service import JobDispatchService
 from utils.http_utils import Param, get_request_parameters
+from utils.scheduling.dependency_graph import topological_order
+from utils.scheduling.resources import Resources
 
 
 jobs_pb = Blueprint('jobs_pb', __name__)
@@ -60,7 +65,7 @@ def delete_jobs(server: DBContext):
 
 @jobs_pb.route('/job', methods=['POST'])
 @inject
-def create_job(db: DBContext):
+def create_job(db: DBContext, dcs: DataCacheService):
     try:
         name, config, description = get_request_parameters(
             Param('name', type_=str),
@@ -69,6 +74,11 @@ def create_job(db: DBContext):
     except ValueError as e:
         return bad_request(str(e))
 
+    try:
+        _check_job_options(request.json)
+    except ValueError as e:
+        return bad_request(str(e))
+
     try:
         ConfigLoader(request.json['config'])
     except ValueError as e:
@@ -77,20 +87,110 @@ def create_job(db: DBContext):
         return internal_server_error(e)
 
     with db.create_session() as session:
-        JobManager.create(session, config, name, description)
+        try:
+            id = JobManager.create(session, config, name, description,
+                                   request.json.get('priority', 0),
+                                   request.json.get('dependsOn', []),
+                                   request.json.get('estimatedWork'),
+                                   Resources.from_dict(
+                                       request.json.get('requirements')),
+                                   dcs.data_keys(config))
+        except (IndexValueError, StateError) as e:
+            return bad_request(str(e))
+        session.commit()
+
+    return ok('Job created', {'id': id})
+
+
+@jobs_pb.route('/jobs/batch', methods=['POST'])
+@inject
+def create_jobs(db: DBContext, dcs: DataCacheService):
+    # creates several jobs at once, e.g. a pipeline. Besides dependsOn (ids
+    # of existing jobs) each job can list the jobs of the batch it waits for
+    # by index in 'after'
+
+    try:
+        jobs, = get_request_parameters(
+            Param('jobs', collection=True, type_=dict))
+        for spec in jobs:
+            _check_batch_job(spec, len(jobs))
+        order = topological_order(
+            range(len(jobs)),
+            [(a, ix) for ix, spec in enumerate(jobs)
+             for a in spec.get('after', [])])
+    except ValueError as e:
+        return bad_request(str(e))
+
+    ids = [None] * len(jobs)
+    with db.create_session() as session:
+        for ix in order:
+            spec = jobs[ix]
+            dependencies = [*spec.get('dependsOn', []),
+                            *(ids[a] for a in spec.get('after', []))]
+            try:
+                ids[ix] = JobManager.create(session, spec['config'],
+                                            spec['name'], spec['description'],
+                                            spec.get('priority', 0),
+                                            dependencies,
+                                            spec.get('estimatedWork'),
+                                            Resources.from_dict(
+                                                spec.get('requirements')),
+                                            dcs.data_keys(spec['config']))
+            except (IndexValueError, StateError) as e:
+                return bad_request(f'Job {ix}: {e}')
         session.commit()
 
-    return ok('Job created')
+    return ok('Jobs created', {'ids': ids})
+
+
+def _check_batch_job(spec: dict, batch_size: int):
+    for key, type_ in [('name', str), ('config', dict), ('description', str)]:
+        if not isinstance(spec.get(key), type_):
+            raise ValueError(f"'{key}' of each job expected to be of type "
+                             f"{type_.__name__}")
+
+    try:
+        ConfigLoader(spec['config'])
+    except ValueError as e:
+        raise ValueError(f'Provided config of {spec["name"]} is invalid '
+                         f'({e})')
+
+    _check_job_options(spec, batch_size)
+
+
+def _check_job_options(spec: dict, batch_size: int = 0):
+    # optional parameters of a job, 'after' refers to jobs of the same batch
+    def is_int(value):
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    if not is_int(spec.get('priority', 0)):
+        raise ValueError('priority must be an integer')
+
+    work = spec.get('estimatedWork')
+    if work is not None and (not isinstance(work, (int, float))
+                             or isinstance(work, bool) or work <= 0):
+        raise ValueError('estimatedWork must be a positive number')
+
+    Resources.from_dict(spec.get('requirements'))
+
+    for key in ['dependsOn', 'after']:
+        values = spec.get(key, [])
+        if not isinstance(values, list) or not all(map(is_int, values)):
+            raise ValueError(f'{key} must be a list of integers')
+
+    if not all(0 <= ix < batch_size for ix in spec.get('after', [])):
+        raise ValueError('after must refer to jobs of the batch by index')
 
 
 @jobs_pb.route('/jobs/assign', methods=['POST'])
 @inject
-def assign_jobs(db: DBContext):
+def assign_jobs(db: DBContext, jds: JobDispatchService):
 
     try:
-        job_ids, client_id = get_request_parameters(
+        job_ids, client_id, pinned = get_request_parameters(
             Param('jobIds', collection=True, type_=int),
-            Param('clientId', type_=int)
+            Param('clientId', type_=int),
+            Param('pinned', flag=True)
         )
     except ValueError as e:
         return bad_request(str(e))
@@ -98,7 +198,7 @@ def assign_jobs(db: DBContext):
     with db.create_session() as session:
         for id in job_ids:
             try:
-                JobManager(session, id).assign(client_id)
+                JobManager(session, id).assign(client_id, pinned)
             except StateError or IndexValueError as e:
                 logging.warning(f'Failed to assign job {id}: {str(e)}')
             except Exception as e:
@@ -106,6 +206,71 @@ def assign_jobs(db: DBContext):
 
         session.commit()
 
+    jds.dispatch(client_id)
+    return ok()
+
+
+@jobs_pb.route('/job/<int:job_id>/eligible_clients', methods=['GET'])
+@inject
+def get_eligible_clients(job_id: int, db: DBContext):
+    # clients meeting the requirements of the job
+    with db.create_session() as session:
+        if JobManager(session, job_id).model() is None:
+            return not_found(f'Job with id {job_id} not found')
+        return [c.id for c in JobManager(session, job_id)
+                .eligible_clients()], 200
+
+
+@jobs_pb.route('/jobs/priority', methods=['POST'])
+@inject
+def set_job_priority(db: DBContext):
+
+    try:
+        job_ids, priority = get_request_parameters(
+            Param('jobIds', collection=True, type_=int),
+            Param('priority', type_=int))
+    except ValueError as e:
+        return bad_request(str(e))
+
+    with db.create_session() as session:
+        for job_id in job_ids:
+            try:
+                JobManager(session, job_id).model().priority = priority
+            except IndexValueError as e:
+                logging.warning(f'Failed to set priority of job {job_id}: '
+                                f'{str(e)}')
+        session.commit()
+
+    return ok()
+
+
+@jobs_pb.route('/jobs/reorder', methods=['POST'])
+@inject
+def reorder_jobs(db: DBContext):
+    # moves the jobs (in the given order) in front of beforeId, behind
+    # afterId or, without either, to the front of the client's schedule
+
+    try:
+        client_id, job_ids = get_request_parameters(
+            Param('clientId', type_=int),
+            Param('jobIds', collection=True, type_=int))
+    except ValueError as e:
+        return bad_request(str(e))
+
+    before_id = request.json.get('beforeId')
+    after_id = request.json.get('afterId')
+    for name, value in [('beforeId', before_id), ('afterId', after_id)]:
+        if value is not None and not isinstance(value, int):
+            return bad_request(f'{name} must be an integer')
+
+    with db.create_session() as session:
+        try:
+            ClientManager(session, client_id).move_jobs(job_ids, before_id,
+                                                        after_id)
+        except (ValueError, IndexValueError) as e:
+            return bad_request(str(e))
+        session.commit()
+
     return ok()
 
 
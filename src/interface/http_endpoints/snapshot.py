@@ -0,0 +1,58 @@
+
+from flask import Blueprint
+from flask_injector import inject
+
+from interface.data_objects import ClientDO, ClientProgressDO, JobDO
+from interface.services.client_connection_service import ClientConnectionService
+from interface.services.update_event_service import UpdateEventService
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from model.local_model import models as local_model
+from utils.db.db_context import DBContext
+from utils.model_managing.subject_manager import SubjectManager
+
+
+snapshot_pb = Blueprint('snapshot_pb', __name__)
+
+
+@snapshot_pb.route('/snapshot', methods=['GET'])
+@inject
+def get_snapshot(db: DBContext,
+                 sm: SubjectManager,
+                 ccs: ClientConnectionService,
+                 ues: UpdateEventService):
+    # The stream position is taken before reading, so every batch with a
+    # higher sequence number has to be applied on top of the snapshot. Such
+    # batches may already be reflected in it and are to be applied as
+    # upserts.
+    stream = ues.get_stream_state()
+
+    # all reads share one transaction and therefore one consistent view
+    with db.create_session() as session:
+        jobs = [JobDO.from_db(j) for j in JobManager.all(session)]
+        clients = [ClientDO.create(c, ccs.is_connected(c.id))
+                   for c in ClientManager.all(session)]
+
+    # progress of clients connected to this process
+    progress = []
+    with sm.create_session() as session:
+        for c in clients:
+            client_session = session.get(local_model.ClientSession, c.id,
+                                         False)
+            if client_session is not None:
+                progress.append(ClientProgressDO.create(client_session))
+
+    schedules = {c.id: [] for c in clients}
+    for job in sorted((j for j in jobs if j.client_id != -1),
+                      key=lambda j: j.rank):
+        schedules.setdefault(job.client_id, []).append(job.id)
+
+    return {
+        'stream': stream['stream'],
+        'seq': stream['seq'],
+        'jobs': jobs,
+        'clients': clients,
+        'schedules': schedules,
+        'connected': [c.id for c in clients if c.connected],
+        'progress': progress,
+    }, 200
@@ -0,0 +1,14 @@
+
+from flask import Blueprint
+from flask_injector import inject
+
+from interface.services.update_event_service import UpdateEventService
+
+
+updates_pb = Blueprint('updates_pb', __name__)
+
+
+@updates_pb.route('/update/subscribers', methods=['GET'])
+@inject
+def get_update_subscribers(ues: UpdateEventService):
+    return ues.get_subscriber_stats(), 200
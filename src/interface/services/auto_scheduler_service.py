@@ -0,0 +1,187 @@
+
+from dataclasses import dataclass
+import logging
+import threading
+import time
+
+from flask_socketio import SocketIO
+
+from interface.data_objects import ClientProgressDO
+from interface.services.client_connection_service \
+    import ClientConnectionService
+from interface.services.job_dispatch_service import JobDispatchService
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from model.local_model import models as local_model
+from utils.db.db_context import DBContext
+from utils.model_managing.subject_manager import SubjectManager
+from utils.scheduling.policies import ClientLoad, PendingJob, create_policy
+
+
+class AutoSchedulerService:
+
+    @dataclass
+    class Config:
+        enabled: bool = False
+        # seconds between scheduling passes
+        interval: float = 1.
+        # see utils.scheduling.policies.POLICIES
+        policy: str = 'least_loaded'
+        # jobs (running and scheduled) a client holds before it receives no
+        # more, keeps unassigned work available for clients freeing up
+        max_queue_length: int = 2
+        # training steps assumed for jobs without an estimated work, work is
+        # counted in the unit of the ix of TRAINING progress reports
+        default_work: float = 1000.
+        # seconds per training step assumed for clients whose speed was not
+        # measured yet
+        default_time_per_work: float = 1.
+        # how much a client already holding a job's data is preferred, in
+        # units of the policy's cost (queued jobs for least_loaded, seconds
+        # for earliest_completion), 0 ignores locality
+        locality_weight: float = 0.
+
+        @staticmethod
+        def from_dict(cfg: dict):
+            return AutoSchedulerService.Config(**cfg)
+
+    def __init__(self, db: DBContext, sm: SubjectManager,
+                 ccs: ClientConnectionService, jds: JobDispatchService,
+                 socketio: SocketIO, cfg: Config = Config()):
+        self._db = db
+        self._sm = sm
+        self._ccs = ccs
+        self._jds = jds
+        self._socketio = socketio
+        self._cfg = cfg
+
+        self._policy = create_policy(cfg.policy, cfg.locality_weight)
+        # last measured seconds per training step of each client, kept
+        # across jobs
+        self._speeds: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        if self._started or not self._cfg.enabled:
+            return
+        self._started = True
+        self._socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self._socketio.sleep(self._cfg.interval)
+            try:
+                self.schedule_pending()
+            except Exception:
+                logging.exception('Scheduling pass failed')
+
+    def schedule_pending(self) -> dict[int, list[int]]:
+        # assigns unassigned jobs, highest priority first, to the free queue
+        # slots of ACTIVE connected clients, returns the job ids per client
+        assigned: dict[int, list[int]] = {}
+
+        with self._db.create_session() as session:
+            max_length = self._cfg.max_queue_length
+            clients = [c for c in self._client_loads(session)
+                       if c.queued < max_length
+                       and self._ccs.is_connected(c.id)]
+            capacity = sum(max_length - c.queued for c in clients)
+            if capacity == 0:
+                return assigned
+
+            # the job table (indexed by state and priority) serves as the
+            # priority queue shared by all server processes
+            jobs = {job.id: job for job in JobManager.next_unassigned(
+                session, capacity, [c.id for c in clients])}
+            pending = self._policy.order([
+                PendingJob(job.id, job.priority, self._work(job),
+                           frozenset(k.key for k in job.data_keys))
+                for job in jobs.values()])
+
+            # clients meeting the requirements of each job
+            eligible = JobManager.matching_clients(
+                session, list(jobs), [c.id for c in clients])
+
+            assignments = []
+            for job in pending:
+                open_clients = [c for c in clients if c.queued < max_length
+                                and c.id in eligible[job.id]]
+                client = self._policy.select(job, open_clients)
+                if client is None:
+                    continue
+
+                client.add(job)
+                assignments.append((jobs[job.id], client.id))
+                assigned.setdefault(client.id, []).append(job.id)
+
+            JobManager.assign_bulk(session, assignments)
+            session.commit()
+
+        if len(assigned) > 0:
+            logging.info(f'Scheduled jobs {assigned}')
+        for cid in assigned:
+            self._jds.dispatch(cid)
+
+        return assigned
+
+    def forecast(self) -> list[dict]:
+        # expected remaining seconds and finish time (unix) of the schedule
+        # of each ACTIVE client
+        with self._db.create_session() as session:
+            loads = self._client_loads(session)
+
+        now = time.time()
+        return [{'client_id': c.id,
+                 'queued': c.queued,
+                 'time_per_work': c.time_per_work,
+                 'remaining_time': c.backlog,
+                 'predicted_finish': now + c.backlog}
+                for c in loads]
+
+    def _work(self, job: models.Job) -> float:
+        if job.estimated_work is None:
+            return self._cfg.default_work
+        return job.estimated_work
+
+    def _client_loads(self, session) -> list[ClientLoad]:
+        loads = ClientManager.schedule_loads(
+            session, models.Client.State.ACTIVE, self._cfg.default_work)
+
+        # progress of the running jobs is known for clients connected to
+        # this process, others are estimated from their last known speed
+        progress = {}
+        with self._sm.create_session() as sm_session:
+            for cid in loads:
+                client_session = sm_session.get(local_model.ClientSession,
+                                                cid, False)
+                if client_session is not None:
+                    progress[cid] = ClientProgressDO.create(client_session)
+                    # other phases step at unrelated rates (e.g. validation
+                    # batches), only training steps measure work
+                    if (client_session.phase
+                            == local_model.ClientSession.Phase.TRAINING
+                            and client_session.time_per_ix > 0):
+                        with self._lock:
+                            self._speeds[cid] = client_session.time_per_ix
+
+        cached = ClientManager.cached_keys(session, list(loads))
+
+        clients = []
+        for cid, (queued, scheduled_work, running_work) in loads.items():
+            with self._lock:
+                time_per_work = self._speeds.get(
+                    cid, self._cfg.default_time_per_work)
+
+            running_time = running_work * time_per_work
+            if running_work > 0 and cid in progress \
+                    and progress[cid].estimated_total_time >= 0:
+                running_time = progress[cid].estimated_total_time
+
+            clients.append(ClientLoad(
+                cid, queued,
+                backlog=running_time + scheduled_work * time_per_work,
+                time_per_work=time_per_work,
+                cached=cached[cid]))
+        return clients
@@ -1,10 +1,12 @@
 
-from typing import Dict
-
-import flask_socketio
+from flask_socketio import SocketIO
 
+from model.local_model import models as local_model
 from model.local_model.client_session_manager import ClientSessionManager
 from utils.model_managing.subject_manager import SubjectManager
+from utils.registry.connection_registry import (
+    ConnectionRegistry, InMemoryConnectionRegistry
+)
 
 
 class NotConnectedError(Exception):
@@ -12,67 +14,78 @@ class NotConnectedError(Exception):
 
 
 class ClientConnectionService:
-    def __init__(self, sm: SubjectManager):
-        self._sid_to_cid: Dict[int, int] = {}
-        self._cid_to_sid: Dict[int, int] = {}
+    def __init__(self, sm: SubjectManager, socketio: SocketIO,
+                 registry: ConnectionRegistry = None,
+                 lease_ttl: float = None):
+        # the registry may be shared with other server processes, client
+        # sessions only exist in the process holding the socket
+        self._registry = registry or InMemoryConnectionRegistry()
+        self._lease_ttl = lease_ttl
 
         self._sm = sm
+        self._socketio = socketio
 
-    def is_connected(self, cid: int) -> bool:
-        return cid in self._cid_to_sid
+    def start(self):
+        if self._lease_ttl is not None:
+            self._socketio.start_background_task(self._renew_leases)
 
-    def add(self, sid: int, cid: int):
-        if sid in self._sid_to_cid:
-            raise ValueError(f"Socket {sid} already assigned to client")
+    def _renew_leases(self):
+        while True:
+            self._socketio.sleep(self._lease_ttl / 3)
+            self._registry.renew(self._lease_ttl)
 
-        if cid in self._cid_to_sid:
-            raise ValueError(f"Client {cid} already claimed")
+    def is_connected(self, cid: int) -> bool:
+        return self._registry.is_claimed(cid)
 
-        self._sid_to_cid[sid] = cid
-        self._cid_to_sid[cid] = sid
+    def add(self, sid: int, cid: int):
+        self._registry.claim(sid, cid, self._lease_ttl)
 
         with self._sm.create_session() as session:
             ClientSessionManager.create(session, cid)
             session.commit()
 
-    def _remove(self, cid: int, sid: int):
-        del self._sid_to_cid[sid]
-        del self._cid_to_sid[cid]
-
+    def _remove(self, cid: int):
         with self._sm.create_session() as session:
+            if session.get(local_model.ClientSession, cid, False) is None:
+                return
             ClientSessionManager.delete(session, cid)
             session.commit()
 
     def remove_by_sid(self, sid: int) -> int:
-        cid = self._sid_to_cid.get(sid)
+        cid = self._registry.release_sid(sid)
         if cid is None:
             raise NotConnectedError(
                 f"No connection with socket id {sid} found")
 
-        self._remove(cid, sid)
+        self._remove(cid)
         return cid
 
     def remove_by_cid(self, cid: int) -> int:
-        sid = self._cid_to_sid.get(cid)
+        sid = self._registry.release_cid(cid)
         if sid is None:
             raise NotConnectedError(
                 f"No connection with client id {cid} found")
 
-        self._remove(cid, sid)
+        self._remove(cid)
         return sid
 
     def get_cid(self, sid: int) -> int:
-        if sid not in self._sid_to_cid:
+        cid = self._registry.get_cid(sid)
+        if cid is None:
             raise NotConnectedError()
 
-        return self._sid_to_cid[sid]
+        return cid
 
     def get_sid(self, cid: int) -> int:
-        if cid not in self._cid_to_sid:
+        sid = self._registry.get_sid(cid)
+        if sid is None:
             raise NotConnectedError()
 
-        return self._cid_to_sid[cid]
+        return sid
 
-    def emit(self, cid: int, event: str, *args):
+    def emit(self, cid: int, event: str, *args, callback=None):
+        # callbacks (acknowledgements) require the socket to be connected to
+        # this process
         sid = self.get_sid(cid)
-        flask_socketio.emit(event, args, to=sid, namespace='/client')
+        self._socketio.emit(event, args, to=sid, namespace='/client',
+                            callback=callback)
@@ -0,0 +1,166 @@
+
+from dataclasses import dataclass
+import logging
+import threading
+import time
+
+from flask_socketio import SocketIO
+import numpy as np
+
+from model.local_model import models as local_model
+from utils.model_managing.subject_manager import SubjectManager
+from utils.progress.progress_estimator import ProgressEstimator
+from utils.progress.ring_buffer import RingBuffer
+
+
+# one record per applied report (timestamp as unix time)
+HISTORY_DTYPE = np.dtype([('timestamp', 'f8'),
+                          ('ix', 'i8'),
+                          ('time_per_ix', 'f8')])
+
+
+class ClientProgressService:
+
+    @dataclass
+    class Config:
+        # reports are applied to the client sessions (and thereby broadcast)
+        # at most once per interval, later reports replace pending ones
+        apply_interval: float = 1.
+        # weight of a new sample in the smoothed time per step
+        eta_smoothing: float = .3
+        # records of progress history kept per connected client
+        history_size: int = 3600
+
+        @staticmethod
+        def from_dict(cfg: dict):
+            return ClientProgressService.Config(**cfg)
+
+    def __init__(self, sm: SubjectManager, socketio: SocketIO,
+                 cfg: Config = Config()):
+        self._sm = sm
+        self._socketio = socketio
+        self._cfg = cfg
+
+        # latest report and its arrival time (monotonic and unix) per client
+        self._pending: dict[int, tuple[dict, float, float]] = {}
+        self._estimators: dict[int, ProgressEstimator] = {}
+        self._histories: dict[int, RingBuffer] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+        sm.get_notifier().add_listener(local_model.ClientSession,
+                                       self.on_client_session_event,
+                                       events=['delete'])
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self._socketio.start_background_task(self._run)
+
+    def report(self, cid: int, progress: dict):
+        if not isinstance(progress, dict):
+            raise ValueError('Progress must be an object')
+
+        phases = [p.value for p in local_model.ClientSession.Phase]
+        if progress.get('phase') not in phases:
+            raise ValueError(f'Phase must be one of {phases}')
+
+        for key in ['ix', 'count', 'epoch', 'max_epoch']:
+            value = progress.get(key, 0)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f'{key} must be an integer')
+
+        if not isinstance(progress.get('message', ''), str):
+            raise ValueError('message must be a string')
+
+        with self._lock:
+            self._pending[cid] = (progress, time.monotonic(), time.time())
+
+    def get_history(self, cid: int, since: float = None,
+                    limit: int = None) -> np.ndarray | None:
+        # None if the client is not connected to this process
+        with self._lock:
+            history = self._histories.get(cid)
+        if history is None:
+            return None
+
+        window = history.window()
+        if since is not None:
+            window = window[window['timestamp'] > since]
+        if limit is not None:
+            window = window[max(len(window) - limit, 0):]
+        return window
+
+    def on_client_session_event(self, context: object,
+                                event: str, obj: object, data: dict):
+        client_session: local_model.ClientSession = obj
+        with self._lock:
+            self._pending.pop(client_session.client_id, None)
+            self._estimators.pop(client_session.client_id, None)
+            self._histories.pop(client_session.client_id, None)
+
+    def _run(self):
+        while True:
+            self._socketio.sleep(self._cfg.apply_interval)
+            try:
+                self.apply_pending()
+            except Exception:
+                logging.exception('Failed to apply client progress')
+
+    def apply_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if len(pending) == 0:
+            return
+
+        with self._sm.create_session() as session:
+            for cid, report in pending.items():
+                try:
+                    client_session = session.get(local_model.ClientSession,
+                                                 cid, False)
+                    if client_session is not None:
+                        self._apply(client_session, *report)
+                except TimeoutError:
+                    # the session is locked by someone else, the report is
+                    # retried with the next batch unless a newer one arrives
+                    with self._lock:
+                        self._pending.setdefault(cid, report)
+            session.commit()
+
+    def _apply(self, client_session: local_model.ClientSession,
+               progress: dict, timestamp: float, unix_time: float):
+        phase = local_model.ClientSession.Phase(progress['phase'])
+        ix = progress.get('ix', 0)
+        count = progress.get('count', -1)
+
+        cid = client_session.client_id
+        with self._lock:
+            estimator = self._estimators.get(cid)
+            if estimator is None:
+                estimator = ProgressEstimator(self._cfg.eta_smoothing)
+                self._estimators[cid] = estimator
+                self._histories[cid] = RingBuffer(self._cfg.history_size,
+                                                  HISTORY_DTYPE)
+            history = self._histories[cid]
+        # repeating a sample does not change the estimate, so a report that
+        # could not be applied can be applied again
+        estimator.update(phase.value, ix, count, timestamp)
+
+        # only actual changes are tracked and broadcast
+        values = {
+            'phase': phase,
+            'ix': ix,
+            'count': count,
+            'time_per_ix': estimator.time_per_ix(phase.value),
+            'estimated_times': estimator.phase_times(),
+            'message': progress.get('message', client_session.message),
+            'epoch': progress.get('epoch', client_session.epoch),
+            'max_epoch': progress.get('max_epoch', client_session.max_epoch),
+        }
+        for k, v in values.items():
+            if getattr(client_session, k) != v:
+                setattr(client_session, k, v)
+
+        history.append((unix_time, ix, estimator.time_per_ix(phase.value)))
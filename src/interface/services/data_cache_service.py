@@ -0,0 +1,56 @@
+
+from dataclasses import dataclass, field
+import logging
+
+from sqlalchemy.orm import Session
+
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from utils.db.db_context import DBContext
+from utils.scheduling.data_keys import extract_data_keys
+
+
+class DataCacheService:
+
+    @dataclass
+    class Config:
+        # dot separated paths of the job config naming the data a job reads
+        # (see utils.scheduling.data_keys)
+        data_key_paths: list[str] = field(default_factory=lambda: [
+            'dataset'])
+        # cache entries kept per client, the least recently used ones are
+        # dropped
+        max_keys_per_client: int = 64
+
+        @staticmethod
+        def from_dict(cfg: dict):
+            return DataCacheService.Config(**cfg)
+
+    def __init__(self, db: DBContext, cfg: Config = Config()):
+        self._db = db
+        self._cfg = cfg
+
+    def data_keys(self, config: dict) -> set[str]:
+        return extract_data_keys(config, self._cfg.data_key_paths)
+
+    def report(self, cid: int, keys: list[str]):
+        # replaces the data a client holds with the reported keys, most
+        # recently used first
+        if (not isinstance(keys, list)
+                or not all(isinstance(k, str) for k in keys)):
+            raise ValueError('Cached keys must be a list of strings')
+
+        with self._db.create_session() as session:
+            ClientManager(session, cid).set_cached_keys(
+                keys, self._cfg.max_keys_per_client)
+            session.commit()
+
+    def record_finished(self, session: Session, cid: int, job: models.Job):
+        # a client that ran a job holds its data afterwards
+        keys = {k.key for k in job.data_keys}
+        if len(keys) == 0:
+            return
+
+        logging.debug(f'Client {cid} holds data {keys} of job {job.id}')
+        ClientManager(session, cid).add_cached_keys(
+            keys, self._cfg.max_keys_per_client)
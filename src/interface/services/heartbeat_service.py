@@ -0,0 +1,89 @@
+
+from dataclasses import dataclass
+import logging
+
+from flask_socketio import SocketIO
+
+from interface.services.client_connection_service \
+    import ClientConnectionService, NotConnectedError
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from utils.db.db_context import DBContext
+from utils.timing.timing_wheel import TimingWheel
+
+
+class HeartbeatService:
+
+    @dataclass
+    class Config:
+        # a client is considered dead if no heartbeat arrives for timeout
+        # seconds after its first one, clients never sending heartbeats are
+        # not tracked
+        timeout: float = 30.
+        # resolution of the deadlines, wheel_size * tick should exceed the
+        # timeout to keep each tick O(1)
+        tick: float = 1.
+        wheel_size: int = 512
+        # sub state of the running job of a dead client (SCHEDULED, RETURNED
+        # or FAILED, see JobManager.return_job)
+        orphaned_job_state: str = 'SCHEDULED'
+
+        @staticmethod
+        def from_dict(cfg: dict):
+            return HeartbeatService.Config(**cfg)
+
+    def __init__(self, db: DBContext, ccs: ClientConnectionService,
+                 socketio: SocketIO, cfg: Config = Config()):
+        self._db = db
+        self._ccs = ccs
+        self._socketio = socketio
+        self._cfg = cfg
+
+        self._orphaned_job_state = models.Job.SubState(cfg.orphaned_job_state)
+        self._wheel = TimingWheel(cfg.tick, cfg.wheel_size)
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self._socketio.start_background_task(self._run)
+
+    def beat(self, cid: int):
+        self._wheel.schedule(cid, self._cfg.timeout)
+
+    def touch(self, cid: int):
+        # other signs of life only extend deadlines of tracked clients
+        if cid in self._wheel:
+            self.beat(cid)
+
+    def cancel(self, cid: int):
+        self._wheel.cancel(cid)
+
+    def _run(self):
+        while True:
+            self._socketio.sleep(self._cfg.tick)
+            for cid in self._wheel.advance():
+                try:
+                    self._on_expired(cid)
+                except Exception:
+                    logging.exception(f'Failed to handle dead client {cid}')
+
+    def _on_expired(self, cid: int):
+        logging.warning(f'Client {cid} missed its heartbeat deadline')
+
+        try:
+            sid = self._ccs.remove_by_cid(cid)
+        except NotConnectedError:
+            return
+
+        with self._db.create_session() as session:
+            job = ClientManager(session, cid).get_active_job()
+            if job is not None:
+                JobManager(session, job.id).return_job(
+                    self._orphaned_job_state)
+            session.commit()
+
+        # a hung worker has to claim the client again once it recovers
+        self._socketio.server.disconnect(sid, namespace='/client')
@@ -0,0 +1,190 @@
+
+from dataclasses import asdict, dataclass
+import logging
+import threading
+
+from flask_socketio import SocketIO
+
+from interface.data_objects import JobDO
+from interface.services.client_connection_service \
+    import ClientConnectionService, NotConnectedError
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from model.exeptions import StateError
+from utils.db.db_context import DBContext
+
+
+class JobDispatchService:
+
+    @dataclass
+    class Config:
+        # seconds a client has to acknowledge a pushed job, afterwards the job
+        # goes back to the head of its schedule and the client falls back to
+        # claiming jobs itself
+        ack_timeout: float = 10.
+        # upper bound for the number of upcoming jobs sent with a claimed or
+        # pushed job
+        max_prefetch: int = 8
+        # clients with an empty schedule take the last job from the most
+        # loaded client, if that one has at least this many (not pinned)
+        # jobs waiting, None disables work stealing
+        steal_threshold: int | None = None
+        # extra weight of each stealable job whose data the thief holds when
+        # picking the client to steal from (in jobs), such jobs are also
+        # stolen before the last one
+        steal_locality_weight: float = 0.
+
+        @staticmethod
+        def from_dict(cfg: dict):
+            return JobDispatchService.Config(**cfg)
+
+    def __init__(self, db: DBContext, ccs: ClientConnectionService,
+                 socketio: SocketIO, cfg: Config = Config()):
+        self._db = db
+        self._ccs = ccs
+        self._socketio = socketio
+        self._cfg = cfg
+
+        # sockets that asked for jobs to be pushed -> prefetch count
+        self._push_sids: dict[str, int] = {}
+        # client id -> id of the pushed job awaiting acknowledgement (None
+        # while a dispatch is being prepared)
+        self._in_flight: dict[int, int | None] = {}
+        self._lock = threading.Lock()
+
+    def set_push(self, sid: str, cid: int, enabled: bool, prefetch: int = 0):
+        with self._lock:
+            if enabled:
+                self._push_sids[sid] = prefetch
+            else:
+                self._push_sids.pop(sid, None)
+
+        if enabled:
+            self.dispatch(cid)
+
+    def remove_socket(self, sid: str):
+        # unacknowledged jobs of the socket are returned by the ack timeout
+        with self._lock:
+            self._push_sids.pop(sid, None)
+
+    def claim(self, cid: int, prefetch: int = 0) -> dict | None:
+        # starts the client's next job and returns it along with up to
+        # prefetch upcoming jobs of its schedule (as a hint, e.g. for staging
+        # datasets), None if there is no job
+        with self._db.create_session() as session:
+            client = ClientManager(session, cid)
+            job = client.start_next_job(self._cfg.steal_threshold,
+                                        self._cfg.steal_locality_weight)
+            if job is None:
+                return None
+
+            payload = self._describe(client, job, prefetch)
+            session.commit()
+
+        return payload
+
+    def _describe(self, client: ClientManager, job: models.Job,
+                  prefetch: int) -> dict:
+        prefetch = max(min(prefetch, self._cfg.max_prefetch), 0)
+        upcoming = client.get_scheduled_jobs(prefetch) if prefetch > 0 else []
+        return {
+            'id': job.id,
+            'job': asdict(JobDO.from_db(job)),
+            'prefetch': [asdict(JobDO.from_db(j)) for j in upcoming],
+        }
+
+    def dispatch(self, cid: int) -> int | None:
+        # starts and pushes the next job of the client if it is connected with
+        # push enabled, ACTIVE and idle, returns the id of the pushed job
+        try:
+            sid = self._ccs.get_sid(cid)
+        except NotConnectedError:
+            return None
+
+        with self._lock:
+            if sid not in self._push_sids or cid in self._in_flight:
+                return None
+            prefetch = self._push_sids[sid]
+            self._in_flight[cid] = None
+
+        job_id = None
+        try:
+            with self._db.create_session() as session:
+                client = ClientManager(session, cid, True)
+                if (client.is_in_state(models.Client.State.ACTIVE)
+                        and client.get_active_job() is None):
+                    job = client.start_next_job(
+                        self._cfg.steal_threshold,
+                        self._cfg.steal_locality_weight)
+                    if job is not None:
+                        payload = self._describe(client, job, prefetch)
+                        session.commit()
+                        job_id = job.id
+        finally:
+            with self._lock:
+                if job_id is None:
+                    del self._in_flight[cid]
+                else:
+                    self._in_flight[cid] = job_id
+
+        if job_id is None:
+            return None
+
+        logging.info(f'Pushing job {job_id} to client {cid}')
+        try:
+            self._ccs.emit(cid, 'job_dispatched', payload,
+                           callback=lambda accepted=True:
+                               self._on_ack(cid, job_id, accepted))
+        except NotConnectedError:
+            pass
+        self._socketio.start_background_task(self._await_ack, cid, job_id)
+        return job_id
+
+    def _on_ack(self, cid: int, job_id: int, accepted: bool):
+        with self._lock:
+            if self._in_flight.get(cid) != job_id:
+                # the job was returned in the meantime
+                logging.warning(f'Client {cid} acknowledged job {job_id} '
+                                'after the timeout')
+                late = True
+            else:
+                del self._in_flight[cid]
+                late = False
+
+        if late:
+            if accepted:
+                self._ccs.emit(cid, 'dispatch_revoked', {'id': job_id})
+            return
+
+        if not accepted:
+            logging.info(f'Client {cid} rejected job {job_id}')
+            self._return_job(job_id)
+
+    def _await_ack(self, cid: int, job_id: int):
+        self._socketio.sleep(self._cfg.ack_timeout)
+
+        with self._lock:
+            if self._in_flight.get(cid) != job_id:
+                return
+            del self._in_flight[cid]
+
+        logging.warning(f'Client {cid} did not acknowledge job {job_id}, '
+                        'disabling push dispatch')
+        try:
+            sid = self._ccs.get_sid(cid)
+            with self._lock:
+                self._push_sids.pop(sid, None)
+        except NotConnectedError:
+            pass
+
+        self._return_job(job_id)
+
+    def _return_job(self, job_id: int):
+        try:
+            with self._db.create_session() as session:
+                JobManager(session, job_id).return_job(
+                    models.Job.SubState.SCHEDULED)
+                session.commit()
+        except StateError as e:
+            logging.warning(f'Could not return job {job_id} ({e})')
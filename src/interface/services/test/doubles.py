@@ -0,0 +1,42 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from model.db_model import models
+
+
+# DBContext on an in-memory SQLite database without change notifications,
+# all sessions share one connection
+class SQLiteDB:
+
+    def __init__(self):
+        self._engine = create_engine(
+            'sqlite://', poolclass=StaticPool,
+            connect_args={'check_same_thread': False})
+        models.Base.metadata.create_all(self._engine)
+
+    def create_session(self) -> Session:
+        return Session(self._engine)
+
+
+# records emits and background tasks instead of running them
+class FakeSocketIO:
+
+    def __init__(self):
+        self.emitted: list[tuple[str, tuple, str, object]] = []
+        self.tasks: list[tuple[object, tuple]] = []
+
+    def emit(self, event: str, args: tuple = (), to: str = None,
+             namespace: str = None, callback=None):
+        self.emitted.append((event, args, to, callback))
+
+    def start_background_task(self, target, *args):
+        self.tasks.append((target, args))
+
+    def sleep(self, seconds: float):
+        pass
+
+    def run_tasks(self):
+        tasks, self.tasks = self.tasks, []
+        for target, args in tasks:
+            target(*args)
@@ -0,0 +1,148 @@
+
+import unittest
+
+from interface.services.test.doubles import FakeSocketIO, SQLiteDB
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from model.local_model import models as local_model
+from utils.model_managing.subject_manager import SubjectManager
+from utils.scheduling.resources import Resources
+
+try:
+    from interface.services.auto_scheduler_service \
+        import AutoSchedulerService
+    from interface.services.client_connection_service \
+        import ClientConnectionService
+except ImportError as e:  # utils.db requires aithena
+    raise unittest.SkipTest(str(e))
+
+
+class RecordingDispatch:
+
+    def __init__(self):
+        self.dispatched: list[int] = []
+
+    def dispatch(self, cid: int):
+        self.dispatched.append(cid)
+
+
+class AutoSchedulerServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SQLiteDB()
+        self.sm = SubjectManager()
+        self.sm.get_notifier().set_context_factory(lambda: None)
+        socketio = FakeSocketIO()
+        self.ccs = ClientConnectionService(self.sm, socketio)
+        self.jds = RecordingDispatch()
+        self.scheduler = AutoSchedulerService(
+            self.db, self.sm, self.ccs, self.jds, socketio,
+            AutoSchedulerService.Config(max_queue_length=2))
+
+        with self.db.create_session() as session:
+            for name in ['a', 'b', 'c']:
+                ClientManager.create(session, name).state = \
+                    models.Client.State.ACTIVE
+            session.commit()
+
+        self.ccs.add('sid-a', 1)
+        self.ccs.add('sid-b', 2)
+
+    def create_jobs(self, count: int, priority: int = 0,
+                    requirements: Resources = Resources()) -> list[int]:
+        with self.db.create_session() as session:
+            ids = [JobManager.create(session, {}, str(i), '', priority,
+                                     requirements=requirements)
+                   for i in range(count)]
+            session.commit()
+        return ids
+
+    def schedule(self, client_id: int) -> list[int]:
+        with self.db.create_session() as session:
+            return [j.id for j in
+                    ClientManager(session, client_id).get_scheduled_jobs()]
+
+    def test_fills_free_slots(self):
+        ids = self.create_jobs(5)
+
+        assigned = self.scheduler.schedule_pending()
+        # least loaded first, up to max_queue_length each
+        self.assertDictEqual(assigned, {1: [ids[0], ids[2]],
+                                        2: [ids[1], ids[3]]})
+        self.assertListEqual(self.schedule(1), [ids[0], ids[2]])
+        self.assertCountEqual(self.jds.dispatched, [1, 2])
+
+        # no free slots left
+        self.assertDictEqual(self.scheduler.schedule_pending(), {})
+        self.assertEqual(len(self.jds.dispatched), 2)
+
+    def test_queued_jobs_take_slots(self):
+        queued = self.create_jobs(2)
+        with self.db.create_session() as session:
+            for id in queued:
+                JobManager(session, id).assign(1)
+            session.commit()
+        ids = self.create_jobs(3)
+
+        self.assertDictEqual(self.scheduler.schedule_pending(),
+                             {2: ids[:2]})
+
+    def test_only_active_connected_clients(self):
+        with self.db.create_session() as session:
+            ClientManager(session, 2).model().state = \
+                models.Client.State.SUSPENDED
+            session.commit()
+        ids = self.create_jobs(3)
+
+        # client 2 is suspended, client 3 is not connected
+        self.assertDictEqual(self.scheduler.schedule_pending(),
+                             {1: ids[:2]})
+
+    def test_priority(self):
+        low = self.create_jobs(3)
+        high = self.create_jobs(3, priority=5)
+
+        assigned = self.scheduler.schedule_pending()
+        self.assertCountEqual(assigned[1] + assigned[2], high + low[:1])
+
+    def test_ineligible_jobs_do_not_block(self):
+        with self.db.create_session() as session:
+            ClientManager(session, 1).set_capabilities(Resources(cores=4))
+            session.commit()
+        self.ccs.remove_by_cid(2)
+
+        self.create_jobs(2, priority=10, requirements=Resources(cores=64))
+        small = self.create_jobs(3)
+
+        self.assertDictEqual(self.scheduler.schedule_pending(),
+                             {1: small[:2]})
+
+    def test_client_loads(self):
+        with self.db.create_session() as session:
+            for work, cid in [(10., 1), (20., 1), (30., 2)]:
+                id = JobManager.create(session, {}, '', '',
+                                       estimated_work=work)
+                JobManager(session, id).assign(cid)
+            ClientManager(session, 1).start_next_job()
+            session.commit()
+
+        with self.sm.create_session() as session:
+            for cid, phase in [(1, local_model.ClientSession.Phase.TRAINING),
+                               (2, local_model.ClientSession.Phase.VALIDATION)]:
+                client_session = session.get(local_model.ClientSession, cid,
+                                             True)
+                client_session.phase = phase
+                client_session.time_per_ix = .5
+            session.commit()
+
+        forecast = {c['client_id']: c for c in self.scheduler.forecast()}
+        self.assertListEqual(sorted(forecast), [1, 2, 3])
+
+        # speed is only measured from training progress
+        self.assertEqual(forecast[1]['time_per_work'], .5)
+        self.assertEqual(forecast[1]['queued'], 2)
+        self.assertEqual(forecast[1]['remaining_time'], 15.)
+        self.assertEqual(forecast[2]['time_per_work'], 1.)
+        self.assertEqual(forecast[2]['remaining_time'], 30.)
+        self.assertEqual(forecast[3]['remaining_time'], 0.)
@@ -0,0 +1,145 @@
+
+import unittest
+
+from interface.services.test.doubles import FakeSocketIO, SQLiteDB
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from model.exeptions import StateError
+from utils.model_managing.subject_manager import SubjectManager
+
+try:
+    from interface.services.client_connection_service \
+        import ClientConnectionService
+    from interface.services.job_dispatch_service import JobDispatchService
+except ImportError as e:  # utils.db requires aithena
+    raise unittest.SkipTest(str(e))
+
+
+class JobDispatchServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = SQLiteDB()
+        sm = SubjectManager()
+        sm.get_notifier().set_context_factory(lambda: None)
+        self.socketio = FakeSocketIO()
+        self.ccs = ClientConnectionService(sm, self.socketio)
+        self.jds = JobDispatchService(
+            self.db, self.ccs, self.socketio,
+            JobDispatchService.Config(max_prefetch=2))
+
+        with self.db.create_session() as session:
+            for name in ['a', 'b']:
+                ClientManager.create(session, name).state = \
+                    models.Client.State.ACTIVE
+            session.flush()
+            self.jobs = []
+            for i in range(4):
+                id = JobManager.create(session, {}, str(i), '')
+                JobManager(session, id).assign(1)
+                self.jobs.append(id)
+            session.commit()
+
+        self.ccs.add('sid-a', 1)
+
+    def sub_state(self, job_id: int) -> models.Job.SubState:
+        with self.db.create_session() as session:
+            return JobManager(session, job_id).model().sub_state
+
+    def set_state(self, client_id: int, state: models.Client.State):
+        with self.db.create_session() as session:
+            ClientManager(session, client_id).model().state = state
+            session.commit()
+
+    def dispatched(self) -> list[tuple[str, tuple, object]]:
+        return [(event, args, callback)
+                for event, args, _, callback in self.socketio.emitted]
+
+    def test_claim(self):
+        payload = self.jds.claim(1, 5)
+        self.assertEqual(payload['id'], self.jobs[0])
+        self.assertEqual(payload['job']['id'], self.jobs[0])
+        # capped at max_prefetch
+        self.assertListEqual([j['id'] for j in payload['prefetch']],
+                             self.jobs[1:3])
+        self.assertEqual(self.sub_state(self.jobs[0]),
+                         models.Job.SubState.RUNNING)
+
+        with self.assertRaises(StateError):
+            self.jds.claim(1)
+        self.assertIsNone(self.jds.claim(2))
+
+    def test_claim_without_prefetch(self):
+        self.assertListEqual(self.jds.claim(1)['prefetch'], [])
+
+    def test_dispatch_conditions(self):
+        # not connected
+        self.assertIsNone(self.jds.dispatch(2))
+        # push not enabled
+        self.assertIsNone(self.jds.dispatch(1))
+
+        self.set_state(1, models.Client.State.SUSPENDED)
+        self.jds.set_push('sid-a', 1, True, 1)
+        self.assertListEqual(self.socketio.emitted, [])
+
+        self.set_state(1, models.Client.State.ACTIVE)
+        self.assertEqual(self.jds.dispatch(1), self.jobs[0])
+        (event, (payload,), _), = self.dispatched()
+        self.assertEqual(event, 'job_dispatched')
+        self.assertEqual(payload['id'], self.jobs[0])
+        self.assertListEqual([j['id'] for j in payload['prefetch']],
+                             self.jobs[1:2])
+
+        # awaiting the acknowledgement, then busy with the job
+        self.assertIsNone(self.jds.dispatch(1))
+        self.dispatched()[0][2]()
+        self.assertIsNone(self.jds.dispatch(1))
+
+    def test_ack(self):
+        self.jds.set_push('sid-a', 1, True)
+        (_, _, ack), = self.dispatched()
+        ack()
+
+        # the timeout does not return acknowledged jobs
+        self.socketio.run_tasks()
+        self.assertEqual(self.sub_state(self.jobs[0]),
+                         models.Job.SubState.RUNNING)
+        self.assertEqual(len(self.dispatched()), 1)
+
+    def test_reject(self):
+        self.jds.set_push('sid-a', 1, True)
+        (_, _, ack), = self.dispatched()
+        ack(False)
+
+        self.assertEqual(self.sub_state(self.jobs[0]),
+                         models.Job.SubState.SCHEDULED)
+        # push stays enabled
+        self.assertEqual(self.jds.dispatch(1), self.jobs[0])
+
+    def test_timeout(self):
+        self.jds.set_push('sid-a', 1, True)
+        self.socketio.run_tasks()
+
+        self.assertEqual(self.sub_state(self.jobs[0]),
+                         models.Job.SubState.SCHEDULED)
+        # push was disabled
+        self.assertIsNone(self.jds.dispatch(1))
+
+    def test_late_ack(self):
+        self.jds.set_push('sid-a', 1, True)
+        (_, _, ack), = self.dispatched()
+        self.socketio.run_tasks()
+
+        ack()
+        event, (payload,), _ = self.dispatched()[-1]
+        self.assertEqual(event, 'dispatch_revoked')
+        self.assertDictEqual(payload, {'id': self.jobs[0]})
+        self.assertEqual(self.sub_state(self.jobs[0]),
+                         models.Job.SubState.SCHEDULED)
+
+        # a late rejection needs no revocation
+        self.jds.set_push('sid-a', 1, True)
+        (_, _, ack) = self.dispatched()[-1]
+        self.socketio.run_tasks()
+        ack(False)
+        self.assertEqual(self.dispatched()[-1][0], 'job_dispatched')
@@ -1,98 +1,472 @@
 
 
+from collections import deque
+from dataclasses import dataclass
+import json
 import logging
-import flask_socketio
-from interface.data_objects import ClientDO, JobDO
-from interface.services.client_connection_service import ClientConnectionService
+import queue
+import re
+import threading
+from typing import Iterable
+import uuid
+from flask_socketio import SocketIO
+from sqlalchemy.orm import Session
+from interface.data_objects import ClientDO, ClientProgressDO, JobDO
+from interface.services.update_outbox_relay import UpdateOutboxRelay
 import model.db_model.models as db_model
 import model.local_model.models as local_model
 
 from utils.db.db_context import DBContext
 from utils.model_managing.subject_manager import SubjectManager
+from utils.pubsub.encoding import Encoding, JsonEncoding, create_encoding
+from utils.pubsub.outbound_queue import OutboundQueue
+from utils.pubsub.queue_backend import QueueBackend, create_queue_backend
+from utils.pubsub.topic_index import TopicIndex
 from utils.session.staging_session import (
     AddDict, DeleteDict, UpdateDict, StagingSession
 )
 
 
+class UpdateTopics:
+    ALL = 'all'
+    CLIENTS = 'clients'
+    JOBS = 'jobs'
+
+    _PATTERN = re.compile(r'^(all|clients|jobs|client/\d+|job/\d+)$')
+
+    @staticmethod
+    def client(client_id: int) -> str:
+        return f'client/{client_id}'
+
+    @staticmethod
+    def job(job_id: int) -> str:
+        return f'job/{job_id}'
+
+    @staticmethod
+    def is_valid(topic: object) -> bool:
+        return (isinstance(topic, str)
+                and UpdateTopics._PATTERN.match(topic) is not None)
+
+
+# (event, [(data, topics), ...]) for each event emitted by one flush
+EventBatch = list[tuple[str, list[tuple[object, set[str]]]]]
+
+
 class UpdateEventService:
 
-    class EventStage(StagingSession):
+    @dataclass
+    class Config:
+        # number of batches kept for replay
+        replay_buffer_size: int = 1024
+        # Flow controlled subscribers acknowledge every update event, at most
+        # ack_window events are sent without acknowledgement and the rest
+        # waits in the subscriber's bounded outbound queue. Subscribers opt
+        # in when connecting (ack=1) or with set_flow_control, True makes it
+        # the default for subscribers not opting out (ack=0). Others are sent
+        # everything immediately, buffered by the socket layer.
+        flow_control: bool = False
+        # unacknowledged emits per flow controlled subscriber
+        ack_window: int = 8
+        # queued items before pending changes are coalesced
+        queue_soft_limit: int = 256
+        # queued items after coalescing before overflow_action is taken
+        queue_hard_limit: int = 1024
+        # 'resync' or 'disconnect'
+        overflow_action: str = 'resync'
+        # committed batches waiting for the dispatch worker before
+        # publishing blocks
+        dispatch_queue_size: int = 10000
+        # Batches are exchanged between server processes through this queue
+        # ('memory://', 'sqlite:///<path>'). If set, DB changes are written
+        # to the update outbox within their transaction and relayed from
+        # there. Local batches only if not set.
+        queue_url: str = None
+        # seconds between outbox polls of the relay
+        relay_poll_interval: float = 1.
+
         @staticmethod
-        def _emit(event: str, args: dict):
-            flask_socketio.emit(event, args,
-                                namespace='/update', broadcast=True)
-            logging.debug(f'Emitted event {event} with args {args}')
+        def from_dict(cfg: dict):
+            return UpdateEventService.Config(**cfg)
 
-        def __init__(self):
+    class Subscriber:
+        def __init__(self, cfg: 'UpdateEventService.Config'):
+            self.encoding: Encoding = JsonEncoding()
+            self.flow_control = cfg.flow_control
+            self.in_flight = 0
+            self.queue = OutboundQueue(cfg.queue_soft_limit,
+                                       cfg.queue_hard_limit)
+
+    class EventStage(StagingSession):
+
+        def __init__(self, service: 'UpdateEventService'):
             super().__init__()
+            self._service = service
+            self._topics: dict[tuple[str, int], set[str]] = {}
+            self._outboxed = False
+
+        def add_topics(self, type_: str, id: int, topics: Iterable[str]):
+            key = (type_, id)
+            if key not in self._topics:
+                self._topics[key] = {UpdateTopics.ALL}
+            self._topics[key].update(topics)
+
+        def mark_outboxed(self):
+            self._outboxed = True
+
+        def build_batch(self) -> EventBatch:
+            def topics(type_: str, id: int) -> set[str]:
+                return self._topics.get((type_, id), {UpdateTopics.ALL})
+
+            batch: EventBatch = []
+
+            for type_, objects in self._staged_adds.items():
+                batch.append((f'{type_}-added', [
+                    (o.__dict__, topics(type_, o.id)) for o in objects
+                ]))
+
+            for type_, ids in self._staged_deletes.items():
+                batch.append((f'{type_}-deleted', [
+                    (id, topics(type_, id)) for id in ids
+                ]))
+
+            for type_, entity_updates in self._staged_updates.items():
+                batch.append((f'{type_}-changed', [
+                    ({'id': id, 'updates': updates}, topics(type_, id))
+                    for id, updates in entity_updates.items()
+                ]))
+
+            return batch
+
+        def _clear(self):
+            super()._clear()
+            self._topics.clear()
+            self._outboxed = False
 
         def _flush_staged_data(
                 self, deletes: DeleteDict, adds: AddDict, updates: UpdateDict):
 
-            for type_, objects in adds.items():
-                self._emit(f'{type_}-added',
-                           [o.__dict__ for o in objects])
-
-            for type_, ids in deletes.items():
-                self._emit(f'{type_}-deleted', ids)
+            # outboxed batches were persisted with the transaction and are
+            # published by the relay
+            if self._outboxed:
+                return self._service.wake_relay()
 
-            for type_, entity_updates in updates.items():
-                self._emit(f'{type_}-changed', [{
-                    'id': id,
-                    'updates': updates
-                } for id, updates in entity_updates.items()])
+            batch = self.build_batch()
+            if len(batch) != 0:
+                self._service.publish(batch)
 
     def __init__(self,
-                 db: DBContext, sm: SubjectManager):
+                 db: DBContext, sm: SubjectManager, socketio: SocketIO,
+                 cfg: Config = Config()):
+        if cfg.overflow_action not in ['resync', 'disconnect']:
+            raise ValueError(f'Unknown overflow action {cfg.overflow_action}')
+
         self._sm = sm
         self._db = db
+        self._socketio = socketio
+        self._cfg = cfg
+
+        # every published batch gets the next sequence number, the most
+        # recent batches are kept for replay to reconnecting subscribers
+        self._stream_id = uuid.uuid4().hex
+        self._seq = 0
+        self._history: deque[tuple[int, EventBatch]] \
+            = deque(maxlen=cfg.replay_buffer_size)
+        self._lock = threading.RLock()
+
+        self._subscriptions = TopicIndex()
+        self._subscribers: dict[str, UpdateEventService.Subscriber] = {}
+
+        # committed batches are dispatched by a background worker so socket
+        # I/O does not add to the latency of the committing request
+        self._dispatch_queue: queue.Queue[EventBatch] \
+            = queue.Queue(cfg.dispatch_queue_size)
+        self._started = False
+
+        self._backend: QueueBackend = None
+        self._relay: UpdateOutboxRelay = None
+        if cfg.queue_url is not None:
+            self._backend = create_queue_backend(cfg.queue_url)
+            self._relay = UpdateOutboxRelay(db, self._backend, socketio,
+                                            cfg.relay_poll_interval)
+            db.add_before_commit_hook(self._write_outbox)
 
         db_notifier = db.get_notifier()
-        db_notifier.set_context_factory(lambda: UpdateEventService.EventStage())
+        db_notifier.set_context_factory(
+            lambda: UpdateEventService.EventStage(self))
 
-        db_notifier.add_listener(str(db_model.Client),
+        db_notifier.add_listener(db_model.Client,
                                  self.on_client_event)
-        db_notifier.add_listener(str(db_model.Job),
+        db_notifier.add_listener(db_model.Job,
                                  self.on_job_event)
-        db_notifier.add_listener(str(db_model.JobScheduleEntry),
+        db_notifier.add_listener(db_model.JobScheduleEntry,
                                  self.on_schedule_entry_event)
 
         sm_notifier = sm.get_notifier()
-        sm_notifier.set_context_factory(lambda: UpdateEventService.EventStage())
-        sm_notifier.add_listener(str(local_model.ClientSession),
+        sm_notifier.set_context_factory(
+            lambda: UpdateEventService.EventStage(self))
+        sm_notifier.add_listener(local_model.ClientSession,
                                  self.on_client_session_event)
 
+    # --- subscriptions ---
+
+    def subscribe(self, sid: str, topics: list[str]) -> None:
+        invalid = [t for t in topics if not UpdateTopics.is_valid(t)]
+        if len(invalid) != 0:
+            raise ValueError(f'Invalid topics {invalid}')
+
+        self._subscriptions.subscribe(sid, topics)
+
+    def unsubscribe(self, sid: str, topics: list[str]) -> None:
+        self._subscriptions.unsubscribe(sid, topics)
+
+    def remove_subscriber(self, sid: str) -> None:
+        with self._lock:
+            self._subscriptions.remove(sid)
+            self._subscribers.pop(sid, None)
+
+    def set_encoding(self, sid: str, name: str) -> None:
+        encoding = create_encoding(name)
+        with self._lock:
+            self._get_subscriber(sid).encoding = encoding
+
+    def set_flow_control(self, sid: str, enabled: bool) -> None:
+        with self._lock:
+            subscriber = self._get_subscriber(sid)
+            subscriber.flow_control = enabled
+            if not enabled:
+                subscriber.in_flight = 0
+            self._drain(sid, subscriber)
+
+    def get_topics(self, sid: str) -> set[str]:
+        return self._subscriptions.topics(sid)
+
+    def get_subscriber_stats(self) -> list[dict]:
+        with self._lock:
+            return [{
+                'sid': sid,
+                'topics': sorted(self._subscriptions.topics(sid)),
+                'encoding': s.encoding.name,
+                'flowControl': s.flow_control,
+                'inFlight': s.in_flight,
+                'queueDepth': s.queue.depth(),
+            } for sid, s in self._subscribers.items()]
+
+    def _get_subscriber(self, sid: str) -> Subscriber:
+        if sid not in self._subscribers:
+            self._subscribers[sid] = UpdateEventService.Subscriber(self._cfg)
+        return self._subscribers[sid]
+
+    # --- sequenced stream ---
+
+    def get_stream_state(self) -> dict:
+        with self._lock:
+            return {'stream': self._stream_id, 'seq': self._seq}
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        self._socketio.start_background_task(self._run_dispatcher)
+        if self._backend is not None:
+            self._socketio.start_background_task(self._run_consumer)
+            self._relay.start()
+
+    def publish(self, batch: EventBatch):
+        self.start()
+
+        if self._backend is not None:
+            self._backend.publish(self._serialize(batch))
+        else:
+            self._dispatch_queue.put(batch)
+
+    def wake_relay(self):
+        self.start()
+        self._relay.wake()
+
+    def _write_outbox(self, session: Session, context: object):
+        if not isinstance(context, UpdateEventService.EventStage):
+            return
+
+        batch = context.build_batch()
+        if len(batch) != 0:
+            UpdateOutboxRelay.write(session, self._serialize(batch))
+            context.mark_outboxed()
+
+    @staticmethod
+    def _serialize(batch: EventBatch) -> str:
+        return json.dumps([
+            [event, [[data, sorted(topics)] for data, topics in items]]
+            for event, items in batch
+        ])
+
+    @staticmethod
+    def _deserialize(message: str) -> EventBatch:
+        return [
+            (event, [(data, set(topics)) for data, topics in items])
+            for event, items in json.loads(message)
+        ]
+
+    def _run_consumer(self):
+        while True:
+            try:
+                for message in self._backend.poll(1.):
+                    self._dispatch_queue.put(self._deserialize(message))
+            except Exception as e:
+                logging.error(f'Failed to consume update queue ({e})')
+
+    def _run_dispatcher(self):
+        while True:
+            batch = self._dispatch_queue.get()
+            try:
+                with self._lock:
+                    self._seq += 1
+                    self._history.append((self._seq, batch))
+                    self._dispatch(self._seq, batch)
+            except Exception as e:
+                logging.error(f'Failed to dispatch update batch ({e})')
+            finally:
+                self._dispatch_queue.task_done()
+
+    def replay(self, sid: str, stream_id: str, last_seq: int) -> bool:
+        # returns False if the missed batches cannot be replayed and the
+        # subscriber has to resync from a snapshot
+        with self._lock:
+            if stream_id != self._stream_id or last_seq > self._seq:
+                return False
+
+            if last_seq == self._seq:
+                return True
+
+            if len(self._history) == 0 or self._history[0][0] > last_seq + 1:
+                return False
+
+            for seq, batch in self._history:
+                if seq > last_seq:
+                    self._dispatch(seq, batch, sid)
+
+            return True
+
+    def _dispatch(self, seq: int, batch: EventBatch, only_sid: str = None):
+        # every subscriber receives one message per event containing only the
+        # items matching at least one of its topics
+        for event, items in batch:
+            per_subscriber: dict[str, list] = {}
+            for data, topics in items:
+                for sid in self._subscriptions.subscribers(topics):
+                    if only_sid is None or sid == only_sid:
+                        per_subscriber.setdefault(sid, []).append(data)
+
+            for sid, data in per_subscriber.items():
+                self._enqueue(sid, seq, event, data)
+
+            logging.debug(f'Dispatched event {event} (seq {seq}) to '
+                          f'{len(per_subscriber)} subscribers with args '
+                          f'{[d for d, _ in items]}')
+
+    def _enqueue(self, sid: str, seq: int, event: str, data: list):
+        subscriber = self._get_subscriber(sid)
+
+        if not subscriber.queue.push(seq, event, data):
+            return self._on_overflow(sid, subscriber)
+
+        self._drain(sid, subscriber)
+
+    def _drain(self, sid: str, subscriber: Subscriber):
+        while (not subscriber.flow_control
+               or subscriber.in_flight < self._cfg.ack_window):
+            message = subscriber.queue.pop()
+            if message is None:
+                return
+
+            seq, event, data = message
+            payload = subscriber.encoding.encode(event, data)
+            if payload is None:
+                continue
+
+            callback = None
+            if subscriber.flow_control:
+                subscriber.in_flight += 1
+                callback = (lambda *_: self._on_ack(sid, subscriber))
+
+            self._socketio.emit(event, (payload, seq), to=sid,
+                                namespace='/update', callback=callback)
+
+    def _on_ack(self, sid: str, subscriber: Subscriber):
+        with self._lock:
+            if self._subscribers.get(sid) is not subscriber:
+                return
+
+            subscriber.in_flight = max(0, subscriber.in_flight - 1)
+            self._drain(sid, subscriber)
+
+    def _on_overflow(self, sid: str, subscriber: Subscriber):
+        logging.warning(f'Outbound queue of update socket {sid} overflowed '
+                        f'({self._cfg.overflow_action})')
+
+        subscriber.queue.clear()
+
+        if self._cfg.overflow_action == 'disconnect':
+            self.remove_subscriber(sid)
+            self._socketio.server.disconnect(sid, namespace='/update')
+        else:
+            self._socketio.emit('resync', self.get_stream_state(), to=sid,
+                                namespace='/update')
+
+    # --- change listeners ---
+
     def on_client_event(self,
                         context: EventStage,
                         event: str, obj: object, data: dict):
         client: db_model.Client = obj
 
+        context.add_topics('client', client.id,
+                           [UpdateTopics.CLIENTS,
+                            UpdateTopics.client(client.id)])
+
         if event == 'add':
             context.stage_add('client', ClientDO.create(client, False))
         elif event == 'delete':
             context.stage_delete('client', client.id)
         elif event == 'update':
             context.stage_update(
-                'client', client.id, ClientDO.filter_updates(data))
+                'client', client.id, ClientDO.filter_updates(client, data))
 
     def on_client_session_event(self,
                                 context: EventStage,
                                 event: str, obj: object, data: dict):
 
         client_session: local_model.ClientSession = obj
+        client_id = client_session.client_id
+
+        context.add_topics('client', client_id,
+                           [UpdateTopics.CLIENTS,
+                            UpdateTopics.client(client_id)])
 
         if event == 'add':
-            context.stage_update('client', client_session.client_id,
-                                 {'connected': True})
+            context.stage_update('client', client_id, {'connected': True})
         elif event == 'delete':
-            context.stage_update('client', client_session.client_id,
-                                 {'connected': False})
+            context.stage_update('client', client_id, {'connected': False})
+        elif event == 'update':
+            progress = {k: v for k, v in
+                        vars(ClientProgressDO.create(client_session)).items()
+                        if k != 'client_id'}
+            context.add_topics('client_progress', client_id,
+                               [UpdateTopics.CLIENTS,
+                                UpdateTopics.client(client_id)])
+            context.stage_update('client_progress', client_id, progress)
 
     def on_job_event(self,
                      context: EventStage,
                      event: str, obj: object, data: dict):
         job: db_model.Job = obj
 
+        topics = [UpdateTopics.JOBS, UpdateTopics.job(job.id)]
+        if job.schedule_entry is not None:
+            topics.append(UpdateTopics.client(job.schedule_entry.client_id))
+        context.add_topics('job', job.id, topics)
+
         if event == 'add':
             context.stage_add('job', JobDO.from_db(job))
         elif event == 'delete':
@@ -107,14 +481,17 @@ class UpdateEventService:
 
         logging.debug(f'schedule_entry ({entry}) - {event} - ')
 
-        if event == 'add':
-            context.stage_update('job', entry.job_id,
-                                 {'client_id': entry.client_id})
+        # the client whose queue the job enters or leaves is notified as well
+        context.add_topics('job', entry.job_id,
+                           [UpdateTopics.JOBS,
+                            UpdateTopics.job(entry.job_id),
+                            UpdateTopics.client(entry.client_id)])
 
-        if event == 'delete':
+        if event == 'add' or event == 'update':
             context.stage_update('job', entry.job_id,
-                                 {'client_id': -1})
+                                 {'client_id': entry.client_id,
+                                  'rank': entry.rank})
 
-        if event == 'update':
+        if event == 'delete':
             context.stage_update('job', entry.job_id,
-                                 {'client_id': entry.client_id})
+                                 {'client_id': -1, 'rank': -1})
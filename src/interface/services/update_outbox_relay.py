@@ -0,0 +1,75 @@
+
+
+import logging
+import threading
+from flask_socketio import SocketIO
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from model.db_model.models import UpdateOutboxEntry
+from utils.db.db_context import DBContext
+from utils.pubsub.queue_backend import QueueBackend
+
+
+class UpdateOutboxRelay:
+
+    def __init__(self,
+                 db: DBContext, backend: QueueBackend, socketio: SocketIO,
+                 poll_interval: float = 1., batch_size: int = 100):
+        self._db = db
+        self._backend = backend
+        self._socketio = socketio
+        self._poll_interval = poll_interval
+        self._batch_size = batch_size
+
+        self._wake = threading.Event()
+
+    @staticmethod
+    def write(session: Session, payload: str) -> None:
+        # core insert, so the entry itself does not trigger change
+        # notifications when the commit flushes it
+        session.execute(insert(UpdateOutboxEntry).values(payload=payload))
+
+    def start(self) -> None:
+        self._socketio.start_background_task(self._run)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self._poll_interval)
+            self._wake.clear()
+
+            try:
+                self.relay_pending()
+            except Exception as e:
+                logging.error(f'Failed to relay update outbox ({e})')
+
+    def relay_pending(self) -> int:
+        # Entries are locked while being published, so relays of several
+        # processes are serialized and preserve the outbox order. A crash
+        # between publishing and committing leads to a second delivery.
+        relayed = 0
+        while True:
+            with self._db.create_session() as session:
+                entries = session.execute(
+                    select(UpdateOutboxEntry.id, UpdateOutboxEntry.payload)
+                    .order_by(UpdateOutboxEntry.id)
+                    .limit(self._batch_size)
+                    .with_for_update()
+                ).all()
+
+                if len(entries) == 0:
+                    return relayed
+
+                for _, payload in entries:
+                    self._backend.publish(payload)
+
+                session.execute(
+                    delete(UpdateOutboxEntry)
+                    .where(UpdateOutboxEntry.id.in_([id for id, _ in entries]))
+                )
+                session.commit()
+
+            relayed += len(entries)
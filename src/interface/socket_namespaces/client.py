@@ -7,16 +7,29 @@ from model.db_model.client_manager import ClientManager
 from model.exeptions import StateError
 from interface.services.client_connection_service \
     import ClientConnectionService, NotConnectedError
+from interface.services.client_progress_service import ClientProgressService
+from interface.services.data_cache_service import DataCacheService
+from interface.services.heartbeat_service import HeartbeatService
+from interface.services.job_dispatch_service import JobDispatchService
+from model.db_model import models
+from model.db_model.job_manager import JobManager
 from utils.db.db_context import DBContext
+from utils.scheduling.resources import Resources
 from interface.socket_namespaces.socket_utils import error, success
 
 
 class ClientEventNamespace(Namespace):
 
-    def __init__(self, db: DBContext, ccs: ClientConnectionService):
+    def __init__(self, db: DBContext, ccs: ClientConnectionService,
+                 cps: ClientProgressService, hbs: HeartbeatService,
+                 jds: JobDispatchService, dcs: DataCacheService):
         super().__init__('/client')
         self._db = db
         self._ccs = ccs
+        self._cps = cps
+        self._hbs = hbs
+        self._jds = jds
+        self._dcs = dcs
 
     # --- connection event handlers ---
 
@@ -24,41 +37,57 @@ class ClientEventNamespace(Namespace):
         logging.info(f'Socket with id {request.sid} connected')
 
     def on_disconnect(self):
+        self._jds.remove_socket(request.sid)
         self._drop_claim(request.sid)
         logging.info(f'socket {request.sid} disconnected')
 
     # --- client claim handlers ---
 
     def _drop_claim(self, sid: int) -> bool:
-        client_id = self._ccs.remove_by_sid(sid)
-        if client_id is not None:
-            logging.info(f'Claim on client {client_id} dropped '
-                         f'(socket {request.sid})')
-            return True
-        return False
+        try:
+            client_id = self._ccs.remove_by_sid(sid)
+        except NotConnectedError:
+            return False
+
+        self._hbs.cancel(client_id)
+        logging.info(f'Claim on client {client_id} dropped '
+                     f'(socket {request.sid})')
+        return True
 
     def on_drop_claim(self):
         if not self._drop_claim(request.sid):
             logging.warning(f'Unassigned socket {request.sid} tried to drop'
                             ' claim')
 
-    def on_claim_client(self, client_id: int):
+    def on_claim_client(self, client_id: int, capabilities: dict = None):
+        # capabilities ({cores, memory, datasets, tags}) replace the ones
+        # advertised before, jobs are only matched to clients meeting their
+        # requirements
         logging.debug(f'Claiming client {client_id}')
         if not isinstance(client_id, int):
             return error(self, 'Client id must be an integer')
 
         try:
-            with self._db.create_session() as session:
-                client = ClientManager(session, client_id).model()
+            resources = (Resources.from_dict(capabilities)
+                         if capabilities is not None else None)
 
-            self._ccs.add(request.sid, client_id)
-            success(
-                self, 'claim_successfull', {
+            with self._db.create_session() as session:
+                client = ClientManager(session, client_id)
+                claimed = {
                     'id': client_id,
-                    'name': client.name,
-                    'state': client.state.value
-                }, f"Socket {request.sid} claimed client {client_id}"
-            )
+                    'name': client.model().name,
+                    'state': client.model().state.value
+                }
+
+                # capabilities are only replaced by the socket holding the
+                # claim (raises ClaimError otherwise)
+                self._ccs.add(request.sid, client_id)
+                if resources is not None:
+                    client.set_capabilities(resources)
+                    session.commit()
+
+            success(self, 'claim_successfull', claimed,
+                    f"Socket {request.sid} claimed client {client_id}")
 
         except ValueError as e:
             error(self, f'Claim failed! {e}')
@@ -90,7 +119,10 @@ class ClientEventNamespace(Namespace):
                 session.commit()
             success(self, data={'id': client_id, 'state': target_state})
         except Exception as e:
-            error(self, str(e))
+            return error(self, str(e))
+
+        if active:
+            self._jds.dispatch(client_id)
 
     def on_get_active_job(self):
         try:
@@ -116,15 +148,116 @@ class ClientEventNamespace(Namespace):
 
         logging.debug(f'Client {client_id} claiming next job')
 
+        try:
+            claimed = self._jds.claim(client_id)
+            if claimed is None:
+                return error(self, "No jobs, available!")
+
+            success(self, 'job_claimed', {'id': claimed['id']})
+
+        except StateError as e:
+            return error(self, {str(e)})
+
+    def on_claim_next_jobs(self, prefetch: int = 0):
+        # like claim_next_job, but answers with the claimed job including its
+        # config and up to prefetch upcoming jobs of the schedule
+        # ({id, job, prefetch})
+        try:
+            client_id = self._ccs.get_cid(request.sid)
+        except NotConnectedError:
+            return error(self, 'socket is not claimed')
+
+        if not isinstance(prefetch, int):
+            return error(self, 'prefetch must be an integer')
+
+        try:
+            payload = self._jds.claim(client_id, prefetch)
+        except StateError as e:
+            return error(self, str(e))
+
+        if payload is None:
+            return error(self, "No jobs, available!")
+        success(self, 'jobs_claimed', payload)
+
+    def on_set_push_dispatch(self, enabled: bool, prefetch: int = 0):
+        # with push dispatch, the next job of an idle and ACTIVE client is
+        # sent as 'job_dispatched' (payload as for claim_next_jobs) as soon as
+        # there is one, the client acknowledges it (optionally with False to
+        # reject it)
+        try:
+            client_id = self._ccs.get_cid(request.sid)
+        except NotConnectedError:
+            return error(self, 'socket is not claimed')
+
+        if not isinstance(prefetch, int):
+            return error(self, 'prefetch must be an integer')
+
+        success(self, 'push_dispatch_set', {'enabled': bool(enabled)})
+        self._jds.set_push(request.sid, client_id, bool(enabled), prefetch)
+
+    def on_finish_job(self, succeeded: bool = True):
+        try:
+            client_id = self._ccs.get_cid(request.sid)
+        except NotConnectedError:
+            return error(self, 'socket is not claimed')
+
+        sub_state = (models.Job.SubState.FINISHED if succeeded
+                     else models.Job.SubState.FAILED)
+
         try:
             with self._db.create_session() as session:
-                job = ClientManager(session, client_id).start_next_job()
+                job = ClientManager(session, client_id).get_active_job()
                 if job is None:
-                    return error(self, "No jobs, available!")
-
+                    return error(self, 'No active job')
+                job_id = job.id
+                self._dcs.record_finished(session, client_id, job)
+                released = JobManager(session, job_id).finish(sub_state)
+                # clients holding jobs that waited for this one
+                client_ids = {j.schedule_entry.client_id for j in released
+                              if j.schedule_entry is not None}
                 session.commit()
+        except StateError as e:
+            return error(self, str(e))
 
-                success(self, 'job_claimed', {'id': job.id})
+        success(self, 'job_finished', {'id': job_id,
+                                       'state': sub_state.value})
+        for cid in client_ids | {client_id}:
+            self._jds.dispatch(cid)
 
-        except StateError as e:
-            return error(self, {str(e)})
+    def on_progress(self, progress: dict):
+        # reports are buffered and applied at a limited rate, so they are not
+        # acknowledged individually
+        try:
+            client_id = self._ccs.get_cid(request.sid)
+        except NotConnectedError:
+            return error(self, 'socket is not claimed')
+
+        self._hbs.touch(client_id)
+        try:
+            self._cps.report(client_id, progress)
+        except ValueError as e:
+            return error(self, f'Invalid progress report! {e}')
+
+    def on_report_cache(self, keys: list):
+        # keys of the data the client holds locally (replacing earlier
+        # reports), jobs reading it are preferably scheduled on the client
+        try:
+            client_id = self._ccs.get_cid(request.sid)
+        except NotConnectedError:
+            return error(self, 'socket is not claimed')
+
+        try:
+            self._dcs.report(client_id, keys)
+        except ValueError as e:
+            return error(self, f'Invalid cache report! {e}')
+        success(self, data={'id': client_id})
+
+    def on_heartbeat(self):
+        # the first heartbeat of a claimed client starts tracking it, missing
+        # the deadline releases the claim and returns its running job
+        try:
+            client_id = self._ccs.get_cid(request.sid)
+        except NotConnectedError:
+            return error(self, 'socket is not claimed')
+
+        self._hbs.beat(client_id)
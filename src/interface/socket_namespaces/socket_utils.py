@@ -1,6 +1,7 @@
 
 
 import logging
+from flask import request
 from flask_socketio import Namespace
 
 
@@ -10,9 +11,9 @@ def success(ns: Namespace,
             log: str = None):
     if log is not None:
         logging.info(log)
-    ns.emit(event, data)
+    ns.emit(event, data, room=request.sid)
 
 
 def error(ns: Namespace, msg: str):
     logging.warning(msg)
-    ns.emit('error', {'message': msg})
+    ns.emit('error', {'message': msg}, room=request.sid)
@@ -1,9 +1,98 @@
 
 
+import logging
+from flask import request
 from flask_socketio import Namespace
 
+from interface.services.update_event_service import (
+    UpdateEventService, UpdateTopics
+)
+from interface.socket_namespaces.socket_utils import error, success
+
 
 class UpdateEventNamespace(Namespace):
 
-    def __init__(self):
+    def __init__(self, ues: UpdateEventService):
         super().__init__('/update')
+        self._ues = ues
+
+    # --- connection event handlers ---
+
+    def on_connect(self):
+        encoding = request.args.get('encoding')
+        if encoding is not None:
+            try:
+                self._ues.set_encoding(request.sid, encoding)
+            except ValueError as e:
+                logging.warning(f'Rejecting update socket ({e})')
+                return False
+
+        # overrides the server's default for acknowledging update events
+        ack = request.args.get('ack')
+        if ack in ['1', 'true']:
+            self._ues.set_flow_control(request.sid, True)
+        elif ack in ['0', 'false']:
+            self._ues.set_flow_control(request.sid, False)
+
+        # sockets follow every change until they narrow their subscription
+        self._ues.subscribe(request.sid, [UpdateTopics.ALL])
+        self.emit('stream', self._ues.get_stream_state(), room=request.sid)
+        logging.info(f'Update socket with id {request.sid} connected')
+
+    def on_disconnect(self):
+        self._ues.remove_subscriber(request.sid)
+        logging.info(f'Update socket {request.sid} disconnected')
+
+    # --- subscription handlers ---
+
+    def on_subscribe(self, topics: list[str]):
+        if not isinstance(topics, list):
+            return error(self, 'Topics must be a list')
+
+        try:
+            self._ues.subscribe(request.sid, topics)
+        except ValueError as e:
+            return error(self, str(e))
+
+        success(self, 'subscribed',
+                {'topics': sorted(self._ues.get_topics(request.sid))})
+
+    def on_unsubscribe(self, topics: list[str]):
+        if not isinstance(topics, list):
+            return error(self, 'Topics must be a list')
+
+        self._ues.unsubscribe(request.sid, topics)
+        success(self, 'unsubscribed',
+                {'topics': sorted(self._ues.get_topics(request.sid))})
+
+    def on_set_encoding(self, name: str):
+        try:
+            self._ues.set_encoding(request.sid, name)
+        except ValueError as e:
+            return error(self, str(e))
+
+        success(self, 'encoding_set', {'encoding': name})
+
+    def on_set_flow_control(self, enabled: bool):
+        if not isinstance(enabled, bool):
+            return error(self, 'Flow control flag must be a boolean')
+
+        self._ues.set_flow_control(request.sid, enabled)
+        success(self, 'flow_control_set', {'enabled': enabled})
+
+    # --- stream handlers ---
+
+    def on_resume(self, state: dict):
+        # topics have to be subscribed before resuming, missed batches are
+        # replayed according to the current subscription
+        if (not isinstance(state, dict)
+                or not isinstance(state.get('seq'), int)):
+            return error(self, 'Resume expects {stream, seq}')
+
+        if not self._ues.replay(request.sid, state.get('stream'),
+                                state['seq']):
+            logging.info(f'Update socket {request.sid} has to resync')
+            return self.emit('resync', self._ues.get_stream_state(),
+                             room=request.sid)
+
+        success(self, 'resumed', self._ues.get_stream_state())
@@ -0,0 +1,22 @@
+
+import unittest
+
+from interface.data_objects import ClientDO
+from model.db_model import models
+
+
+class ClientDOTest(unittest.TestCase):
+
+    def test_filter_updates(self):
+        client = models.Client(name='a', cores=4, memory=8., labels=[
+            models.ClientLabel(kind=models.LabelKind.TAG, name='gpu')])
+
+        self.assertDictEqual(
+            ClientDO.filter_updates(client, {'name': 'a', 'id': 1}),
+            {'name': 'a'})
+
+        # any changed capability updates all of them
+        self.assertDictEqual(
+            ClientDO.filter_updates(client, {'labels': None}),
+            {'capabilities': {'cores': 4, 'memory': 8., 'datasets': [],
+                              'tags': ['gpu']}})
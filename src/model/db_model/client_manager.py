@@ -1,10 +1,15 @@
 import logging
 from typing import Optional
-from sqlalchemy import and_, func, select, tuple_
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy import and_, case, exists, func, select
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy.sql import false
 
 from model.db_model import models
+from model.db_model.matching import labels_of, requirements_met
 from model.exeptions import IndexValueError, StateError
+from utils.scheduling.ranks import ranks_between, spread
+from utils.scheduling.resources import Resources
 
 
 class ClientManager:
@@ -41,8 +46,32 @@ class ClientManager:
 
         return session.execute(
             select(models.Client)
+            .options(selectinload(models.Client.labels))
         ).scalars()
 
+    @staticmethod
+    def schedule_loads(session: Session, state: models.Client.State,
+                       default_work: float
+                       ) -> dict[int, tuple[int, float, float]]:
+        # for each client in the given state the number of jobs in its
+        # schedule, the estimated work of the scheduled ones and that of the
+        # running one (jobs without estimate count as default_work)
+        work = func.coalesce(models.Job.estimated_work, default_work)
+        scheduled = models.Job.sub_state == models.Job.SubState.SCHEDULED
+        running = models.Job.sub_state == models.Job.SubState.RUNNING
+        rows = session.execute(
+            select(models.Client.id,
+                   func.count(models.JobScheduleEntry.id),
+                   func.sum(case((scheduled, work), else_=0.)),
+                   func.sum(case((running, work), else_=0.)))
+            .outerjoin(models.Client.schedule)
+            .outerjoin(models.JobScheduleEntry.job)
+            .where(models.Client.state == state)
+            .group_by(models.Client.id)
+        ).all()
+        return {cid: (count, scheduled or 0., running or 0.)
+                for cid, count, scheduled, running in rows}
+
     def model(self) -> models.Client:
         if self._model is None:
             logging.info(f"Fetching client with id {self._id}")
@@ -58,6 +87,34 @@ class ClientManager:
     def id(self) -> int:
         return self._id
 
+    def set_capabilities(self, capabilities: Resources) -> None:
+        logging.info(f"Setting capabilities of client {self._id} to "
+                     f"{capabilities}")
+        client = self.model()
+        client.cores = capabilities.cores
+        client.memory = capabilities.memory
+
+        # unchanged labels are kept, re-adding a deleted one in the same
+        # flush would collide with its primary key
+        labels = labels_of(capabilities)
+        client.labels = [label for label in client.labels
+                         if (label.kind, label.name) in labels]
+        labels -= {(label.kind, label.name) for label in client.labels}
+        client.labels.extend(models.ClientLabel(kind=kind, name=name)
+                             for kind, name in labels)
+
+    def eligible_jobs(self, state: models.Job.State
+                      = models.Job.State.UNASSIGNED) -> list[models.Job]:
+        # jobs in the given state whose requirements the client meets, by
+        # priority (then age)
+        return list(self._session.execute(
+            select(models.Job)
+            .join(models.Client, requirements_met())
+            .where(models.Client.id == self._id,
+                   models.Job.state == state)
+            .order_by(models.Job.priority.desc(), models.Job.id)
+        ).scalars())
+
     def is_in_state(self, state: models.Client.State) -> bool:
         return self.model().state == state
 
@@ -75,27 +132,29 @@ class ClientManager:
             )
         ).scalar()
 
-    def start_next_job(self) -> models.Job | None:
+    def start_next_job(self, steal_threshold: int = None,
+                       locality_weight: float = 0.) -> models.Job | None:
+        # with a steal threshold, a client with an empty schedule takes a job
+        # from another client first (see steal_job)
 
         logging.info(f"Starting next job for client {self._id}")
 
         if self.get_active_job() is not None:
             raise StateError("Client already has a running job")
 
+        # the first job of the schedule whose dependencies finished
         next_job = self._session.execute(
             select(models.Job)
-            .where(models.Job.id.in_(
-                select(models.JobScheduleEntry.job_id)
-                .where(tuple_(models.JobScheduleEntry.client_id,
-                              models.JobScheduleEntry.rank).in_(
-                    select(models.JobScheduleEntry.client_id,
-                           func.min(models.JobScheduleEntry.rank))
-                    .where(models.JobScheduleEntry.client_id == self._id)
-                    .group_by(models.JobScheduleEntry.client_id)
-                ))
-            ))
+            .join(models.Job.schedule_entry)
+            .where(models.JobScheduleEntry.client_id == self._id,
+                   models.Job.pending_dependencies == 0)
+            .order_by(models.JobScheduleEntry.rank)
+            .limit(1)
         ).scalar()
 
+        if next_job is None and steal_threshold is not None:
+            next_job = self.steal_job(steal_threshold, locality_weight)
+
         if next_job is None:
             return None
 
@@ -108,3 +167,206 @@ class ClientManager:
             next_job.session = models.JobSession(snapshot="undefined")
 
         return next_job
+
+    def move_jobs(self, job_ids: list[int],
+                  before_id: int = None, after_id: int = None) -> None:
+        # moves jobs of the client's schedule, in the given order, in front
+        # of before_id, behind after_id or (without either) to the front.
+        # Only the moved entries get new ranks, unless there is no room
+        # between the neighbours and the whole schedule is spread out again
+        logging.info(f"Moving jobs {job_ids} of client {self._id} "
+                     f"(before: {before_id}, after: {after_id})")
+
+        if before_id is not None and after_id is not None:
+            raise ValueError("Either before or after can be given, not both")
+        if len(set(job_ids)) != len(job_ids):
+            raise ValueError("Jobs to move must be unique")
+
+        schedule = list(self._session.execute(
+            select(models.JobScheduleEntry)
+            .where(models.JobScheduleEntry.client_id == self._id)
+            .order_by(models.JobScheduleEntry.rank)
+            .with_for_update()
+        ).scalars())
+        entries = {e.job_id: e for e in schedule}
+
+        for id in [*job_ids, before_id, after_id]:
+            if id is not None and id not in entries:
+                raise IndexValueError(
+                    f"Job {id} is not scheduled for client {self._id}")
+
+        anchor_id = before_id if before_id is not None else after_id
+        if anchor_id in job_ids:
+            raise ValueError("Jobs cannot be moved relative to themselves")
+
+        moved = [entries[id] for id in job_ids]
+        remaining = [e for e in schedule if e.job_id not in job_ids]
+
+        if anchor_id is None:
+            ix = 0
+        else:
+            ix = remaining.index(entries[anchor_id])
+            ix += 1 if after_id is not None else 0
+
+        lower = remaining[ix - 1].rank if ix > 0 else None
+        upper = remaining[ix].rank if ix < len(remaining) else None
+        ranks = ranks_between(lower, upper, len(moved))
+
+        if ranks is not None:
+            for entry, rank in zip(moved, ranks):
+                entry.rank = rank
+            return
+
+        logging.info(f"Rebalancing schedule of client {self._id}")
+        reordered = remaining[:ix] + moved + remaining[ix:]
+        for entry, rank in zip(reordered, spread(len(reordered))):
+            if entry.rank != rank:
+                entry.rank = rank
+
+    def steal_job(self, threshold: int,
+                  locality_weight: float = 0.) -> models.Job | None:
+        # moves the last stealable (scheduled, ready, not pinned and within
+        # this client's capabilities) job of the client with the most of them
+        # to this client's schedule, given that client has at least threshold
+        # of them. The job the other client starts next (its first ready one)
+        # is never taken, and entries are locked, so concurrent thieves never
+        # take the same job.
+        # With a locality weight, each stealable job whose data this client
+        # holds counts that much extra when picking the client to steal from,
+        # and such jobs are taken before the last one
+        if threshold < 2:
+            raise ValueError("Steal threshold must be at least 2")
+
+        stealable = and_(
+            models.JobScheduleEntry.pinned == false(),
+            models.Job.sub_state == models.Job.SubState.SCHEDULED,
+            models.Job.pending_dependencies == 0)
+
+        # only jobs this client can run
+        thief = and_(models.Client.id == self._id, requirements_met())
+
+        warm = case((exists().where(
+            models.JobDataKey.job_id == models.Job.id,
+            models.ClientCacheEntry.client_id == self._id,
+            models.ClientCacheEntry.key == models.JobDataKey.key
+        ).correlate_except(models.JobDataKey, models.ClientCacheEntry),
+            1), else_=0)
+        count = func.count(models.JobScheduleEntry.id)
+
+        victim_id = self._session.execute(
+            select(models.JobScheduleEntry.client_id)
+            .join(models.JobScheduleEntry.job)
+            .join(models.Client, thief)
+            .where(stealable,
+                   models.JobScheduleEntry.client_id != self._id)
+            .group_by(models.JobScheduleEntry.client_id)
+            .having(count >= threshold)
+            .order_by((count + locality_weight * func.sum(warm)).desc(),
+                      models.JobScheduleEntry.client_id)
+            .limit(1)
+        ).scalar()
+
+        if victim_id is None:
+            return None
+
+        head_entry = aliased(models.JobScheduleEntry)
+        head_job = aliased(models.Job)
+        head_rank = (
+            select(func.min(head_entry.rank))
+            .join(head_job, head_job.id == head_entry.job_id)
+            .where(head_entry.client_id == victim_id,
+                   head_job.sub_state == models.Job.SubState.SCHEDULED,
+                   head_job.pending_dependencies == 0)
+            .scalar_subquery())
+
+        entry = self._session.execute(
+            select(models.JobScheduleEntry)
+            .join(models.JobScheduleEntry.job)
+            .join(models.Client, thief)
+            .where(stealable,
+                   models.JobScheduleEntry.client_id == victim_id,
+                   models.JobScheduleEntry.rank > head_rank)
+            .order_by(*([warm.desc()] if locality_weight > 0 else []),
+                      models.JobScheduleEntry.rank.desc())
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar()
+
+        if entry is None:
+            return None
+
+        logging.info(f"Client {self._id} steals job {entry.job_id} "
+                     f"from client {victim_id}")
+
+        # the stolen job goes to the front of this client's schedule (which
+        # may hold jobs waiting for dependencies)
+        first_rank = self._session.execute(
+            select(func.min(models.JobScheduleEntry.rank))
+            .where(models.JobScheduleEntry.client_id == self._id)
+        ).scalar()
+        rank, = ranks_between(None, first_rank)
+
+        # a new entry (instead of updating the old one) lets both clients'
+        # subscribers see the move
+        job = entry.job
+        job.schedule_entry = models.JobScheduleEntry(client_id=self._id,
+                                                     rank=rank)
+        return job
+
+    @staticmethod
+    def cached_keys(session: Session,
+                    client_ids: list[int]) -> dict[int, frozenset[str]]:
+        # keys of the data held by each of the clients
+        keys = {id: set() for id in client_ids}
+        for client_id, key in session.execute(
+            select(models.ClientCacheEntry.client_id,
+                   models.ClientCacheEntry.key)
+            .where(models.ClientCacheEntry.client_id.in_(client_ids))
+        ):
+            keys[client_id].add(key)
+        return {id: frozenset(k) for id, k in keys.items()}
+
+    def set_cached_keys(self, keys: list[str], max_entries: int) -> None:
+        # replaces the client's cache entries with the reported keys (the
+        # first max_entries of them)
+        logging.info(f"Setting cached data of client {self._id}")
+        keys = list(dict.fromkeys(keys))[:max_entries]
+        client = self.model()
+
+        # unchanged entries are kept, re-adding a deleted one in the same
+        # flush would collide with its primary key
+        client.cache_entries = [e for e in client.cache_entries
+                                if e.key in keys]
+        self._touch_cached_keys(keys)
+
+    def add_cached_keys(self, keys: set[str], max_entries: int) -> None:
+        # adds or refreshes cache entries, the least recently used ones
+        # beyond max_entries are dropped
+        self._touch_cached_keys(keys)
+
+        entries = self.model().cache_entries
+        if len(entries) > max_entries:
+            entries.sort(key=lambda e: e.last_used, reverse=True)
+            del entries[max_entries:]
+
+    def _touch_cached_keys(self, keys: list[str]) -> None:
+        now = datetime.now()
+        entries = {e.key: e for e in self.model().cache_entries}
+        for key in keys:
+            if key in entries:
+                entries[key].last_used = now
+            else:
+                self.model().cache_entries.append(
+                    models.ClientCacheEntry(key=key, last_used=now))
+
+    def get_scheduled_jobs(self, limit: int = None) -> list[models.Job]:
+        # jobs waiting in the client's schedule (not running), by rank
+        logging.info(f"Fetching scheduled jobs for client {self._id}")
+        return list(self._session.execute(
+            select(models.Job)
+            .join(models.Job.schedule_entry)
+            .where(models.JobScheduleEntry.client_id == self._id,
+                   models.Job.sub_state == models.Job.SubState.SCHEDULED)
+            .order_by(models.JobScheduleEntry.rank)
+            .limit(limit)
+        ).scalars())
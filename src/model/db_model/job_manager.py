@@ -1,10 +1,15 @@
 import logging
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, func, select, true
+from sqlalchemy.orm import Session, selectinload
 
 from model.db_model import models
 from model.db_model.client_manager import ClientManager
-from model.exeptions import StateError
+from model.db_model.matching import (
+    client_resources, job_requirements, labels_of, requirements_met
+)
+from model.exeptions import IndexValueError, StateError
+from utils.scheduling.ranks import ranks_between
+from utils.scheduling.resources import Resources
 
 
 class JobManager:
@@ -22,32 +27,143 @@ class JobManager:
 
     @staticmethod
     def create(session: Session,
-               job_config: dict, name: str, desc: str) -> int:
+               job_config: dict, name: str, desc: str,
+               priority: int = 0, dependencies: list[int] = (),
+               estimated_work: float = None,
+               requirements: Resources = Resources(),
+               data_keys: set[str] = ()) -> int:
         logging.info(f"Creating job with name {name}")
 
+        # predecessors are locked, so they cannot finish (or be deleted)
+        # before the pending count is stored
+        dependency_ids = set(dependencies)
+        predecessors = JobManager._lock_jobs(session, dependency_ids)
+        for id in dependency_ids - {p.id for p in predecessors}:
+            raise IndexValueError(f"Job with id {id} not found")
+        for predecessor in predecessors:
+            if predecessor.sub_state in [models.Job.SubState.FAILED,
+                                         models.Job.SubState.ABORTED]:
+                raise StateError(
+                    f"Job {predecessor.id} did not finish successfully")
+
         job = models.Job(configuration=job_config,
                          name=name,
-                         description=desc)
+                         description=desc,
+                         priority=priority,
+                         estimated_work=estimated_work,
+                         required_cores=requirements.cores,
+                         required_memory=requirements.memory,
+                         labels=[models.JobLabel(kind=kind, name=name)
+                                 for kind, name in labels_of(requirements)],
+                         data_keys=[models.JobDataKey(key=key)
+                                    for key in set(data_keys)],
+                         dependencies=predecessors,
+                         pending_dependencies=sum(
+                             p.state != models.Job.State.FINISHED
+                             for p in predecessors))
         session.add(job)
+        session.flush()
         return job.id
 
     @staticmethod
     def delete(session: Session, id: int, force: bool) -> None:
         logging.info(f"Deleting job with id {id}")
 
-        job = JobManager(session, id, True).model()
+        # locked, so no dependents are added concurrently
+        jobs = JobManager._lock_jobs(session, [id])
+        if len(jobs) == 0:
+            raise IndexValueError(f"Job with id {id} not found")
+        job = jobs[0]
 
         if job.sub_state == job.SubState.RUNNING and not force:
             raise StateError("Active jobs cannot be deleted.")
 
+        # jobs still waiting for this one would never become ready
+        if job.state != job.State.FINISHED and any(
+                d.state != d.State.FINISHED for d in job.dependents):
+            raise StateError("Jobs with unfinished dependent jobs cannot be "
+                             "deleted before them.")
+
         session.delete(job)
 
     @staticmethod
     def all(session: Session) -> list[models.Job]:
         logging.info("Fetching all jobs")
-        return session.execute(select(models.Job)).scalars()
+        return session.execute(
+            select(models.Job).options(
+                selectinload(models.Job.schedule_entry),
+                selectinload(models.Job.dependencies),
+                selectinload(models.Job.labels))
+        ).scalars()
+
+    @staticmethod
+    def next_unassigned(session: Session, limit: int,
+                        client_ids: list[int] = None) -> list[models.Job]:
+        # unassigned jobs without pending dependencies by priority (then
+        # age), rows locked by concurrent schedulers are skipped. With
+        # client_ids, only jobs one of those clients can run are returned,
+        # so jobs no client meets the requirements of do not take the places
+        # of those below them
+        eligible = true()
+        if client_ids is not None:
+            eligible = exists().where(
+                models.Client.id.in_(client_ids), requirements_met()
+            ).correlate_except(models.Client)
+
+        return list(session.execute(
+            select(models.Job)
+            .where(models.Job.state == models.Job.State.UNASSIGNED,
+                   models.Job.pending_dependencies == 0,
+                   eligible)
+            .order_by(models.Job.priority.desc(), models.Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .options(selectinload(models.Job.data_keys))
+        ).scalars())
+
+    @staticmethod
+    def matching_clients(session: Session, job_ids: list[int],
+                         client_ids: list[int]) -> dict[int, set[int]]:
+        # the clients (of client_ids) meeting the requirements of each job
+        matches = {id: set() for id in job_ids}
+        for job_id, client_id in session.execute(
+            select(models.Job.id, models.Client.id)
+            .join(models.Client, requirements_met())
+            .where(models.Job.id.in_(job_ids),
+                   models.Client.id.in_(client_ids))
+        ):
+            matches[job_id].add(client_id)
+        return matches
+
+    @staticmethod
+    def assign_bulk(session: Session,
+                    assignments: list[tuple[models.Job, int]]) -> None:
+        # assigns unassigned jobs to clients in one go, each appended to the
+        # end of its client's schedule in the given order
+        if len(assignments) == 0:
+            return
+
+        client_ids = {cid for _, cid in assignments}
+        last_ranks = dict(session.execute(
+            select(models.JobScheduleEntry.client_id,
+                   func.max(models.JobScheduleEntry.rank))
+            .where(models.JobScheduleEntry.client_id.in_(client_ids))
+            .group_by(models.JobScheduleEntry.client_id)
+        ).all())
+
+        for job, cid in assignments:
+            if job.state != job.State.UNASSIGNED:
+                raise StateError(f"Job {job.id} is already assigned")
 
-    def assign(self, client_id: int) -> None:
+            rank, = ranks_between(last_ranks.get(cid), None)
+            last_ranks[cid] = rank
+
+            job.schedule_entry = models.JobScheduleEntry(client_id=cid,
+                                                         rank=rank)
+            job.state = job.State.ASSIGNED
+            job.sub_state = job.SubState.SCHEDULED
+
+    def assign(self, client_id: int, pinned: bool = False) -> None:
         logging.info(f"Assigning job {self._id} to client {client_id}")
 
         job = self.model()
@@ -58,15 +174,29 @@ class JobManager:
 
         client = ClientManager(self._session, client_id, True).model()
 
-        next_rank = 0 if len(client.schedule) == 0 \
-            else client.schedule[-1].rank + 1
+        if not client_resources(client).satisfies(job_requirements(job)):
+            raise StateError(f"Client {client_id} does not meet the "
+                             "requirements of the job")
+
+        last_rank = client.schedule[-1].rank if client.schedule else None
+        next_rank, = ranks_between(last_rank, None)
 
         job.schedule_entry = models.JobScheduleEntry(
             client_id=client_id,
-            rank=next_rank)
+            rank=next_rank,
+            pinned=pinned)
         job.state = job.State.ASSIGNED
         job.sub_state = job.SubState.SCHEDULED
 
+    def eligible_clients(self) -> list[models.Client]:
+        # clients meeting the requirements of the job
+        return list(self._session.execute(
+            select(models.Client)
+            .join(models.Job, requirements_met())
+            .where(models.Job.id == self._id)
+            .order_by(models.Client.id)
+        ).scalars())
+
     def unassign_job(self, force: bool) -> None:
         logging.info(f"Unassigning job {self._id}")
         job = self.model()
@@ -80,3 +210,72 @@ class JobManager:
         self._session.delete(job.schedule_entry)
         job.state = job.State.UNASSIGNED
         job.sub_state = job.SubState.CREATED
+
+    def return_job(self, sub_state: models.Job.SubState) -> None:
+        # takes a running job back from its client: SCHEDULED keeps it at the
+        # head of the client's schedule, RETURNED unassigns it and FAILED
+        # finishes it
+        logging.info(f"Returning job {self._id} as {sub_state.value}")
+        job = self.model()
+
+        if job.sub_state != job.SubState.RUNNING:
+            raise StateError("Only running jobs can be returned")
+
+        if sub_state == job.SubState.SCHEDULED:
+            job.sub_state = sub_state
+        elif sub_state == job.SubState.RETURNED:
+            self._session.delete(job.schedule_entry)
+            job.state = job.State.UNASSIGNED
+            job.sub_state = sub_state
+        elif sub_state == job.SubState.FAILED:
+            self.finish(sub_state)
+        else:
+            raise ValueError(f"Jobs cannot be returned as {sub_state.value}")
+
+    def finish(self, sub_state: models.Job.SubState) -> list[models.Job]:
+        # ends a running job (FINISHED, FAILED or ABORTED) and removes it from
+        # the client's schedule. Returns the dependent jobs that became ready,
+        # those of failed or aborted jobs stay blocked
+        logging.info(f"Finishing job {self._id} as {sub_state.value}")
+        job = self.model()
+
+        if job.sub_state != job.SubState.RUNNING:
+            raise StateError("Only running jobs can be finished")
+
+        if sub_state not in [job.SubState.FINISHED, job.SubState.FAILED,
+                             job.SubState.ABORTED]:
+            raise ValueError(f"Jobs cannot be finished as {sub_state.value}")
+
+        self._session.delete(job.schedule_entry)
+        job.state = job.State.FINISHED
+        job.sub_state = sub_state
+
+        if sub_state != job.SubState.FINISHED:
+            return []
+
+        dependents = self._lock_dependents(self._session, self._id)
+        for dependent in dependents:
+            dependent.pending_dependencies -= 1
+        return [d for d in dependents if d.pending_dependencies == 0]
+
+    @staticmethod
+    def _lock_jobs(session: Session, ids: list[int]) -> list[models.Job]:
+        return list(session.execute(
+            select(models.Job)
+            .where(models.Job.id.in_(ids))
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalars())
+
+    @staticmethod
+    def _lock_dependents(session: Session, id: int) -> list[models.Job]:
+        # dependents with current (row locked) counts, so predecessors
+        # finishing concurrently do not overwrite each other's decrement
+        return list(session.execute(
+            select(models.Job)
+            .join(models.JobDependency,
+                  models.JobDependency.job_id == models.Job.id)
+            .where(models.JobDependency.depends_on_id == id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalars())
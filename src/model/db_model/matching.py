@@ -0,0 +1,46 @@
+from sqlalchemy import and_, exists
+
+from model.db_model import models
+from utils.scheduling.resources import Resources
+
+
+# the label kind of each label resource
+LABEL_KINDS = {'datasets': models.LabelKind.DATASET,
+               'tags': models.LabelKind.TAG}
+
+
+def requirements_met(client=models.Client, job=models.Job):
+    # SQL counterpart of Resources.satisfies for (possibly aliased) clients
+    # and jobs. The amounts are indexed on both sides and labels by kind and
+    # name, so matching in either direction does not scan all rows
+    missing_label = exists().where(
+        models.JobLabel.job_id == job.id,
+        ~exists().where(models.ClientLabel.client_id == client.id,
+                        models.ClientLabel.kind == models.JobLabel.kind,
+                        models.ClientLabel.name == models.JobLabel.name)
+        .correlate_except(models.ClientLabel)
+    ).correlate_except(models.JobLabel)
+
+    return and_(client.cores >= job.required_cores,
+                client.memory >= job.required_memory,
+                ~missing_label)
+
+
+def labels_of(resources: Resources) -> set[tuple[models.LabelKind, str]]:
+    return {(kind, name) for resource, kind in LABEL_KINDS.items()
+            for name in getattr(resources, resource)}
+
+
+def _resources(cores: int, memory: float, labels: list) -> Resources:
+    return Resources(cores, memory, **{
+        resource: frozenset(label.name for label in labels
+                            if label.kind == kind)
+        for resource, kind in LABEL_KINDS.items()})
+
+
+def client_resources(client: models.Client) -> Resources:
+    return _resources(client.cores, client.memory, client.labels)
+
+
+def job_requirements(job: models.Job) -> Resources:
+    return _resources(job.required_cores, job.required_memory, job.labels)
@@ -1,8 +1,9 @@
 import enum
 from typing import List, Optional
-from sqlalchemy import JSON, ForeignKey, String
+from sqlalchemy import JSON, ForeignKey, Index, String, Text
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import false, func
 
 from datetime import datetime
 
@@ -44,6 +45,40 @@ class Job(Base):
         'State', default=State.UNASSIGNED)
     sub_state: Mapped[SubState] = mapped_column(
         'SubState', default=SubState.CREATED)
+    # higher priorities are scheduled first by the auto scheduler
+    priority: Mapped[int] = mapped_column(
+        'Priority', default=0, server_default='0')
+    # expected number of training steps, counted like the ix of the
+    # client's TRAINING progress reports (e.g. batches over all epochs), lets
+    # the auto scheduler estimate how long the job takes on a client
+    estimated_work: Mapped[Optional[float]] = mapped_column(
+        'EstimatedWork', nullable=True)
+    # resources a client needs to run the job (see utils.scheduling.resources)
+    required_cores: Mapped[int] = mapped_column(
+        'RequiredCores', default=0, server_default='0', index=True)
+    required_memory: Mapped[float] = mapped_column(
+        'RequiredMemory', default=0., server_default='0', index=True)
+    labels: Mapped[List["JobLabel"]] = relationship(
+        back_populates='job', cascade='all, delete-orphan')
+    # keys of the data the job reads, clients holding it are preferred
+    data_keys: Mapped[List["JobDataKey"]] = relationship(
+        cascade='all, delete-orphan')
+
+    # unfinished jobs this job depends on, it is only started (and picked up
+    # by the auto scheduler) once this is 0
+    pending_dependencies: Mapped[int] = mapped_column(
+        'PendingDependencies', default=0, server_default='0')
+
+    dependencies: Mapped[List["Job"]] = relationship(
+        secondary='JobDependency',
+        primaryjoin='Job.id == JobDependency.job_id',
+        secondaryjoin='Job.id == JobDependency.depends_on_id',
+        back_populates='dependents')
+    dependents: Mapped[List["Job"]] = relationship(
+        secondary='JobDependency',
+        primaryjoin='Job.id == JobDependency.depends_on_id',
+        secondaryjoin='Job.id == JobDependency.job_id',
+        back_populates='dependencies')
 
     schedule_entry: Mapped["JobScheduleEntry"] = relationship(
         back_populates='job', cascade='all, delete-orphan', uselist=False)
@@ -51,10 +86,57 @@ class Job(Base):
     session: Mapped[Optional["JobSession"]] \
         = relationship(back_populates='job')
 
+    __table_args__ = (Index('IxJobStatePriority', 'State', 'Priority'),)
+
     def __repr__(self) -> str:
         return f"Job({self.id}, {self.name}, {self.state}, {self.SubState})"
 
 
+class JobDependency(Base):
+    __tablename__ = 'JobDependency'
+
+    job_id: Mapped[int] = mapped_column(
+        "JobId", ForeignKey('Job.Id', ondelete='CASCADE'), primary_key=True)
+    depends_on_id: Mapped[int] = mapped_column(
+        "DependsOnId", ForeignKey('Job.Id', ondelete='CASCADE'),
+        primary_key=True, index=True)
+
+    def __repr__(self) -> str:
+        return f"JobDependency({self.job_id} -> {self.depends_on_id})"
+
+
+class LabelKind(enum.Enum):
+    DATASET = 'DATASET'
+    TAG = 'TAG'
+
+
+class JobLabel(Base):
+    __tablename__ = 'JobLabel'
+
+    job_id: Mapped[int] = mapped_column(
+        "JobId", ForeignKey('Job.Id', ondelete='CASCADE'), primary_key=True)
+    kind: Mapped[LabelKind] = mapped_column("Kind", primary_key=True)
+    name: Mapped[str] = mapped_column("Name", String(128), primary_key=True)
+
+    job: Mapped["Job"] = relationship(back_populates='labels')
+
+    __table_args__ = (Index('IxJobLabelKindName', 'Kind', 'Name'),)
+
+    def __repr__(self) -> str:
+        return f"JobLabel({self.job_id}, {self.kind}, {self.name})"
+
+
+class JobDataKey(Base):
+    __tablename__ = 'JobDataKey'
+
+    job_id: Mapped[int] = mapped_column(
+        "JobId", ForeignKey('Job.Id', ondelete='CASCADE'), primary_key=True)
+    key: Mapped[str] = mapped_column("DataKey", String(256), primary_key=True)
+
+    def __repr__(self) -> str:
+        return f"JobDataKey({self.job_id}, {self.key})"
+
+
 class JobScheduleEntry(Base):
     __tablename__ = 'JobScheduleEntry'
 
@@ -65,6 +147,9 @@ class JobScheduleEntry(Base):
         "ClientId", ForeignKey('Client.Id', ondelete='CASCADE'))
 
     rank: Mapped[int] = mapped_column("Rank")
+    # pinned jobs stay with their client (never stolen by idle clients)
+    pinned: Mapped[bool] = mapped_column(
+        "Pinned", default=False, server_default=false())
 
     job: Mapped["Job"] = relationship(back_populates='schedule_entry')
     client: Mapped["Client"] = relationship(back_populates='schedule')
@@ -94,10 +179,52 @@ class Client(Base):
     state: Mapped[State] = mapped_column(
         "State", nullable=False, default=State.SUSPENDED)
 
+    # resources advertised by the client when claimed
+    cores: Mapped[int] = mapped_column(
+        "Cores", default=0, server_default='0', index=True)
+    memory: Mapped[float] = mapped_column(
+        "Memory", default=0., server_default='0', index=True)
+    labels: Mapped[List["ClientLabel"]] = relationship(
+        back_populates='client', cascade='all, delete-orphan')
+    # keys of the data the client holds locally
+    cache_entries: Mapped[List["ClientCacheEntry"]] = relationship(
+        cascade='all, delete-orphan')
+
     def __repr__(self) -> str:
         return f"Client (id: {self.id}, {self.name})"
 
 
+class ClientCacheEntry(Base):
+    __tablename__ = 'ClientCacheEntry'
+
+    client_id: Mapped[int] = mapped_column(
+        "ClientId", ForeignKey('Client.Id', ondelete='CASCADE'),
+        primary_key=True)
+    key: Mapped[str] = mapped_column("DataKey", String(256), primary_key=True)
+    last_used: Mapped[datetime] = mapped_column(
+        "LastUsed", default=func.current_timestamp())
+
+    def __repr__(self) -> str:
+        return f"ClientCacheEntry({self.client_id}, {self.key})"
+
+
+class ClientLabel(Base):
+    __tablename__ = 'ClientLabel'
+
+    client_id: Mapped[int] = mapped_column(
+        "ClientId", ForeignKey('Client.Id', ondelete='CASCADE'),
+        primary_key=True)
+    kind: Mapped[LabelKind] = mapped_column("Kind", primary_key=True)
+    name: Mapped[str] = mapped_column("Name", String(128), primary_key=True)
+
+    client: Mapped["Client"] = relationship(back_populates='labels')
+
+    __table_args__ = (Index('IxClientLabelKindName', 'Kind', 'Name'),)
+
+    def __repr__(self) -> str:
+        return f"ClientLabel({self.client_id}, {self.kind}, {self.name})"
+
+
 # --- session --------------------------
 
 class JobSession(Base):
@@ -129,3 +256,16 @@ class Epoch(Base):
     result: Mapped[JSON] = mapped_column('Result', type_=JSON)
 
     session: Mapped[JobSession] = relationship(back_populates='epochs')
+
+
+# --- update outbox --------------------------
+
+class UpdateOutboxEntry(Base):
+    __tablename__ = 'UpdateOutbox'
+
+    id: Mapped[int] = mapped_column("Id", primary_key=True, autoincrement=True)
+
+    creation_timestamp: Mapped[datetime] = mapped_column(
+        'CreationTimestamp', default=func.current_timestamp())
+    payload: Mapped[str] = mapped_column(
+        'Payload', Text().with_variant(mysql.LONGTEXT(), 'mysql'))
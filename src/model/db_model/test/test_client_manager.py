@@ -0,0 +1,157 @@
+
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from utils.scheduling.ranks import spread
+
+
+class ClientManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        models.Base.metadata.create_all(engine)
+        self.session = Session(engine)
+        self.addCleanup(self.session.close)
+
+        for name in ['a', 'b', 'c']:
+            ClientManager.create(self.session, name)
+        self.session.commit()
+
+    def create_jobs(self, client_id: int, count: int,
+                    data_keys: list[set[str]] = None) -> list[int]:
+        ids = []
+        for i in range(count):
+            keys = data_keys[i] if data_keys is not None else ()
+            id = JobManager.create(self.session, {}, f'{client_id}-{i}', '',
+                                   data_keys=keys)
+            JobManager(self.session, id).assign(client_id)
+            ids.append(id)
+        self.session.commit()
+        return ids
+
+    def schedule(self, client_id: int) -> list[int]:
+        return [j.id for j in
+                ClientManager(self.session, client_id).get_scheduled_jobs()]
+
+    def test_move_jobs(self):
+        ids = self.create_jobs(1, 4)
+        client = ClientManager(self.session, 1)
+
+        client.move_jobs([ids[3]])
+        self.assertListEqual(self.schedule(1),
+                             [ids[3], ids[0], ids[1], ids[2]])
+
+        client.move_jobs([ids[0], ids[3]], after_id=ids[2])
+        self.assertListEqual(self.schedule(1),
+                             [ids[1], ids[2], ids[0], ids[3]])
+
+        with self.assertRaises(ValueError):
+            client.move_jobs([ids[0]], before_id=ids[0])
+
+    def test_move_jobs_rebalance(self):
+        ids = self.create_jobs(1, 3)
+        entries = {j.id: j.schedule_entry for j in
+                   ClientManager(self.session, 1).get_scheduled_jobs()}
+        # no room left between the first two jobs
+        for rank, id in enumerate(ids):
+            entries[id].rank = rank
+        self.session.flush()
+
+        ClientManager(self.session, 1).move_jobs([ids[2]], after_id=ids[0])
+        self.assertListEqual(self.schedule(1), [ids[0], ids[2], ids[1]])
+        self.assertListEqual(
+            [entries[id].rank for id in [ids[0], ids[2], ids[1]]], spread(3))
+
+    def test_steal_most_loaded(self):
+        self.create_jobs(1, 2)
+        ids = self.create_jobs(2, 3)
+
+        job = ClientManager(self.session, 3).steal_job(2)
+        self.assertEqual(job.id, ids[2])
+        self.assertEqual(job.schedule_entry.client_id, 3)
+
+    def test_steal_to_front(self):
+        self.create_jobs(1, 3)
+        blocked, = self.create_jobs(3, 1)
+        JobManager(self.session, blocked).model().pending_dependencies = 1
+        self.session.commit()
+
+        job = ClientManager(self.session, 3).steal_job(2)
+        self.assertLess(job.schedule_entry.rank,
+                        JobManager(self.session, blocked)
+                        .model().schedule_entry.rank)
+
+    def test_steal_threshold(self):
+        self.create_jobs(1, 2)
+
+        with self.assertRaises(ValueError):
+            ClientManager(self.session, 3).steal_job(1)
+        self.assertIsNone(ClientManager(self.session, 3).steal_job(3))
+        self.assertIsNotNone(ClientManager(self.session, 3).steal_job(2))
+
+    def test_steal_skips_pinned(self):
+        ids = self.create_jobs(1, 3)
+        for id in ids[1:]:
+            JobManager(self.session, id).model().schedule_entry.pinned = True
+        self.session.flush()
+
+        # only the head is left, which is never stolen
+        self.assertIsNone(ClientManager(self.session, 3).steal_job(2))
+
+        JobManager(self.session, ids[1]).model().schedule_entry.pinned = False
+        self.session.flush()
+        self.assertEqual(ClientManager(self.session, 3).steal_job(2).id,
+                         ids[1])
+
+    def test_steal_warm_jobs(self):
+        self.create_jobs(1, 3)
+        ids = self.create_jobs(2, 2, [{'x'}, {'x'}])
+        ClientManager(self.session, 3).set_cached_keys(['x'], 8)
+        self.session.commit()
+
+        self.assertEqual(
+            ClientManager(self.session, 3).steal_job(2).name, '1-2')
+        self.session.rollback()
+
+        # the warm jobs of client 2 outweigh the load of client 1
+        self.assertEqual(
+            ClientManager(self.session, 3).steal_job(2, 1.).id, ids[1])
+
+    def test_steal_never_takes_head(self):
+        ids = self.create_jobs(1, 3, [{'x'}, set(), set()])
+        ClientManager(self.session, 3).set_cached_keys(['x'], 8)
+        self.session.flush()
+
+        # the only warm job is the next one of client 1
+        self.assertEqual(ClientManager(self.session, 3).steal_job(2, 1.).id,
+                         ids[2])
+
+    def test_start_next_job_steals(self):
+        ids = self.create_jobs(1, 3)
+
+        client = ClientManager(self.session, 3)
+        self.assertIsNone(client.start_next_job())
+        job = client.start_next_job(steal_threshold=2)
+        self.assertEqual(job.id, ids[2])
+        self.assertEqual(job.sub_state, models.Job.SubState.RUNNING)
+
+    def test_start_next_job_skips_blocked(self):
+        blocked, ready = self.create_jobs(1, 2)
+        JobManager(self.session, blocked).model().pending_dependencies = 1
+        self.session.commit()
+
+        client = ClientManager(self.session, 1)
+        self.assertEqual(client.start_next_job().id, ready)
+        self.session.commit()
+
+        # nothing is ready until the dependency finished
+        JobManager(self.session, ready).finish(models.Job.SubState.FINISHED)
+        self.assertIsNone(client.start_next_job())
+
+        JobManager(self.session, blocked).model().pending_dependencies = 0
+        self.assertEqual(client.start_next_job().id, blocked)
@@ -0,0 +1,127 @@
+
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from model.exeptions import StateError
+from utils.scheduling.ranks import RANK_GAP
+from utils.scheduling.resources import Resources
+
+
+class JobManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        models.Base.metadata.create_all(engine)
+        self.session = Session(engine)
+        self.addCleanup(self.session.close)
+
+        for name in ['a', 'b']:
+            ClientManager.create(self.session, name)
+        self.session.commit()
+
+    def create_jobs(self, count: int) -> list[models.Job]:
+        ids = [JobManager.create(self.session, {}, str(i), '')
+               for i in range(count)]
+        return [JobManager(self.session, id).model() for id in ids]
+
+    def test_assign_bulk(self):
+        a, b, c, d = self.create_jobs(4)
+        JobManager(self.session, a.id).assign(1)
+
+        JobManager.assign_bulk(self.session, [(b, 1), (c, 2), (d, 1)])
+        self.session.commit()
+
+        # appended behind existing jobs in the given order
+        self.assertListEqual(
+            [j.id for j in ClientManager(self.session, 1).get_scheduled_jobs()],
+            [a.id, b.id, d.id])
+        self.assertListEqual(
+            [j.schedule_entry.rank for j in [a, b, d]],
+            [0, RANK_GAP, 2 * RANK_GAP])
+        self.assertEqual(c.schedule_entry.client_id, 2)
+        self.assertEqual(c.sub_state, models.Job.SubState.SCHEDULED)
+
+        with self.assertRaises(StateError):
+            JobManager.assign_bulk(self.session, [(c, 1)])
+
+    def test_delete_with_dependents(self):
+        a, = self.create_jobs(1)
+        b = JobManager.create(self.session, {}, 'b', '', dependencies=[a.id])
+        self.session.commit()
+
+        with self.assertRaises(StateError):
+            JobManager.delete(self.session, a.id, False)
+
+        JobManager.delete(self.session, b, False)
+        JobManager.delete(self.session, a.id, False)
+        self.session.commit()
+        self.assertListEqual(list(JobManager.all(self.session)), [])
+
+    def test_next_unassigned_eligible(self):
+        ClientManager(self.session, 1).set_capabilities(Resources(cores=4))
+        big = [JobManager.create(self.session, {}, 'big', '', priority=10,
+                                 requirements=Resources(cores=64))
+               for _ in range(2)]
+        small = [JobManager.create(self.session, {}, 'small', '')
+                 for _ in range(3)]
+        self.session.commit()
+
+        self.assertListEqual(
+            [j.id for j in JobManager.next_unassigned(self.session, 2)], big)
+        # jobs no open client can run do not block the ones below them
+        self.assertListEqual(
+            [j.id for j in JobManager.next_unassigned(self.session, 2, [1])],
+            small[:2])
+        self.assertListEqual(
+            JobManager.next_unassigned(self.session, 2, []), [])
+
+    def create_chain(self) -> tuple[int, int, int]:
+        # c depends on a and b
+        a, b = [j.id for j in self.create_jobs(2)]
+        c = JobManager.create(self.session, {}, 'c', '',
+                              dependencies=[a, b])
+        for id in [a, b, c]:
+            JobManager(self.session, id).assign(1)
+        self.session.commit()
+        return a, b, c
+
+    def finish(self, id: int, sub_state: models.Job.SubState) -> list[int]:
+        job = JobManager(self.session, id).model()
+        job.sub_state = models.Job.SubState.RUNNING
+        released = JobManager(self.session, id).finish(sub_state)
+        self.session.commit()
+        return [j.id for j in released]
+
+    def test_finish_releases_dependents(self):
+        a, b, c = self.create_chain()
+        self.assertEqual(
+            JobManager(self.session, c).model().pending_dependencies, 2)
+
+        self.assertListEqual(self.finish(a, models.Job.SubState.FINISHED),
+                             [])
+        self.assertEqual(
+            JobManager(self.session, c).model().pending_dependencies, 1)
+        self.assertListEqual(self.finish(b, models.Job.SubState.FINISHED),
+                             [c])
+        self.assertEqual(
+            JobManager(self.session, c).model().pending_dependencies, 0)
+
+    def test_unsuccessful_finish_blocks_dependents(self):
+        for sub_state in [models.Job.SubState.FAILED,
+                          models.Job.SubState.ABORTED]:
+            a, b, c = self.create_chain()
+            self.assertListEqual(self.finish(a, sub_state), [])
+            self.assertListEqual(
+                self.finish(b, models.Job.SubState.FINISHED), [])
+            self.assertEqual(
+                JobManager(self.session, c).model().pending_dependencies, 1)
+
+            # and no new job can depend on it
+            with self.assertRaises(StateError):
+                JobManager.create(self.session, {}, 'd', '',
+                                  dependencies=[a])
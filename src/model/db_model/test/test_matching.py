@@ -0,0 +1,84 @@
+
+import unittest
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from model.db_model import models
+from model.db_model.client_manager import ClientManager
+from model.db_model.job_manager import JobManager
+from model.db_model.matching import requirements_met
+from utils.scheduling.resources import Resources
+
+
+CAPABILITIES = [
+    Resources(),
+    Resources(cores=4, memory=8.),
+    Resources(cores=64, memory=256., datasets=frozenset({'imagenet'}),
+              tags=frozenset({'gpu'})),
+    Resources(cores=64, memory=256., tags=frozenset({'gpu', 'fast'})),
+]
+
+REQUIREMENTS = [
+    Resources(),
+    Resources(cores=4),
+    Resources(memory=16.),
+    Resources(tags=frozenset({'gpu'})),
+    Resources(datasets=frozenset({'imagenet'}), tags=frozenset({'gpu'})),
+    Resources(tags=frozenset({'gpu', 'fast'})),
+]
+
+
+class MatchingTest(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        models.Base.metadata.create_all(engine)
+        self.session = Session(engine)
+        self.addCleanup(self.session.close)
+
+        self.clients = {}
+        for i, capabilities in enumerate(CAPABILITIES):
+            client = ClientManager.create(self.session, str(i))
+            self.session.flush()
+            ClientManager(self.session, client.id).set_capabilities(
+                capabilities)
+            self.clients[client.id] = capabilities
+
+        self.jobs = {JobManager.create(self.session, {}, str(i), '',
+                                       requirements=requirements):
+                     requirements
+                     for i, requirements in enumerate(REQUIREMENTS)}
+        self.session.commit()
+
+    def test_requirements_met(self):
+        matches = set(self.session.execute(
+            select(models.Job.id, models.Client.id)
+            .join(models.Client, requirements_met())
+        ).all())
+
+        # the same pairs as Resources.satisfies
+        self.assertSetEqual(matches, {
+            (job_id, client_id)
+            for job_id, requirements in self.jobs.items()
+            for client_id, capabilities in self.clients.items()
+            if capabilities.satisfies(requirements)})
+
+    def test_eligible(self):
+        gpu_job = list(self.jobs)[3]
+        self.assertListEqual(
+            [c.id for c in JobManager(self.session, gpu_job)
+             .eligible_clients()], [3, 4])
+        self.assertListEqual(
+            [j.id for j in ClientManager(self.session, 2).eligible_jobs()],
+            list(self.jobs)[:2])
+
+    def test_changed_capabilities(self):
+        ClientManager(self.session, 3).set_capabilities(
+            Resources(cores=64, memory=256., tags=frozenset({'fast'})))
+        self.session.commit()
+
+        gpu_job = list(self.jobs)[3]
+        self.assertListEqual(
+            [c.id for c in JobManager(self.session, gpu_job)
+             .eligible_clients()], [4])
@@ -7,6 +7,8 @@ from utils.model_managing.subject import Subject
 
 
 class ClientSession(Subject):
+    __slots__ = ()
+
     class Phase(enum.Enum):
         PREPARATION = 'PREPARATION'
         TRAINING = 'TRAINING'
@@ -20,3 +22,5 @@ class ClientSession(Subject):
     time_per_ix = Attribute('time_per_ix', float, 0.)
     message = Attribute('message', str, '')
     estimated_times = Attribute('estimated_times', dict, {})
+    epoch = Attribute('epoch', int, 0)
+    max_epoch = Attribute('max_epoch', int, -1)
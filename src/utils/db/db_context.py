@@ -1,11 +1,16 @@
 from dataclasses import dataclass
 import logging
+from typing import Callable
 from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import Session
 
 from aithena.utils.config_utils import assert_fields_in_dict
 
 from utils.notifier.change_notifier import ChangeNotifier
+from utils.notifier.notification_session import NotificationSession
+from utils.session.flushable_session import FlushableSession
+
+CommitHook = Callable[[Session, FlushableSession], None]
 
 
 class DBContext:
@@ -43,6 +48,12 @@ class DBContext:
         logging.info('db engine created')
 
         self._notifier = ChangeNotifier()
+        self._before_commit_hooks: list[CommitHook] = []
+
+    def add_before_commit_hook(self, hook: CommitHook):
+        # hooks receive the notification context of a session right before
+        # its transaction commits, e.g. to persist staged events with it
+        self._before_commit_hooks.append(hook)
 
     def get_notifier(self) -> ChangeNotifier:
         return self._notifier
@@ -51,27 +62,56 @@ class DBContext:
         logging.debug('created db session')
         session = Session(self._engine)
 
+        # changes are captured at every flush but only passed on once the
+        # transaction is committed, they are dropped if it ends otherwise
+        notifier: NotificationSession = None
+
         def after_flush(session: Session, context):
+            nonlocal notifier
 
             deleted = session.deleted
             new = session.new.difference(deleted)
             dirty = session.dirty.difference(deleted)
 
-            with self._notifier.create_session() as notifier:
-                for obj in deleted:
-                    notifier.notify_delete(obj)
+            if notifier is None:
+                notifier = self._notifier.create_session()
+
+            for obj in deleted:
+                notifier.notify_delete(obj)
+
+            for obj in new:
+                notifier.notify_add(obj)
+
+            for obj in dirty:
+                changed_attributes \
+                    = [a for a in inspect(obj).attrs
+                       if a.history.has_changes()]
+                # collections that only lost items have no new value
+                changes = {a.key: (a.history.added[0]
+                                   if len(a.history.added) > 0 else None)
+                           for a in changed_attributes}
+                notifier.notify_update(obj, changes)
+
+        def before_commit(session: Session):
+            if len(self._before_commit_hooks) == 0:
+                return
+
+            session.flush()
+            if notifier is not None:
+                for hook in self._before_commit_hooks:
+                    hook(session, notifier.get_context())
 
-                for obj in new:
-                    notifier.notify_add(obj)
+        def after_commit(session: Session):
+            if notifier is not None:
+                notifier.commit()
 
-                for obj in dirty:
-                    changed_attributes \
-                        = [a for a in inspect(obj).attrs
-                           if a.history.has_changes()]
-                    changes = {a.key: a.history.added[0]
-                               for a in changed_attributes}
-                    notifier.notify_update(obj, changes)
+        def after_transaction_end(session: Session, transaction):
+            if notifier is not None and transaction.parent is None:
+                notifier.rollback()
 
         event.listen(session, 'after_flush', after_flush)
+        event.listen(session, 'before_commit', before_commit)
+        event.listen(session, 'after_commit', after_commit)
+        event.listen(session, 'after_transaction_end', after_transaction_end)
 
         return session
@@ -1,5 +1,9 @@
 
 
+# marks values of Subject attributes that were not initialized yet
+UNSET = object()
+
+
 class Attribute(property):
 
     def __init__(self,
@@ -7,7 +11,9 @@ class Attribute(property):
                  default: object = None,
                  nullable=False,
                  primary_key=False):
-        super().__init__(self.__get__, self.__set__)
+        # values are kept in the instance dict unless the owner binds the
+        # attribute to a storage index (see Subject)
+        super().__init__(self._get_from_dict, self._set_in_dict)
 
         self._name = name
         self._default = default
@@ -15,6 +21,7 @@ class Attribute(property):
         self._type = type_
         self._field_name = None
         self._primary_key = primary_key
+        self._index = None
 
         if self._primary_key and self._nullable:
             raise ValueError('Primary key cannot be nullable!')
@@ -24,12 +31,48 @@ class Attribute(property):
             self._field_name = ""
         return self._field_name
 
-    def __get__(self, instance, owner):
+    def bind(self, index: int):
+        # replaces the generic accessors with ones specialized for this
+        # attribute, reading and writing instance._values[index]
+        if self._index is not None:
+            if self._index != index:
+                raise TypeError(f'Attribute {self._name} is already bound '
+                                f'to index {self._index}')
+            return
+        self._index = index
+
+        name = self._name
+        type_ = self._type
+        nullable = self._nullable
+
+        def get(instance):
+            value = instance._values[index]
+            if value is UNSET:
+                raise AttributeError(f'Attribute {name} not initialized!')
+            return value
+
+        def set_(instance, value):
+            if value is None:
+                if not nullable:
+                    raise ValueError(f'Attribute {name} cannot be None!')
+            elif not isinstance(value, type_):
+                raise ValueError(f'Attribute {name} must be of '
+                                 f'type {type_}')
+
+            values = instance._values
+            old = values[index]
+            if old is not UNSET:
+                instance.on_attribute_changed(name, old, value)
+            values[index] = value
+
+        property.__init__(self, get, set_)
+
+    def _get_from_dict(self, instance):
         if self._name not in instance.__dict__:
             raise AttributeError(f'Attribute {self._name} not initialized!')
         return instance.__dict__[self._name]
 
-    def __set__(self, instance, value):
+    def _set_in_dict(self, instance, value):
         if value is None and not self._nullable:
             raise ValueError(f'Attribute {self._name} cannot be None!')
 
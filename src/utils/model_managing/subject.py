@@ -1,27 +1,65 @@
 
 
-from utils.model_managing.attribute import Attribute
+from contextvars import ContextVar
+import threading
+
+from utils.model_managing.attribute import Attribute, UNSET
+
+
+# session tracking attribute changes in the current context (see
+# SubjectSession), subjects report to it instead of being attached one by one
+active_session: ContextVar['object | None'] \
+    = ContextVar('active_subject_session', default=None)
 
 
 class Subject:
+    __slots__ = ('_values', '_lock')
 
-    def __init__(self, **kwargs: dict) -> None:
+    # built once per class by __init_subclass__, maps the field name of each
+    # Attribute to it and its name to the index of its value in _values
+    _attributes: dict[str, Attribute] = {}
+    _value_index: dict[str, int] = {}
+    _primary_key: str | None = None
+    _primary_index: int | None = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        attributes: dict[str, Attribute] = {}
+        for base in reversed(cls.__mro__):
+            for k, v in vars(base).items():
+                if isinstance(v, Attribute):
+                    attributes[k] = v
 
-        # get all Attribute fields and initialize them according to kwargs and
-        # default values
-        self._attributes_dict \
-            = {k: v for k, v in dict(type(self).__dict__).items()
-               if isinstance(v, Attribute)}
+        for i, att in enumerate(attributes.values()):
+            att.bind(i)
 
-        primary_key = [v._name for v in self._attributes_dict.values()
-                       if v._primary_key]
-        if len(primary_key) != 1:
+        cls._attributes = attributes
+        cls._value_index = {att._name: att._index
+                            for att in attributes.values()}
+
+        primary_key = [att for att in attributes.values() if att._primary_key]
+        if len(primary_key) == 1:
+            cls._primary_key = primary_key[0]._name
+            cls._primary_index = primary_key[0]._index
+        else:
+            cls._primary_key = None
+            cls._primary_index = None
+
+    def __init__(self, **kwargs: dict) -> None:
+        cls = type(self)
+        if cls._primary_key is None:
+            found = sum(1 for att in cls._attributes.values()
+                        if att._primary_key)
             raise ValueError('Subject must have exactly one primary key! '
-                             f'(found {len(primary_key)})')
+                             f'(found {found})')
 
-        self._primary_key = primary_key[0]
+        # held by the session that touched the subject until it is closed
+        self._lock = threading.Lock()
+        self._values = [UNSET] * len(cls._attributes)
 
-        for k, att in self._attributes_dict.items():
+        # initialize attributes according to kwargs and default values
+        for k, att in cls._attributes.items():
             if k in kwargs:
                 setattr(self, k, kwargs[k])
             elif att._default is not None or att._nullable:
@@ -32,7 +70,18 @@ class Subject:
 
     def on_attribute_changed(self, name: str, old_value: object,
                              new_value: object) -> None:
-        pass
+        session = active_session.get()
+        if session is not None:
+            session.on_subject_attribute_changed(self, name,
+                                                 old_value, new_value)
 
     def get_primary_key(self) -> object:
-        return getattr(self, self._primary_key)
+        return self._values[self._primary_index]
+
+    def get_attribute(self, name: str) -> object:
+        # current value of an attribute by name (UNSET if not initialized)
+        return self._values[self._value_index[name]]
+
+    def restore_attribute(self, name: str, value: object) -> None:
+        # sets an attribute by name without change notification (rollback)
+        self._values[self._value_index[name]] = value
@@ -0,0 +1,61 @@
+
+
+from typing import Iterable
+
+from utils.model_managing.subject import Subject
+
+
+# Subjects by concrete class and primary key. Lookups for a base class only
+# probe the indexed subclasses of it, not the subjects.
+class SubjectIndex:
+
+    def __init__(self, subjects: Iterable[Subject] = ()):
+        self._index: dict[tuple[type, object], Subject] = {}
+        self._subclasses: dict[type, tuple[type, ...]] = {}
+
+        for s in subjects:
+            self.add(s)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, subject: Subject) -> None:
+        self._insert(subject, subject.get_primary_key())
+
+    def remove(self, subject: Subject) -> None:
+        key = (type(subject), subject.get_primary_key())
+        if self._index.get(key) is subject:
+            del self._index[key]
+
+    def rekey(self, subject: Subject, old_key: object, new_key: object):
+        if self._index.get((type(subject), old_key)) is not subject:
+            return
+
+        self._insert(subject, new_key)
+        del self._index[(type(subject), old_key)]
+
+    def get(self, type_: type, key: object) -> Subject | None:
+        subject = self._index.get((type_, key))
+        if subject is not None:
+            return subject
+
+        for cls in self._subclasses.get(type_, ()):
+            subject = self._index.get((cls, key))
+            if subject is not None:
+                return subject
+
+        return None
+
+    def _insert(self, subject: Subject, key: object) -> None:
+        cls = type(subject)
+        existing = self._index.get((cls, key))
+        if existing is not None and existing is not subject:
+            raise ValueError(f'{cls.__name__} with primary key {key} '
+                             'already exists')
+
+        self._index[(cls, key)] = subject
+
+        for base in cls.__mro__[1:]:
+            subclasses = self._subclasses.get(base, ())
+            if cls not in subclasses:
+                self._subclasses[base] = subclasses + (cls,)
@@ -1,16 +1,24 @@
 
 
+import threading
+
 from utils.notifier.change_notifier import ChangeNotifier
+from utils.model_managing.subject_index import SubjectIndex
 from utils.model_managing.subject_session import SubjectSession
 from utils.model_managing.subject import Subject
 
 
 class SubjectManager:
-    def __init__(self):
+    def __init__(self, lock_timeout: float = 5.):
         self._notifier = ChangeNotifier()
         self._subjects: set[Subject] = set()
+        self._index = SubjectIndex()
 
-        self._active_session = False
+        # sessions run concurrently, each locking the subjects it touches
+        self._lock = threading.RLock()
+        self._lock_timeout = lock_timeout
+        # serializes commits into a single ordered notification stream
+        self._commit_lock = threading.Lock()
 
     def get_notifier(self):
         return self._notifier
@@ -19,9 +27,7 @@ class SubjectManager:
                   new: set[Subject],
                   dirty: set[Subject],
                   deleted: set[Subject]):
-        self._active_session = False
-
-        with self._notifier.create_session() as notifier:
+        with self._commit_lock, self._notifier.create_session() as notifier:
             for s in new:
                 notifier.notify_add(s)
             for s in dirty:
@@ -31,9 +37,7 @@ class SubjectManager:
                 notifier.notify_delete(s)
 
     def create_session(self) -> SubjectSession:
-        if self._active_session:
-            raise ValueError('there is already an active session')
-        self._active_session = True
-        session = SubjectSession(self._subjects)
+        session = SubjectSession(self._subjects, self._index,
+                                 self._lock, self._lock_timeout)
         session.on_flush = self.on_commit
         return session
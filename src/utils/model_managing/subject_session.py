@@ -1,7 +1,10 @@
 
 
 from dataclasses import dataclass
-from src.utils.model_managing.subject import Subject
+import threading
+
+from utils.model_managing.subject import Subject, active_session
+from utils.model_managing.subject_index import SubjectIndex
 from utils.session.flushable_session import FlushableSession
 
 
@@ -12,12 +15,22 @@ class SubjectSession(FlushableSession):
         old: object
         new: object
 
-    def __init__(self, subjects: set[Subject]):
+    def __init__(self, subjects: set[Subject], index: SubjectIndex = None,
+                 lock: threading.RLock = None, lock_timeout: float = 5.):
         super().__init__(commit_on_exit=False)
         self._subjects = subjects
-
-        for s in self._subjects:
-            self.attach(s)
+        # kept in sync with subjects, built here if not shared by a manager
+        self._index = index if index is not None else SubjectIndex(subjects)
+        # guards subjects and index against concurrent sessions, the subjects
+        # themselves are locked on first touch and released on close
+        self._lock = lock if lock is not None else threading.RLock()
+        self._lock_timeout = lock_timeout
+        self._locked: set[Subject] = set()
+
+        # subjects report changes to the session active in their context, so
+        # opening a session does not touch the subjects at all
+        self._previous_session = active_session.get()
+        active_session.set(self)
 
         self._new: set[Subject] = set()
         self._dirty: set[Subject] = set()
@@ -29,8 +42,13 @@ class SubjectSession(FlushableSession):
         return self._changes.get(subject, {})
 
     def get(self, type_: type, key: object, raise_: bool) -> Subject:
-        for s in self._subjects:
-            if isinstance(s, type_) and s.get_primary_key() == key:
+        # subjects are locked on read, so read-modify-write sessions on the
+        # same subject do not overwrite each other's changes
+        s = self._index.get(type_, key)
+        if s is not None:
+            self._acquire(s)
+            # may have been deleted by another session while waiting
+            if s in self._subjects:
                 return s
 
         if raise_:
@@ -38,23 +56,13 @@ class SubjectSession(FlushableSession):
 
         return None
 
-    def attach(self, subject: Subject):
-        subject.on_attribute_changed = (
-            lambda name, old_value, new_value:
-                self.on_subject_attribute_changed(
-                    subject,
-                    name,
-                    old_value,
-                    new_value)
-        )
-
-    def detach(self, subject: Subject):
-        subject.on_attribute_changed = None
-
     def add(self, subject: Subject):
-        if subject in self._subjects:
-            raise ValueError('Subject already in session')
-        self._subjects.add(subject)
+        self._acquire(subject)
+        with self._lock:
+            if subject in self._subjects:
+                raise ValueError('Subject already in session')
+            self._index.add(subject)
+            self._subjects.add(subject)
 
         if subject in self._deleted:
             self._deleted.remove(subject)
@@ -63,12 +71,13 @@ class SubjectSession(FlushableSession):
         else:
             self._new.add(subject)
 
-        self.attach(subject)
-
     def delete(self, subject: Subject):
-        if subject not in self._subjects:
-            raise ValueError('Subject not in session')
-        self._subjects.remove(subject)
+        self._acquire(subject)
+        with self._lock:
+            if subject not in self._subjects:
+                raise ValueError('Subject not in session')
+            self._subjects.remove(subject)
+            self._index.remove(subject)
 
         if subject in self._new:
             self._new.remove(subject)
@@ -78,13 +87,27 @@ class SubjectSession(FlushableSession):
 
         self._deleted.add(subject)
 
-        self.detach(subject)
-
     def on_subject_attribute_changed(self,
                                      target: Subject,
                                      name: str,
                                      old_value: object,
                                      new_value: object):
+        # changes of subjects outside the session (e.g. deleted) are ignored
+        if target not in self._subjects:
+            return
+
+        # raising here aborts the assignment
+        self._acquire(target)
+        if target not in self._subjects:
+            return
+
+        # the old value was read before waiting for the lock and may have
+        # been changed by the session holding it
+        old_value = target.get_attribute(name)
+
+        if name == target._primary_key:
+            with self._lock:
+                self._index.rekey(target, old_value, new_value)
 
         if target not in self._dirty and target not in self._new:
             self._dirty.add(target)
@@ -105,25 +128,57 @@ class SubjectSession(FlushableSession):
         self._deleted.clear()
         self._changes.clear()
 
+    def _acquire(self, subject: Subject):
+        if subject in self._locked:
+            return
+
+        if not subject._lock.acquire(timeout=self._lock_timeout):
+            raise TimeoutError(f'{type(subject).__name__} '
+                               f'{subject.get_primary_key()} is locked by '
+                               'another session')
+        self._locked.add(subject)
+
+    def _release(self):
+        for subject in self._locked:
+            subject._lock.release()
+        self._locked.clear()
+
     def _rollback(self):
-        for subject, changes in self._changes.items():
-            for att, change in changes.items():
-                subject.__dict__[att] = change.old
+        with self._lock:
+            # all changed subjects leave the index before any is re-inserted
+            # with its restored key, so swapped keys do not collide
+            for subject in self._changes:
+                self._index.remove(subject)
 
-        for subject in self._new:
-            self.detach(subject)
-            self._subjects.remove(subject)
+            for subject in self._new:
+                self._subjects.remove(subject)
+                self._index.remove(subject)
 
-        for subject in self._deleted:
-            self.attach(subject)
-            self._subjects.add(subject)
+            for subject, changes in self._changes.items():
+                for att, change in changes.items():
+                    subject.restore_attribute(att, change.old)
+
+            for subject in self._changes:
+                if subject in self._subjects:
+                    self._index.add(subject)
+
+            for subject in self._deleted:
+                self._subjects.add(subject)
+                self._index.add(subject)
 
         self._clear()
 
     def _close(self, commit: bool):
-        super()._close(commit)
-        for s in self._subjects:
-            self.detach(s)
+        try:
+            super()._close(commit)
+        finally:
+            self._release()
+
+        if active_session.get() is self:
+            previous = self._previous_session
+            while previous is not None and previous._closed:
+                previous = previous._previous_session
+            active_session.set(previous)
 
     def _flush(self):
         self.on_flush(self, self._new, self._dirty, self._deleted)
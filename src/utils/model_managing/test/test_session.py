@@ -2,9 +2,9 @@
 
 import unittest
 
-from src.utils.model_managing.attribute import Attribute
-from src.utils.model_managing.subject_session import SubjectSession
-from src.utils.model_managing.subject import Subject
+from utils.model_managing.attribute import Attribute
+from utils.model_managing.subject_session import SubjectSession
+from utils.model_managing.subject import Subject
 
 
 class DummySubject(Subject):
@@ -129,7 +129,7 @@ class SessionTest(unittest.TestCase):
 
         # assert context manager without commit rolls back changes
         with SubjectSession(subjects) as session:
-            session.before_commit = on_commit
+            session.on_flush = on_commit
             a.a = -1
             session.delete(b)
             session.add(f)
@@ -141,7 +141,7 @@ class SessionTest(unittest.TestCase):
 
         # assert context manager with commit flushes changes
         with SubjectSession(subjects) as session:
-            session.before_commit = on_commit
+            session.on_flush = on_commit
             a.a = -1
             session.delete(b)
             session.add(f)
@@ -171,3 +171,75 @@ class SessionTest(unittest.TestCase):
         self.assertIsNone(session.get(DummySubject, 5, False))
         with self.assertRaises(IndexError):
             session.get(int, 5, True)
+
+    def test_get_after_key_change(self):
+        a = DummySubject(a=0, b='a')
+        b = DummySubject(a=1, b='b')
+        c = DummySubject(a=2, b='c')
+
+        subjects = set([a, b])
+        session = SubjectSession(subjects)
+
+        a.a = 10
+        self.assertIsNone(session.get(DummySubject, 0, False))
+        self.assertEqual(session.get(DummySubject, 10, False), a)
+
+        # key collisions are rejected before the value is changed
+        with self.assertRaises(ValueError):
+            a.a = 1
+        self.assertEqual(a.a, 10)
+
+        session.add(c)
+        c.a = 20
+        session.delete(b)
+        self.assertIsNone(session.get(DummySubject, 1, False))
+        self.assertEqual(session.get(DummySubject, 20, False), c)
+
+        session.rollback()
+        self.assertEqual(session.get(DummySubject, 0, False), a)
+        self.assertEqual(session.get(DummySubject, 1, False), b)
+        self.assertIsNone(session.get(DummySubject, 10, False))
+        self.assertIsNone(session.get(DummySubject, 2, False))
+        self.assertIsNone(session.get(DummySubject, 20, False))
+
+    def test_rollback_swapped_keys(self):
+        a = DummySubject(a=0, b='a')
+        b = DummySubject(a=1, b='b')
+
+        session = SubjectSession(set([a, b]))
+        a.a = 2
+        b.a = 0
+        a.a = 1
+        self.assertEqual(session.get(DummySubject, 0, False), b)
+        self.assertEqual(session.get(DummySubject, 1, False), a)
+
+        session.rollback()
+        self.assertEqual(session.get(DummySubject, 0, False), a)
+        self.assertEqual(session.get(DummySubject, 1, False), b)
+        self.assertIsNone(session.get(DummySubject, 2, False))
+
+    def test_active_session(self):
+        a = DummySubject(a=0, b='a')
+        subjects = set([a])
+
+        outer = SubjectSession(subjects)
+        inner = SubjectSession(subjects)
+
+        # only the most recently opened session tracks changes
+        a.b = 'x'
+        self.assertSetEqual(inner._dirty, {a})
+        self.assertSetEqual(outer._dirty, set())
+
+        # closing it reactivates the previous one
+        inner.close(commit=False)
+        a.b = 'y'
+        self.assertSetEqual(outer._dirty, {a})
+
+        # sessions closed out of order are not reactivated
+        inner = SubjectSession(subjects)
+        outer.close(commit=False)
+        inner.close(commit=False)
+        a.b = 'z'
+        self.assertSetEqual(outer._dirty, set())
+        self.assertSetEqual(inner._dirty, set())
+        self.assertEqual(a.b, 'z')
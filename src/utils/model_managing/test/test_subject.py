@@ -1,8 +1,8 @@
 
 import unittest
 
-from src.utils.model_managing.attribute import Attribute
-from src.utils.model_managing.subject import Subject
+from utils.model_managing.attribute import Attribute
+from utils.model_managing.subject import Subject
 
 
 class SubjectTest(unittest.TestCase):
@@ -42,3 +42,33 @@ class SubjectTest(unittest.TestCase):
 
         s.b = 'new'
         self.assertListEqual(s.changes, [('a', 1, 2), ('b', 'test', 'new')])
+
+    def test_slotted_storage(self):
+        class SlottedSubject(Subject):
+            __slots__ = ()
+            a = Attribute('a', int, primary_key=True)
+            b = Attribute('B', str, nullable=True)
+
+        class DerivedSubject(SlottedSubject):
+            __slots__ = ()
+            c = Attribute('c', float, 0.)
+
+        s = DerivedSubject(a=1, c=2.)
+        self.assertFalse(hasattr(s, '__dict__'))
+        self.assertIsInstance(DerivedSubject.a, Attribute)
+        self.assertListEqual(list(DerivedSubject._attributes), ['a', 'b', 'c'])
+
+        # inherited attributes keep their storage index
+        self.assertEqual(s.get_primary_key(), 1)
+        self.assertIsNone(s.b)
+        self.assertEqual(s.c, 2.)
+
+        s.b = 'x'
+        s.b = None
+        with self.assertRaises(ValueError):
+            s.c = 1
+        with self.assertRaises(ValueError):
+            s.a = None
+
+        s.restore_attribute('B', 'y')
+        self.assertEqual(s.b, 'y')
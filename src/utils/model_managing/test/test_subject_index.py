@@ -0,0 +1,70 @@
+
+
+import unittest
+
+from utils.model_managing.attribute import Attribute
+from utils.model_managing.subject import Subject
+from utils.model_managing.subject_index import SubjectIndex
+
+
+class BaseSubject(Subject):
+    pass
+
+
+class SubjectA(BaseSubject):
+    id = Attribute('id', int, primary_key=True)
+
+
+class SubjectB(BaseSubject):
+    id = Attribute('id', int, primary_key=True)
+
+
+class SubjectIndexTest(unittest.TestCase):
+
+    def test_get(self):
+        a = SubjectA(id=1)
+        b = SubjectB(id=2)
+        index = SubjectIndex([a, b])
+
+        self.assertIs(index.get(SubjectA, 1), a)
+        self.assertIsNone(index.get(SubjectA, 2))
+        self.assertIs(index.get(SubjectB, 2), b)
+
+        # base classes resolve to any indexed subclass
+        self.assertIs(index.get(BaseSubject, 1), a)
+        self.assertIs(index.get(BaseSubject, 2), b)
+        self.assertIs(index.get(Subject, 2), b)
+        self.assertIsNone(index.get(int, 1))
+
+    def test_add_remove(self):
+        a = SubjectA(id=1)
+        index = SubjectIndex()
+        index.add(a)
+        self.assertEqual(len(index), 1)
+
+        # same key in another class is fine, in the same class it is not
+        index.add(SubjectB(id=1))
+        with self.assertRaises(ValueError):
+            index.add(SubjectA(id=1))
+
+        index.remove(a)
+        self.assertIsNone(index.get(SubjectA, 1))
+        self.assertEqual(len(index), 1)
+
+        # removing an unindexed subject is a no-op
+        index.remove(SubjectA(id=1))
+        self.assertEqual(len(index), 1)
+
+    def test_rekey(self):
+        a = SubjectA(id=1)
+        b = SubjectA(id=2)
+        index = SubjectIndex([a, b])
+
+        index.rekey(a, 1, 3)
+        self.assertIsNone(index.get(SubjectA, 1))
+        self.assertIs(index.get(SubjectA, 3), a)
+
+        with self.assertRaises(ValueError):
+            index.rekey(a, 3, 2)
+        self.assertIs(index.get(SubjectA, 3), a)
+        self.assertIs(index.get(SubjectA, 2), b)
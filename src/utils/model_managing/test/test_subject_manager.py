@@ -0,0 +1,179 @@
+
+
+import threading
+import time
+import unittest
+
+from utils.model_managing.attribute import Attribute
+from utils.model_managing.subject import Subject
+from utils.model_managing.subject_manager import SubjectManager
+
+
+class DummySubject(Subject):
+    a = Attribute('a', int, primary_key=True)
+    b = Attribute('b', int, 0)
+
+
+class SubjectManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sm = SubjectManager(lock_timeout=.1)
+        self.events = []
+        self.sm.get_notifier().set_context_factory(lambda: None)
+        self.sm.get_notifier().add_listener(
+            DummySubject,
+            lambda ctx, event, obj, data:
+                self.events.append((event, obj.a, data)))
+
+        with self.sm.create_session() as session:
+            for i in range(4):
+                session.add(DummySubject(a=i))
+            session.commit()
+        self.events.clear()
+
+    def run_in_thread(self, func):
+        errors = []
+
+        def target():
+            try:
+                func()
+            except Exception as e:
+                errors.append(e)
+
+        t = threading.Thread(target=target)
+        t.start()
+        t.join()
+        return errors
+
+    def test_concurrent_sessions(self):
+        with self.sm.create_session() as session:
+            session.get(DummySubject, 0, True).b = 1
+
+            # other subjects can be changed concurrently
+            def update_other():
+                with self.sm.create_session() as other:
+                    other.get(DummySubject, 1, True).b = 2
+                    other.commit()
+            self.assertListEqual(self.run_in_thread(update_other), [])
+
+            # touched subjects are locked until the session is closed
+            def read_same():
+                with self.sm.create_session() as other:
+                    other.get(DummySubject, 0, True)
+            errors = self.run_in_thread(read_same)
+            self.assertEqual(len(errors), 1)
+            self.assertIsInstance(errors[0], TimeoutError)
+
+            def update_same():
+                with self.sm.create_session() as other:
+                    other.get(DummySubject, 0, True).b = 3
+                    other.commit()
+            errors = self.run_in_thread(update_same)
+            self.assertEqual(len(errors), 1)
+            self.assertIsInstance(errors[0], TimeoutError)
+
+            session.commit()
+
+        self.assertListEqual(self.run_in_thread(update_same), [])
+        self.assertListEqual(self.events, [('update', 1, {'b': 2}),
+                                           ('update', 0, {'b': 1}),
+                                           ('update', 0, {'b': 3})])
+
+    def test_delete_while_waiting(self):
+        session = self.sm.create_session()
+        session.delete(session.get(DummySubject, 2, True))
+
+        found = []
+
+        def get_deleted():
+            with self.sm.create_session() as other:
+                found.append(other.get(DummySubject, 2, False))
+
+        t = threading.Thread(target=get_deleted)
+        t.start()
+        session.commit()
+        session.close(commit=False)
+        t.join()
+
+        self.assertListEqual(found, [None])
+
+    def test_parallel_updates(self):
+        def worker(i):
+            for _ in range(100):
+                with self.sm.create_session() as session:
+                    s = session.get(DummySubject, i, True)
+                    s.b = s.b + 1
+                    session.commit()
+
+        threads = [threading.Thread(target=worker, args=(i,))
+                   for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with self.sm.create_session() as session:
+            self.assertListEqual(
+                [session.get(DummySubject, i, True).b for i in range(4)],
+                [100] * 4)
+
+        # each subject's notifications arrive in commit order
+        for i in range(4):
+            self.assertListEqual(
+                [data['b'] for _, a, data in self.events if a == i],
+                list(range(1, 101)))
+
+    def test_parallel_updates_same_subject(self):
+        sm = SubjectManager()
+        sm.get_notifier().set_context_factory(lambda: None)
+        with sm.create_session() as session:
+            session.add(DummySubject(a=0))
+            session.commit()
+
+        def worker():
+            for _ in range(200):
+                with sm.create_session() as session:
+                    s = session.get(DummySubject, 0, True)
+                    b = s.b
+                    # lets the other threads interleave
+                    time.sleep(0)
+                    s.b = b + 1
+                    session.commit()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        with sm.create_session() as session:
+            self.assertEqual(session.get(DummySubject, 0, True).b, 800)
+
+    def test_change_while_waiting(self):
+        sm = SubjectManager()
+        with sm.create_session() as session:
+            subject = DummySubject(a=0)
+            session.add(subject)
+            session.commit()
+
+        holder = sm.create_session()
+        subject.b = 5
+
+        def change():
+            with sm.create_session():
+                # waits for holder, which rolls back in the meantime
+                subject.b = 7
+                subject.a = 1
+
+        t = threading.Thread(target=change)
+        t.start()
+        time.sleep(.05)
+        holder.close(commit=False)
+        t.join()
+
+        # the rollback restores the values the change actually replaced
+        self.assertEqual(subject.b, 0)
+        self.assertEqual(subject.a, 0)
+        with sm.create_session() as session:
+            self.assertIs(session.get(DummySubject, 0, False), subject)
+            self.assertIsNone(session.get(DummySubject, 1, False))
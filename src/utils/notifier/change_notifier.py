@@ -1,14 +1,17 @@
 
 
 import logging
-from typing import Callable
+import threading
+from typing import Callable, Iterable
 
 from utils.notifier.notification_session \
-    import ChangeCallback, NotificationSession, KeyFn
+    import ChangeCallback, DispatchTable, NotificationSession
 from utils.session.flushable_session import FlushableSession
 
 ContextSessionFactory = Callable[[], FlushableSession]
 
+EVENTS = ('add', 'update', 'delete')
+
 
 class FactoryNotSet(Exception):
     pass
@@ -17,26 +20,61 @@ class FactoryNotSet(Exception):
 class ChangeNotifier:
 
     def __init__(self):
-        self._listeners: dict[str, ChangeCallback] = {}
-        self._key_fns: dict[type, KeyFn] = {}
+        # listeners registered per class with the events they are
+        # interested in
+        self._listeners: dict[type, list[tuple[ChangeCallback, frozenset]]] \
+            = {}
+        # resolved listeners per concrete class and event, including the
+        # listeners of all base classes
+        self._dispatch_cache: dict[type, DispatchTable] = {}
+        self._lock = threading.Lock()
+
         self._context_session_factory: ContextSessionFactory = None
 
     def set_context_factory(self, callback: ContextSessionFactory):
         self._context_session_factory = callback
 
-    def add_type_key_fn(self, type_: type, key_fn: KeyFn):
-        self._key_fns[type_] = key_fn
+    def add_listener(self, type_: type, listener: ChangeCallback,
+                     events: Iterable[str] = EVENTS):
+        events = frozenset(events)
+        unknown = events.difference(EVENTS)
+        if len(unknown) != 0:
+            raise ValueError(f"Unknown events {unknown}")
+
+        with self._lock:
+            self._listeners.setdefault(type_, []).append((listener, events))
+            self._dispatch_cache.clear()
+
+    def remove_listener(self, type_: type, listener: ChangeCallback):
+        with self._lock:
+            self._listeners[type_] = [
+                (cb, events) for cb, events in self._listeners.get(type_, [])
+                if cb != listener
+            ]
+            self._dispatch_cache.clear()
+
+    def resolve(self, type_: type) -> DispatchTable:
+        table = self._dispatch_cache.get(type_)
+        if table is not None:
+            return table
 
-    def add_listener(self, key: str, listener: ChangeCallback):
-        if key in self._listeners:
-            raise Exception(f"listener for key {key} already set")
+        with self._lock:
+            resolved = {e: [] for e in EVENTS}
+            for cls in type_.__mro__:
+                for listener, events in self._listeners.get(cls, []):
+                    for e in events:
+                        resolved[e].append(listener)
 
-        self._listeners[key] = listener
+            table = {e: tuple(listeners)
+                     for e, listeners in resolved.items()
+                     if len(listeners) != 0}
+            self._dispatch_cache[type_] = table
+            return table
 
     def create_session(self) -> NotificationSession:
         if not self._context_session_factory:
             logging.warning('Context factory was not set yet!')
-            return NotificationSession({}, {}, None)
+            return NotificationSession(self.resolve, None)
 
-        return NotificationSession(self._listeners, self._key_fns,
+        return NotificationSession(self.resolve,
                                    self._context_session_factory())
@@ -0,0 +1,82 @@
+
+import unittest
+
+from utils.notifier.change_notifier import ChangeNotifier
+from utils.session.flushable_session import FlushableSession
+
+
+class Base:
+    pass
+
+
+class Derived(Base):
+    pass
+
+
+class Context(FlushableSession):
+    def __init__(self):
+        super().__init__(commit_on_exit=True)
+        self.committed = False
+
+    def _commit(self):
+        self.committed = True
+
+
+class ChangeNotifierTest(unittest.TestCase):
+
+    def test_dispatch(self):
+        notifier = ChangeNotifier()
+        context = Context()
+        notifier.set_context_factory(lambda: context)
+
+        calls = []
+
+        def listener(name):
+            return lambda ctx, event, obj, data: \
+                calls.append((name, event, type(obj), data))
+
+        notifier.add_listener(Base, listener('base'))
+        notifier.add_listener(Derived, listener('derived'), events=['update'])
+        notifier.add_listener(Derived, listener('metrics'))
+
+        with notifier.create_session() as session:
+            session.notify_add(Base())
+            session.notify_update(Derived(), {'a': 1})
+            session.notify_delete(Derived())
+            session.notify_add(1)
+
+        self.assertTrue(context.committed)
+        self.assertListEqual(calls, [
+            ('base', 'add', Base, None),
+            ('derived', 'update', Derived, {'a': 1}),
+            ('metrics', 'update', Derived, {'a': 1}),
+            ('base', 'update', Derived, {'a': 1}),
+            ('metrics', 'delete', Derived, None),
+            ('base', 'delete', Derived, None),
+        ])
+
+    def test_resolve_cache(self):
+        notifier = ChangeNotifier()
+
+        def a(*_):
+            pass
+
+        def b(*_):
+            pass
+
+        notifier.add_listener(Base, a)
+        table = notifier.resolve(Derived)
+        self.assertDictEqual(table, {'add': (a,), 'update': (a,),
+                                     'delete': (a,)})
+        self.assertIs(notifier.resolve(Derived), table)
+        self.assertDictEqual(notifier.resolve(int), {})
+
+        # registering invalidates resolved tables
+        notifier.add_listener(Derived, b, events=['add'])
+        self.assertTupleEqual(notifier.resolve(Derived)['add'], (b, a))
+
+        notifier.remove_listener(Base, a)
+        self.assertDictEqual(notifier.resolve(Derived), {'add': (b,)})
+
+        with self.assertRaises(ValueError):
+            notifier.add_listener(Base, a, events=['change'])
@@ -0,0 +1,41 @@
+
+
+# Smoothed time per step (ix) for each phase of a run, estimated from
+# (phase, ix, count, timestamp) samples with an exponentially weighted moving
+# average. Samples may arrive at any rate; steps going backwards (e.g. a new
+# epoch) only start a new baseline.
+class ProgressEstimator:
+
+    def __init__(self, smoothing: float):
+        if not 0 < smoothing <= 1:
+            raise ValueError('Smoothing must be in (0, 1]')
+
+        self._smoothing = smoothing
+        self._last: tuple[str, int, float] | None = None
+        self._time_per_ix: dict[str, float] = {}
+        self._phase_times: dict[str, float] = {}
+
+    def update(self, phase: str, ix: int, count: int, timestamp: float):
+        # a stalled step keeps the baseline, so the time spent waiting counts
+        # towards the next sample
+        last = self._last
+        if last is None or last[0] != phase or ix < last[1]:
+            self._last = (phase, ix, timestamp)
+        elif ix > last[1]:
+            sample = (timestamp - last[2]) / (ix - last[1])
+            old = self._time_per_ix.get(phase)
+            self._time_per_ix[phase] = (
+                sample if old is None
+                else old + self._smoothing * (sample - old)
+            )
+            self._last = (phase, ix, timestamp)
+
+        if phase in self._time_per_ix and count > 0:
+            self._phase_times[phase] = count * self._time_per_ix[phase]
+
+    def time_per_ix(self, phase: str) -> float:
+        return self._time_per_ix.get(phase, 0.)
+
+    def phase_times(self) -> dict[str, float]:
+        # estimated duration of a full run of each measured phase
+        return dict(self._phase_times)
@@ -0,0 +1,43 @@
+
+
+import threading
+
+import numpy as np
+
+
+# Fixed capacity buffer of records (rows of a structured dtype). Once full,
+# each append overwrites the oldest record, so memory stays at
+# capacity * dtype.itemsize.
+class RingBuffer:
+
+    def __init__(self, capacity: int, dtype: np.dtype):
+        if capacity <= 0:
+            raise ValueError('Capacity must be positive')
+
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def append(self, record: tuple) -> None:
+        with self._lock:
+            self._data[self._next] = record
+            self._next = (self._next + 1) % len(self._data)
+            self._size = min(self._size + 1, len(self._data))
+
+    def window(self, count: int = None) -> np.ndarray:
+        # copy of the last count records (all if None), oldest first
+        with self._lock:
+            n = self._size if count is None else max(min(count, self._size),
+                                                     0)
+            start = (self._next - n) % len(self._data)
+            return self._data[(start + np.arange(n)) % len(self._data)]
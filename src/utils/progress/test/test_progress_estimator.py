@@ -0,0 +1,54 @@
+
+
+import unittest
+
+from utils.progress.progress_estimator import ProgressEstimator
+
+
+class ProgressEstimatorTest(unittest.TestCase):
+
+    def test_smoothing(self):
+        e = ProgressEstimator(.5)
+        self.assertEqual(e.time_per_ix('TRAINING'), 0.)
+
+        e.update('TRAINING', 0, 100, 10.)
+        self.assertEqual(e.time_per_ix('TRAINING'), 0.)
+        self.assertDictEqual(e.phase_times(), {})
+
+        e.update('TRAINING', 10, 100, 20.)
+        self.assertEqual(e.time_per_ix('TRAINING'), 1.)
+        self.assertDictEqual(e.phase_times(), {'TRAINING': 100.})
+
+        e.update('TRAINING', 20, 100, 40.)
+        self.assertEqual(e.time_per_ix('TRAINING'), 1.5)
+
+        # stalled or repeated steps are no samples
+        e.update('TRAINING', 20, 100, 50.)
+        self.assertEqual(e.time_per_ix('TRAINING'), 1.5)
+
+        # but the stalled time counts towards the next one (2s per step)
+        e.update('TRAINING', 30, 100, 60.)
+        self.assertEqual(e.time_per_ix('TRAINING'), 1.75)
+
+    def test_phases(self):
+        e = ProgressEstimator(1.)
+
+        e.update('TRAINING', 0, 10, 0.)
+        e.update('TRAINING', 10, 10, 10.)
+        e.update('VALIDATION', 0, 4, 10.)
+        e.update('VALIDATION', 2, 4, 14.)
+
+        self.assertEqual(e.time_per_ix('TRAINING'), 1.)
+        self.assertEqual(e.time_per_ix('VALIDATION'), 2.)
+        self.assertDictEqual(e.phase_times(),
+                             {'TRAINING': 10., 'VALIDATION': 8.})
+
+        # the next epoch restarts at step 0 and keeps the estimates
+        e.update('TRAINING', 0, 10, 20.)
+        self.assertEqual(e.time_per_ix('TRAINING'), 1.)
+        e.update('TRAINING', 5, 10, 30.)
+        self.assertEqual(e.time_per_ix('TRAINING'), 2.)
+
+    def test_invalid_smoothing(self):
+        with self.assertRaises(ValueError):
+            ProgressEstimator(0.)
@@ -0,0 +1,45 @@
+
+
+import unittest
+
+import numpy as np
+
+from utils.progress.ring_buffer import RingBuffer
+
+
+DTYPE = np.dtype([('t', 'f8'), ('ix', 'i8')])
+
+
+class RingBufferTest(unittest.TestCase):
+
+    def test_append_and_window(self):
+        b = RingBuffer(4, DTYPE)
+        self.assertEqual(len(b), 0)
+        self.assertEqual(len(b.window()), 0)
+        self.assertEqual(b.nbytes(), 4 * DTYPE.itemsize)
+
+        for i in range(3):
+            b.append((i / 2, i))
+        self.assertEqual(len(b), 3)
+        self.assertListEqual(b.window()['ix'].tolist(), [0, 1, 2])
+        self.assertListEqual(b.window(2)['t'].tolist(), [.5, 1.])
+
+    def test_overwrite(self):
+        b = RingBuffer(4, DTYPE)
+        for i in range(10):
+            b.append((i, i))
+
+        self.assertEqual(len(b), 4)
+        self.assertListEqual(b.window()['ix'].tolist(), [6, 7, 8, 9])
+        self.assertListEqual(b.window(100)['ix'].tolist(), [6, 7, 8, 9])
+        self.assertListEqual(b.window(1)['ix'].tolist(), [9])
+        self.assertEqual(len(b.window(0)), 0)
+
+        # windows are copies
+        w = b.window()
+        b.append((10, 10))
+        self.assertListEqual(w['ix'].tolist(), [6, 7, 8, 9])
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(0, DTYPE)
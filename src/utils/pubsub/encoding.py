@@ -0,0 +1,135 @@
+
+
+import abc
+from abc import abstractmethod
+from collections import OrderedDict
+
+try:
+    import msgpack
+except ImportError:  # optional dependency, only needed for binary clients
+    msgpack = None
+
+
+class Encoding(abc.ABC):
+    name: str = None
+
+    @abstractmethod
+    def encode(self, event: str, data: list) -> object:
+        # returns None if there is nothing left to send
+        pass
+
+
+class JsonEncoding(Encoding):
+    name = 'json'
+
+    def encode(self, event: str, data: list) -> object:
+        return data
+
+
+# Stateful per-connection encoding of staging events ('<type>-added',
+# '<type>-changed', '<type>-deleted'). Payloads are sent as [new_keys, data]:
+# the field names of the items (and of their 'updates') are replaced by
+# indices into a key table that grows incrementally, new_keys lists the names
+# appended by this message. Nested values (e.g. job configs) are sent as is.
+# Fields of a change that equal the value last sent on the connection are
+# omitted, the sent state is kept for the max_entities most recently sent
+# entities (evicted entities are sent in full with their next change).
+class MsgPackEncoding(Encoding):
+    name = 'msgpack'
+
+    def __init__(self, max_entities: int = 10000):
+        if msgpack is None:
+            raise ValueError('msgpack encoding is not available '
+                             '(package not installed)')
+
+        self._keys: dict[str, int] = {}
+        self._max_entities = max_entities
+        self._sent_state: OrderedDict[tuple[str, object], dict] = \
+            OrderedDict()
+
+    def _intern_keys(self, obj: dict, new_keys: list[str]) -> dict:
+        result = {}
+        for k, v in obj.items():
+            ix = self._keys.get(k)
+            if ix is None:
+                ix = len(self._keys)
+                self._keys[k] = ix
+                new_keys.append(k)
+            result[ix] = v
+        return result
+
+    def _intern(self, data: list, new_keys: list[str]) -> list:
+        result = []
+        for item in data:
+            if not isinstance(item, dict):
+                result.append(item)
+                continue
+
+            item = self._intern_keys(item, new_keys)
+            updates = self._keys.get('updates')
+            if isinstance(item.get(updates), dict):
+                item[updates] = self._intern_keys(item[updates], new_keys)
+            result.append(item)
+
+        return result
+
+    def _remember(self, key: tuple[str, object]) -> dict:
+        state = self._sent_state.get(key)
+        if state is None:
+            state = self._sent_state[key] = {}
+            while len(self._sent_state) > self._max_entities:
+                self._sent_state.popitem(last=False)
+        else:
+            self._sent_state.move_to_end(key)
+        return state
+
+    def _omit_unchanged(self, type_: str, kind: str, data: list) -> list:
+        if kind == 'added':
+            for item in data:
+                state = self._remember((type_, item['id']))
+                state.clear()
+                state.update(item)
+            return data
+
+        if kind == 'deleted':
+            for id in data:
+                self._sent_state.pop((type_, id), None)
+            return data
+
+        if kind != 'changed':
+            return data
+
+        result = []
+        for item in data:
+            state = self._remember((type_, item['id']))
+            updates = {k: v for k, v in item['updates'].items()
+                       if k not in state or state[k] != v}
+            if len(updates) == 0:
+                continue
+
+            state.update(updates)
+            result.append({'id': item['id'], 'updates': updates})
+
+        return result
+
+    def encode(self, event: str, data: list) -> object:
+        type_, _, kind = event.rpartition('-')
+        data = self._omit_unchanged(type_, kind, data)
+        if len(data) == 0:
+            return None
+
+        new_keys = []
+        interned = self._intern(data, new_keys)
+        return msgpack.packb([new_keys, interned])
+
+
+ENCODINGS: dict[str, type[Encoding]] = {
+    JsonEncoding.name: JsonEncoding,
+    MsgPackEncoding.name: MsgPackEncoding,
+}
+
+
+def create_encoding(name: str) -> Encoding:
+    if name not in ENCODINGS:
+        raise ValueError(f'Unknown encoding {name}')
+    return ENCODINGS[name]()
@@ -0,0 +1,95 @@
+
+
+from collections import deque
+
+
+# (seq, event, items) as produced by a staging session flush
+Message = tuple[int, str, list]
+
+
+# Bounded queue of staging events ('<type>-added', '<type>-changed',
+# '<type>-deleted') waiting to be sent to a single subscriber. Once the soft
+# limit is exceeded, pending changes are merged into the latest state per
+# entity. push() reports False if the hard limit is still exceeded afterwards.
+class OutboundQueue:
+
+    def __init__(self, soft_limit: int, hard_limit: int):
+        if soft_limit > hard_limit:
+            raise ValueError('Soft limit must not exceed hard limit')
+
+        self._soft_limit = soft_limit
+        self._hard_limit = hard_limit
+        self._messages: deque[Message] = deque()
+        self._depth = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def depth(self) -> int:
+        return self._depth
+
+    def push(self, seq: int, event: str, items: list) -> bool:
+        self._messages.append((seq, event, items))
+        self._depth += len(items)
+
+        if self._depth > self._soft_limit:
+            self._coalesce()
+
+        return self._depth <= self._hard_limit
+
+    def pop(self) -> Message | None:
+        if len(self._messages) == 0:
+            return None
+
+        message = self._messages.popleft()
+        self._depth -= len(message[2])
+        return message
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._depth = 0
+
+    def _coalesce(self) -> None:
+        added: dict[tuple[str, object], dict] = {}
+        changed: dict[tuple[str, object], dict] = {}
+        dropped: set[int] = set()
+
+        messages = []
+        for seq, event, items in self._messages:
+            type_, _, kind = event.rpartition('-')
+            kept = []
+
+            for item in items:
+                if kind == 'added':
+                    item = dict(item)
+                    added[(type_, item['id'])] = item
+
+                elif kind == 'changed':
+                    key = (type_, item['id'])
+                    if key in added:
+                        added[key].update(item['updates'])
+                        continue
+                    if key in changed:
+                        changed[key]['updates'].update(item['updates'])
+                        continue
+
+                    item = {'id': item['id'], 'updates': dict(item['updates'])}
+                    changed[key] = item
+
+                elif kind == 'deleted':
+                    key = (type_, item)
+                    added.pop(key, None)
+                    if key in changed:
+                        dropped.add(id(changed.pop(key)))
+
+                kept.append(item)
+
+            messages.append((seq, event, kept))
+
+        self._messages.clear()
+        self._depth = 0
+        for seq, event, items in messages:
+            items = [i for i in items if id(i) not in dropped]
+            if len(items) != 0:
+                self._messages.append((seq, event, items))
+                self._depth += len(items)
@@ -0,0 +1,111 @@
+
+
+import abc
+from abc import abstractmethod
+import queue
+import sqlite3
+import threading
+import time
+
+
+class QueueBackend(abc.ABC):
+
+    @abstractmethod
+    def publish(self, message: str) -> None:
+        pass
+
+    @abstractmethod
+    def poll(self, timeout: float) -> list[str]:
+        # returns the messages published since the last poll, waits up to
+        # timeout seconds if there are none
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InProcessQueueBackend(QueueBackend):
+
+    def __init__(self):
+        self._queue: queue.Queue[str] = queue.Queue()
+
+    def publish(self, message: str) -> None:
+        self._queue.put(message)
+
+    def poll(self, timeout: float) -> list[str]:
+        try:
+            messages = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+
+        while True:
+            try:
+                messages.append(self._queue.get_nowait())
+            except queue.Empty:
+                return messages
+
+
+# Message log in a shared SQLite file. Every process reading from the same
+# file receives every message published after it opened the backend.
+class SQLiteQueueBackend(QueueBackend):
+
+    def __init__(self, path: str,
+                 poll_interval: float = 0.05,
+                 retention: float = 60.):
+        self._poll_interval = poll_interval
+        self._retention = retention
+        self._lock = threading.Lock()
+
+        self._con = sqlite3.connect(path, check_same_thread=False,
+                                    isolation_level=None, timeout=10.)
+        self._con.execute('PRAGMA journal_mode=WAL')
+        self._con.execute('CREATE TABLE IF NOT EXISTS messages ('
+                          'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                          'created REAL NOT NULL, '
+                          'payload TEXT NOT NULL)')
+
+        self._last_id = self._con.execute(
+            'SELECT COALESCE(MAX(id), 0) FROM messages').fetchone()[0]
+        self._last_prune = 0.
+
+    def publish(self, message: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._con.execute(
+                'INSERT INTO messages (created, payload) VALUES (?, ?)',
+                (now, message))
+
+            if now - self._last_prune > self._retention:
+                self._last_prune = now
+                self._con.execute('DELETE FROM messages WHERE created < ?',
+                                  (now - self._retention,))
+
+    def poll(self, timeout: float) -> list[str]:
+        deadline = time.time() + timeout
+        while True:
+            with self._lock:
+                rows = self._con.execute(
+                    'SELECT id, payload FROM messages WHERE id > ? '
+                    'ORDER BY id', (self._last_id,)).fetchall()
+
+            if len(rows) != 0:
+                self._last_id = rows[-1][0]
+                return [payload for _, payload in rows]
+
+            if time.time() >= deadline:
+                return []
+            time.sleep(self._poll_interval)
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
+
+
+def create_queue_backend(url: str) -> QueueBackend:
+    if url == 'memory://':
+        return InProcessQueueBackend()
+
+    if url.startswith('sqlite:///'):
+        return SQLiteQueueBackend(url[len('sqlite:///'):])
+
+    raise ValueError(f'Unsupported queue url {url}')
@@ -0,0 +1,85 @@
+
+import unittest
+
+import msgpack
+
+from utils.pubsub.encoding import (
+    JsonEncoding, MsgPackEncoding, create_encoding
+)
+
+
+class EncodingTest(unittest.TestCase):
+
+    def test_json_passthrough(self):
+        data = [{'id': 1, 'name': 'a'}]
+        self.assertIs(JsonEncoding().encode('job-added', data), data)
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            create_encoding('xml')
+
+    def test_msgpack_interning(self):
+        enc = MsgPackEncoding()
+
+        new_keys, data = msgpack.unpackb(
+            enc.encode('job-added', [{'id': 1, 'state': 'A'}]),
+            strict_map_key=False)
+        self.assertListEqual(new_keys, ['id', 'state'])
+        self.assertListEqual(data, [{0: 1, 1: 'A'}])
+
+        # already known keys are not transmitted again
+        new_keys, data = msgpack.unpackb(
+            enc.encode('job-added', [{'id': 2, 'state': 'B', 'rank': 0}]),
+            strict_map_key=False)
+        self.assertListEqual(new_keys, ['rank'])
+        self.assertListEqual(data, [{0: 2, 1: 'B', 2: 0}])
+
+    def test_msgpack_omits_unchanged_fields(self):
+        enc = MsgPackEncoding()
+        enc.encode('job-added', [{'id': 1, 'state': 'A', 'rank': 0}])
+
+        # nothing changed compared to the sent state
+        self.assertIsNone(enc.encode(
+            'job-changed', [{'id': 1, 'updates': {'state': 'A'}}]))
+
+        new_keys, data = msgpack.unpackb(enc.encode(
+            'job-changed', [{'id': 1, 'updates': {'state': 'B', 'rank': 0}}]),
+            strict_map_key=False)
+        self.assertListEqual(new_keys, ['updates'])
+        self.assertListEqual(data, [{0: 1, 3: {1: 'B'}}])
+
+        # state is forgotten after deletion
+        enc.encode('job-deleted', [1])
+        _, data = msgpack.unpackb(enc.encode(
+            'job-changed', [{'id': 1, 'updates': {'state': 'B'}}]),
+            strict_map_key=False)
+        self.assertListEqual(data, [{0: 1, 3: {1: 'B'}}])
+
+    def test_msgpack_nested_values_not_interned(self):
+        enc = MsgPackEncoding()
+
+        new_keys, data = msgpack.unpackb(enc.encode(
+            'job-added', [{'id': 1, 'config': {'lr': 0.1}}]),
+            strict_map_key=False)
+        self.assertListEqual(new_keys, ['id', 'config'])
+        self.assertListEqual(data, [{0: 1, 1: {'lr': 0.1}}])
+
+        new_keys, data = msgpack.unpackb(enc.encode(
+            'job-changed', [{'id': 1, 'updates': {'config': {'lr': 0.2}}}]),
+            strict_map_key=False)
+        self.assertListEqual(new_keys, ['updates'])
+        self.assertListEqual(data, [{0: 1, 2: {1: {'lr': 0.2}}}])
+
+    def test_msgpack_sent_state_bounded(self):
+        enc = MsgPackEncoding(max_entities=2)
+        enc.encode('job-added', [{'id': i, 'state': 'A'} for i in range(3)])
+        self.assertEqual(len(enc._sent_state), 2)
+
+        # the least recently sent entity was evicted and is sent in full
+        self.assertIsNone(enc.encode(
+            'job-changed', [{'id': 2, 'updates': {'state': 'A'}}]))
+        _, data = msgpack.unpackb(enc.encode(
+            'job-changed', [{'id': 0, 'updates': {'state': 'A'}}]),
+            strict_map_key=False)
+        self.assertListEqual(data, [{0: 0, 2: {1: 'A'}}])
+        self.assertEqual(len(enc._sent_state), 2)
@@ -0,0 +1,63 @@
+
+import unittest
+
+from utils.pubsub.outbound_queue import OutboundQueue
+
+
+class OutboundQueueTest(unittest.TestCase):
+
+    def test_fifo_below_soft_limit(self):
+        q = OutboundQueue(4, 8)
+
+        self.assertTrue(q.push(1, 'job-changed',
+                               [{'id': 1, 'updates': {'a': 1}}]))
+        self.assertTrue(q.push(2, 'job-changed',
+                               [{'id': 1, 'updates': {'a': 2}}]))
+        self.assertEqual(q.depth(), 2)
+
+        self.assertEqual(q.pop(),
+                         (1, 'job-changed', [{'id': 1, 'updates': {'a': 1}}]))
+        self.assertEqual(q.depth(), 1)
+        q.pop()
+        self.assertIsNone(q.pop())
+
+    def test_coalescing(self):
+        q = OutboundQueue(3, 8)
+        job = {'id': 1, 'state': 'A'}
+
+        q.push(1, 'job-added', [job])
+        q.push(2, 'job-changed', [{'id': 1, 'updates': {'state': 'B'}},
+                                  {'id': 2, 'updates': {'state': 'B'}}])
+        q.push(3, 'job-changed', [{'id': 2, 'updates': {'rank': 1}},
+                                  {'id': 3, 'updates': {'state': 'C'}}])
+
+        # change of an added job is merged into the add without touching the
+        # shared original, later changes merge into the first pending one
+        self.assertEqual(q.depth(), 3)
+        self.assertDictEqual(job, {'id': 1, 'state': 'A'})
+        self.assertListEqual(list(q._messages), [
+            (1, 'job-added', [{'id': 1, 'state': 'B'}]),
+            (2, 'job-changed', [{'id': 2,
+                                 'updates': {'state': 'B', 'rank': 1}}]),
+            (3, 'job-changed', [{'id': 3, 'updates': {'state': 'C'}}]),
+        ])
+
+        # pending changes of deleted entities are dropped
+        q.push(4, 'job-deleted', [3])
+        self.assertListEqual(list(q._messages)[2:], [
+            (4, 'job-deleted', [3]),
+        ])
+
+    def test_hard_limit(self):
+        q = OutboundQueue(2, 3)
+
+        for i in range(3):
+            self.assertTrue(q.push(i, 'job-changed',
+                                   [{'id': i, 'updates': {'a': i}}]))
+
+        self.assertFalse(q.push(3, 'job-changed',
+                                [{'id': 3, 'updates': {'a': 3}}]))
+
+        q.clear()
+        self.assertEqual(q.depth(), 0)
+        self.assertEqual(len(q), 0)
@@ -0,0 +1,47 @@
+
+import os
+import tempfile
+import unittest
+
+from utils.pubsub.queue_backend import (
+    InProcessQueueBackend, SQLiteQueueBackend, create_queue_backend
+)
+
+
+class QueueBackendTest(unittest.TestCase):
+
+    def test_in_process(self):
+        backend = create_queue_backend('memory://')
+        self.assertIsInstance(backend, InProcessQueueBackend)
+
+        self.assertListEqual(backend.poll(0), [])
+        backend.publish('a')
+        backend.publish('b')
+        self.assertListEqual(backend.poll(0), ['a', 'b'])
+        self.assertListEqual(backend.poll(0), [])
+
+    def test_sqlite_fan_out(self):
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, 'queue.db')
+
+            old = SQLiteQueueBackend(path)
+            old.publish('before')
+
+            # consumers only receive messages published after they opened
+            a = create_queue_backend(f'sqlite:///{path}')
+            b = SQLiteQueueBackend(path)
+
+            a.publish('1')
+            b.publish('2')
+
+            self.assertListEqual(a.poll(0), ['1', '2'])
+            self.assertListEqual(b.poll(0), ['1', '2'])
+            self.assertListEqual(old.poll(0), ['before', '1', '2'])
+            self.assertListEqual(a.poll(0), [])
+
+            for backend in [old, a, b]:
+                backend.close()
+
+    def test_unsupported_url(self):
+        with self.assertRaises(ValueError):
+            create_queue_backend('redis://localhost')
@@ -0,0 +1,40 @@
+
+import unittest
+
+from utils.pubsub.topic_index import TopicIndex
+
+
+class TopicIndexTest(unittest.TestCase):
+
+    def test_subscribe_and_resolve(self):
+        index = TopicIndex()
+
+        index.subscribe('a', ['job/1', 'clients'])
+        index.subscribe('b', ['job/2'])
+        index.subscribe('c', ['clients', 'job/2'])
+
+        self.assertSetEqual(index.subscribers(['job/1']), {'a'})
+        self.assertSetEqual(index.subscribers(['job/2']), {'b', 'c'})
+        self.assertSetEqual(index.subscribers(['job/1', 'clients']),
+                            {'a', 'c'})
+        self.assertSetEqual(index.subscribers(['job/3']), set())
+        self.assertSetEqual(index.topics('a'), {'job/1', 'clients'})
+
+    def test_unsubscribe_and_remove(self):
+        index = TopicIndex()
+
+        index.subscribe('a', ['job/1', 'clients'])
+        index.subscribe('b', ['clients'])
+
+        index.unsubscribe('a', ['clients'])
+        self.assertSetEqual(index.subscribers(['clients']), {'b'})
+        self.assertSetEqual(index.topics('a'), {'job/1'})
+
+        # unknown subscribers and topics are ignored
+        index.unsubscribe('x', ['clients'])
+        index.unsubscribe('a', ['job/2'])
+
+        index.remove('b')
+        self.assertSetEqual(index.subscribers(['clients']), set())
+        self.assertSetEqual(index.topics('b'), set())
+        self.assertDictEqual(index._topic_to_subs, {'job/1': {'a'}})
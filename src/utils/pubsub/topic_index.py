@@ -0,0 +1,56 @@
+
+
+import threading
+from typing import Hashable, Iterable
+
+
+# bidirectional index between subscribers and the topics they follow;
+# resolving subscribers only touches the requested topics
+class TopicIndex:
+
+    def __init__(self):
+        self._topic_to_subs: dict[str, set[Hashable]] = {}
+        self._sub_to_topics: dict[Hashable, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber: Hashable, topics: Iterable[str]) -> None:
+        with self._lock:
+            sub_topics = self._sub_to_topics.setdefault(subscriber, set())
+            for topic in topics:
+                sub_topics.add(topic)
+                self._topic_to_subs.setdefault(topic, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber: Hashable, topics: Iterable[str]) -> None:
+        with self._lock:
+            sub_topics = self._sub_to_topics.get(subscriber)
+            if sub_topics is None:
+                return
+
+            for topic in topics:
+                sub_topics.discard(topic)
+                self._discard(topic, subscriber)
+
+    def remove(self, subscriber: Hashable) -> None:
+        with self._lock:
+            for topic in self._sub_to_topics.pop(subscriber, ()):
+                self._discard(topic, subscriber)
+
+    def _discard(self, topic: str, subscriber: Hashable) -> None:
+        subs = self._topic_to_subs.get(topic)
+        if subs is None:
+            return
+
+        subs.discard(subscriber)
+        if len(subs) == 0:
+            del self._topic_to_subs[topic]
+
+    def topics(self, subscriber: Hashable) -> set[str]:
+        with self._lock:
+            return set(self._sub_to_topics.get(subscriber, ()))
+
+    def subscribers(self, topics: Iterable[str]) -> set[Hashable]:
+        with self._lock:
+            result = set()
+            for topic in topics:
+                result.update(self._topic_to_subs.get(topic, ()))
+            return result
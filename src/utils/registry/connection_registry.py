@@ -0,0 +1,133 @@
+
+
+import abc
+from abc import abstractmethod
+import threading
+import time
+from typing import Callable
+
+
+class ClaimError(ValueError):
+    pass
+
+
+# Maps socket ids to the client ids they claimed, shared by every server
+# process that uses the same registry. Claims are leases: unless renewed by
+# their owner within the ttl they expire (ttl None never expires).
+class ConnectionRegistry(abc.ABC):
+
+    @abstractmethod
+    def claim(self, sid: str, cid: int, ttl: float = None) -> None:
+        # atomically claims cid for sid, raises ClaimError if either is
+        # already part of a live claim
+        pass
+
+    @abstractmethod
+    def release_sid(self, sid: str) -> int | None:
+        pass
+
+    @abstractmethod
+    def release_cid(self, cid: int) -> str | None:
+        pass
+
+    @abstractmethod
+    def get_cid(self, sid: str) -> int | None:
+        pass
+
+    @abstractmethod
+    def get_sid(self, cid: int) -> str | None:
+        pass
+
+    @abstractmethod
+    def renew(self, ttl: float) -> None:
+        # extends all claims made through this registry instance
+        pass
+
+    def is_claimed(self, cid: int) -> bool:
+        return self.get_sid(cid) is not None
+
+
+class InMemoryConnectionRegistry(ConnectionRegistry):
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._sid_to_cid: dict[str, int] = {}
+        self._cid_to_sid: dict[int, str] = {}
+        self._expires: dict[int, float] = {}
+
+    def _purge(self, cid: int) -> None:
+        expires = self._expires.get(cid)
+        if expires is not None and expires <= self._clock():
+            self._remove(cid)
+
+    def _remove(self, cid: int) -> str | None:
+        sid = self._cid_to_sid.pop(cid, None)
+        if sid is not None:
+            del self._sid_to_cid[sid]
+        self._expires.pop(cid, None)
+        return sid
+
+    def claim(self, sid: str, cid: int, ttl: float = None) -> None:
+        with self._lock:
+            self._purge(cid)
+            if sid in self._sid_to_cid:
+                self._purge(self._sid_to_cid[sid])
+
+            if sid in self._sid_to_cid:
+                raise ClaimError(f"Socket {sid} already assigned to client")
+            if cid in self._cid_to_sid:
+                raise ClaimError(f"Client {cid} already claimed")
+
+            self._sid_to_cid[sid] = cid
+            self._cid_to_sid[cid] = sid
+            if ttl is not None:
+                self._expires[cid] = self._clock() + ttl
+
+    def release_sid(self, sid: str) -> int | None:
+        with self._lock:
+            cid = self._sid_to_cid.get(sid)
+            if cid is not None:
+                self._remove(cid)
+            return cid
+
+    def release_cid(self, cid: int) -> str | None:
+        with self._lock:
+            return self._remove(cid)
+
+    def get_cid(self, sid: str) -> int | None:
+        with self._lock:
+            cid = self._sid_to_cid.get(sid)
+            if cid is None:
+                return None
+            self._purge(cid)
+            return self._sid_to_cid.get(sid)
+
+    def get_sid(self, cid: int) -> str | None:
+        with self._lock:
+            self._purge(cid)
+            return self._cid_to_sid.get(cid)
+
+    def renew(self, ttl: float) -> None:
+        with self._lock:
+            now = self._clock()
+            for cid in self._expires:
+                self._expires[cid] = now + ttl
+
+
+def create_connection_registry(url: str) -> ConnectionRegistry:
+    if url == 'memory://':
+        return InMemoryConnectionRegistry()
+
+    if url.startswith('sqlite:///'):
+        from utils.registry.sqlite_connection_registry \
+            import SQLiteConnectionRegistry
+        return SQLiteConnectionRegistry(url[len('sqlite:///'):])
+
+    if url.startswith('redis://'):
+        from utils.registry.redis_connection_registry \
+            import RedisConnectionRegistry
+        return RedisConnectionRegistry(url)
+
+    raise ValueError(f'Unsupported registry url {url}')
@@ -0,0 +1,112 @@
+
+
+import threading
+
+from utils.registry.connection_registry import ClaimError, ConnectionRegistry
+
+try:
+    import redis
+except ImportError:  # optional dependency, only needed for redis registries
+    redis = None
+
+
+# Registry in a redis instance shared by server processes on any host. Both
+# directions are stored as plain keys with the lease as key expiry, claim and
+# release run as scripts to stay atomic.
+class RedisConnectionRegistry(ConnectionRegistry):
+
+    _CLAIM = """
+        if redis.call('EXISTS', KEYS[1]) == 1
+           or redis.call('EXISTS', KEYS[2]) == 1 then
+            return 0
+        end
+        if tonumber(ARGV[3]) > 0 then
+            redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[3])
+            redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[3])
+        else
+            redis.call('SET', KEYS[1], ARGV[1])
+            redis.call('SET', KEYS[2], ARGV[2])
+        end
+        return 1
+    """
+
+    # KEYS[1] is the key looked up, ARGV[1] the prefix of the reverse key
+    _RELEASE = """
+        local other = redis.call('GET', KEYS[1])
+        if not other then
+            return false
+        end
+        redis.call('DEL', KEYS[1], ARGV[1] .. other)
+        return other
+    """
+
+    def __init__(self, url: str, prefix: str = '{jodis}:connections'):
+        if redis is None:
+            raise ValueError('redis registry is not available '
+                             '(package not installed)')
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._claim = self._redis.register_script(self._CLAIM)
+        self._release = self._redis.register_script(self._RELEASE)
+
+        self._cid_prefix = f'{prefix}:cid:'
+        self._sid_prefix = f'{prefix}:sid:'
+
+        # claims with a lease made through this instance, renewed by renew()
+        self._leased: set[int] = set()
+        self._lock = threading.Lock()
+
+    def claim(self, sid: str, cid: int, ttl: float = None) -> None:
+        ttl_ms = 0 if ttl is None else max(1, int(ttl * 1000))
+        claimed = self._claim(
+            keys=[f'{self._cid_prefix}{cid}', f'{self._sid_prefix}{sid}'],
+            args=[sid, cid, ttl_ms])
+
+        if not claimed:
+            raise ClaimError(f"Client {cid} or socket {sid} already claimed")
+
+        if ttl is not None:
+            with self._lock:
+                self._leased.add(cid)
+
+    def release_sid(self, sid: str) -> int | None:
+        cid = self._release(keys=[f'{self._sid_prefix}{sid}'],
+                            args=[self._cid_prefix])
+        if cid is None:
+            return None
+
+        with self._lock:
+            self._leased.discard(int(cid))
+        return int(cid)
+
+    def release_cid(self, cid: int) -> str | None:
+        with self._lock:
+            self._leased.discard(cid)
+
+        return self._release(keys=[f'{self._cid_prefix}{cid}'],
+                             args=[self._sid_prefix])
+
+    def get_cid(self, sid: str) -> int | None:
+        cid = self._redis.get(f'{self._sid_prefix}{sid}')
+        return None if cid is None else int(cid)
+
+    def get_sid(self, cid: int) -> str | None:
+        return self._redis.get(f'{self._cid_prefix}{cid}')
+
+    def renew(self, ttl: float) -> None:
+        with self._lock:
+            leased = list(self._leased)
+
+        ttl_ms = max(1, int(ttl * 1000))
+        pipe = self._redis.pipeline(transaction=False)
+        for cid in leased:
+            pipe.get(f'{self._cid_prefix}{cid}')
+        sids = pipe.execute()
+
+        pipe = self._redis.pipeline(transaction=False)
+        for cid, sid in zip(leased, sids):
+            if sid is None:
+                continue
+            pipe.pexpire(f'{self._cid_prefix}{cid}', ttl_ms)
+            pipe.pexpire(f'{self._sid_prefix}{sid}', ttl_ms)
+        pipe.execute()
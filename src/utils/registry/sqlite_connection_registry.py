@@ -0,0 +1,90 @@
+
+
+import sqlite3
+import threading
+import time
+from typing import Callable
+import uuid
+
+from utils.registry.connection_registry import ClaimError, ConnectionRegistry
+
+
+# Registry in a shared SQLite file for server processes on the same host.
+# Lookups use the primary key (client id) or the unique socket id index.
+class SQLiteConnectionRegistry(ConnectionRegistry):
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+        self._con = sqlite3.connect(path, check_same_thread=False,
+                                    isolation_level=None, timeout=10.)
+        self._con.execute('PRAGMA journal_mode=WAL')
+        self._con.execute('CREATE TABLE IF NOT EXISTS claims ('
+                          'cid INTEGER PRIMARY KEY, '
+                          'sid TEXT NOT NULL UNIQUE, '
+                          'owner TEXT NOT NULL, '
+                          'expires REAL)')
+
+    def _live(self) -> str:
+        return '(expires IS NULL OR expires > ?)'
+
+    def claim(self, sid: str, cid: int, ttl: float = None) -> None:
+        now = self._clock()
+        expires = None if ttl is None else now + ttl
+
+        with self._lock:
+            self._con.execute('BEGIN IMMEDIATE')
+            try:
+                self._con.execute(
+                    'DELETE FROM claims WHERE (cid = ? OR sid = ?) '
+                    'AND expires IS NOT NULL AND expires <= ?',
+                    (cid, sid, now))
+                self._con.execute(
+                    'INSERT INTO claims (cid, sid, owner, expires) '
+                    'VALUES (?, ?, ?, ?)',
+                    (cid, sid, self._owner, expires))
+                self._con.execute('COMMIT')
+            except sqlite3.IntegrityError:
+                self._con.execute('ROLLBACK')
+                raise ClaimError(f"Client {cid} or socket {sid} already "
+                                 "claimed")
+            except Exception:
+                self._con.execute('ROLLBACK')
+                raise
+
+    def release_sid(self, sid: str) -> int | None:
+        with self._lock:
+            row = self._con.execute(
+                'DELETE FROM claims WHERE sid = ? RETURNING cid',
+                (sid,)).fetchone()
+        return None if row is None else row[0]
+
+    def release_cid(self, cid: int) -> str | None:
+        with self._lock:
+            row = self._con.execute(
+                'DELETE FROM claims WHERE cid = ? RETURNING sid',
+                (cid,)).fetchone()
+        return None if row is None else row[0]
+
+    def get_cid(self, sid: str) -> int | None:
+        with self._lock:
+            row = self._con.execute(
+                f'SELECT cid FROM claims WHERE sid = ? AND {self._live()}',
+                (sid, self._clock())).fetchone()
+        return None if row is None else row[0]
+
+    def get_sid(self, cid: int) -> str | None:
+        with self._lock:
+            row = self._con.execute(
+                f'SELECT sid FROM claims WHERE cid = ? AND {self._live()}',
+                (cid, self._clock())).fetchone()
+        return None if row is None else row[0]
+
+    def renew(self, ttl: float) -> None:
+        with self._lock:
+            self._con.execute(
+                'UPDATE claims SET expires = ? '
+                'WHERE owner = ? AND expires IS NOT NULL',
+                (self._clock() + ttl, self._owner))
@@ -0,0 +1,74 @@
+
+import os
+import tempfile
+import unittest
+
+from utils.registry.connection_registry import (
+    ClaimError, ConnectionRegistry, InMemoryConnectionRegistry,
+    create_connection_registry
+)
+from utils.registry.sqlite_connection_registry import SQLiteConnectionRegistry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionRegistryTest(unittest.TestCase):
+
+    def _test_registry(self, registry: ConnectionRegistry, clock: Clock):
+        registry.claim('a', 1)
+        self.assertEqual(registry.get_cid('a'), 1)
+        self.assertEqual(registry.get_sid(1), 'a')
+        self.assertTrue(registry.is_claimed(1))
+
+        with self.assertRaises(ClaimError):
+            registry.claim('b', 1)
+        with self.assertRaises(ClaimError):
+            registry.claim('a', 2)
+
+        self.assertEqual(registry.release_sid('a'), 1)
+        self.assertIsNone(registry.release_sid('a'))
+        self.assertIsNone(registry.get_sid(1))
+
+        # leases expire unless renewed
+        registry.claim('b', 2, ttl=10.)
+        clock.now += 8.
+        registry.renew(10.)
+        clock.now += 8.
+        self.assertEqual(registry.get_cid('b'), 2)
+
+        clock.now += 3.
+        self.assertIsNone(registry.get_cid('b'))
+        self.assertIsNone(registry.get_sid(2))
+
+        # expired claims do not block new ones
+        registry.claim('c', 2)
+        self.assertEqual(registry.release_cid(2), 'c')
+        self.assertIsNone(registry.release_cid(2))
+
+    def test_in_memory(self):
+        clock = Clock()
+        self._test_registry(InMemoryConnectionRegistry(clock), clock)
+
+    def test_sqlite(self):
+        clock = Clock()
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, 'registry.db')
+            self._test_registry(SQLiteConnectionRegistry(path, clock), clock)
+
+            # claims are shared between instances on the same file
+            a = SQLiteConnectionRegistry(path, clock)
+            b = create_connection_registry(f'sqlite:///{path}')
+            a.claim('x', 5)
+            self.assertEqual(b.get_sid(5), 'x')
+            with self.assertRaises(ClaimError):
+                b.claim('y', 5)
+
+    def test_unsupported_url(self):
+        with self.assertRaises(ValueError):
+            create_connection_registry('etcd://localhost')
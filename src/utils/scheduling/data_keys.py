@@ -0,0 +1,17 @@
+
+
+def extract_data_keys(config: dict, paths: list[str]) -> set[str]:
+    # values at the dot separated paths of a job config (e.g.
+    # 'data.dataset'), each a string or a list of strings, missing paths and
+    # other values are ignored
+    keys = set()
+    for path in paths:
+        value = config
+        for part in path.split('.'):
+            value = value.get(part) if isinstance(value, dict) else None
+
+        if isinstance(value, str):
+            keys.add(value)
+        elif isinstance(value, list):
+            keys.update(v for v in value if isinstance(v, str))
+    return keys
@@ -0,0 +1,22 @@
+
+from typing import Iterable
+
+import networkx as nx
+
+
+def topological_order(nodes: Iterable[int],
+                      edges: Iterable[tuple[int, int]]) -> list[int]:
+    # orders nodes so each comes after its predecessors (ties by value),
+    # edges are given as (predecessor, successor), raises a ValueError
+    # naming a cycle
+    graph = nx.DiGraph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+
+    try:
+        cycle = nx.find_cycle(graph)
+    except nx.NetworkXNoCycle:
+        return list(nx.lexicographical_topological_sort(graph))
+
+    path = ' -> '.join(str(u) for u, _ in cycle) + f' -> {cycle[0][0]}'
+    raise ValueError(f'Dependencies contain a cycle ({path})')
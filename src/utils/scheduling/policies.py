@@ -0,0 +1,142 @@
+
+
+import abc
+from dataclasses import dataclass
+
+
+@dataclass
+class PendingJob:
+    id: int
+    priority: int = 0
+    # expected number of steps
+    work: float = 1.
+    # keys of the data the job reads (e.g. datasets)
+    data_keys: frozenset[str] = frozenset()
+
+
+@dataclass
+class ClientLoad:
+    id: int
+    # jobs in the client's schedule (running and scheduled)
+    queued: int = 0
+    # expected seconds until the schedule is done
+    backlog: float = 0.
+    # measured seconds per step
+    time_per_work: float = 1.
+    # keys of the data the client holds (or will, once its jobs ran)
+    cached: frozenset[str] = frozenset()
+
+    def add(self, job: PendingJob):
+        self.queued += 1
+        self.backlog += job.work * self.time_per_work
+        self.cached |= job.data_keys
+
+
+# Decides which client receives a job. Policies only choose, the caller keeps
+# the loads up to date between calls (ClientLoad.add).
+class SchedulingPolicy(abc.ABC):
+
+    def order(self, jobs: list[PendingJob]) -> list[PendingJob]:
+        # the order in which a batch of pending jobs is placed
+        return jobs
+
+    @abc.abstractmethod
+    def select(self, job: PendingJob,
+               clients: list[ClientLoad]) -> ClientLoad | None:
+        pass
+
+
+# Selects the client with the lowest cost for the job (ties by id).
+class CostPolicy(SchedulingPolicy):
+
+    @abc.abstractmethod
+    def cost(self, job: PendingJob, client: ClientLoad) -> float:
+        pass
+
+    def select(self, job: PendingJob,
+               clients: list[ClientLoad]) -> ClientLoad | None:
+        if len(clients) == 0:
+            return None
+        return min(clients, key=lambda c: (self.cost(job, c), c.id))
+
+
+class LeastLoadedPolicy(CostPolicy):
+
+    def cost(self, job: PendingJob, client: ClientLoad) -> float:
+        return client.queued
+
+
+class RoundRobinPolicy(SchedulingPolicy):
+
+    def __init__(self):
+        self._last_id: int | None = None
+
+    def select(self, job: PendingJob,
+               clients: list[ClientLoad]) -> ClientLoad | None:
+        if len(clients) == 0:
+            return None
+
+        # the client following the last selected one by id, which stays
+        # stable while clients come and go
+        clients = sorted(clients, key=lambda c: c.id)
+        selected = next(
+            (c for c in clients
+             if self._last_id is None or c.id > self._last_id),
+            clients[0])
+        self._last_id = selected.id
+        return selected
+
+
+# Places each job on the client expected to complete it first given its
+# backlog and speed. Larger jobs of a priority are placed first (longest
+# processing time first), which keeps the makespan low on mixed fleets.
+class EarliestCompletionPolicy(CostPolicy):
+
+    def order(self, jobs: list[PendingJob]) -> list[PendingJob]:
+        return sorted(jobs, key=lambda j: (-j.priority, -j.work))
+
+    def cost(self, job: PendingJob, client: ClientLoad) -> float:
+        return client.backlog + job.work * client.time_per_work
+
+
+# Lowers the cost of clients already holding the job's data by weight times
+# the share of its data keys they hold. The weight is in units of the wrapped
+# policy's cost (jobs for least_loaded, seconds for earliest_completion) and
+# trades locality against load.
+class CacheAffinityPolicy(CostPolicy):
+
+    def __init__(self, policy: CostPolicy, weight: float):
+        self._policy = policy
+        self._weight = weight
+
+    def order(self, jobs: list[PendingJob]) -> list[PendingJob]:
+        return self._policy.order(jobs)
+
+    def cost(self, job: PendingJob, client: ClientLoad) -> float:
+        cost = self._policy.cost(job, client)
+        if len(job.data_keys) == 0:
+            return cost
+
+        locality = len(job.data_keys & client.cached) / len(job.data_keys)
+        return cost - self._weight * locality
+
+
+POLICIES = {
+    'least_loaded': LeastLoadedPolicy,
+    'round_robin': RoundRobinPolicy,
+    'earliest_completion': EarliestCompletionPolicy,
+}
+
+
+def create_policy(name: str, locality_weight: float = 0.) -> SchedulingPolicy:
+    if name not in POLICIES:
+        raise ValueError(f'Unknown scheduling policy {name} '
+                         f'(available: {list(POLICIES)})')
+    policy = POLICIES[name]()
+
+    if locality_weight == 0:
+        return policy
+    if not isinstance(policy, CostPolicy):
+        raise ValueError(f'Scheduling policy {name} does not support cache '
+                         'affinity')
+    return CacheAffinityPolicy(policy, locality_weight)
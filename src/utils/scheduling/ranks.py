@@ -0,0 +1,30 @@
+
+
+# Ranks order the jobs of a client's schedule. They are spread RANK_GAP apart
+# so a job can be moved by giving it a rank between its new neighbours, which
+# touches a single row. Only once neighbours are adjacent the schedule has to
+# be spread out again.
+RANK_GAP = 1024
+
+
+def ranks_between(lower: int | None, upper: int | None,
+                  count: int = 1) -> list[int] | None:
+    # count increasing ranks strictly between lower and upper (None for an
+    # open end), None if there is no room left
+    if lower is None and upper is None:
+        return spread(count)
+
+    if upper is None:
+        return [lower + RANK_GAP * (i + 1) for i in range(count)]
+
+    if lower is None:
+        return [upper - RANK_GAP * (count - i) for i in range(count)]
+
+    step = (upper - lower) // (count + 1)
+    if step < 1:
+        return None
+    return [lower + step * (i + 1) for i in range(count)]
+
+
+def spread(count: int) -> list[int]:
+    return [RANK_GAP * i for i in range(count)]
@@ -0,0 +1,61 @@
+
+from dataclasses import dataclass
+
+
+# Resources a client offers or a job requires. A client meets a job's
+# requirements if it has at least the required amounts and all required
+# labels.
+AMOUNTS = ('cores', 'memory')
+LABELS = ('datasets', 'tags')
+
+
+@dataclass(frozen=True)
+class Resources:
+    cores: int = 0
+    # in GB
+    memory: float = 0.
+    datasets: frozenset[str] = frozenset()
+    tags: frozenset[str] = frozenset()
+
+    @staticmethod
+    def from_dict(resources: dict | None):
+        if resources is None:
+            return Resources()
+        if not isinstance(resources, dict):
+            raise ValueError('Resources must be an object')
+
+        unknown = set(resources) - {*AMOUNTS, *LABELS}
+        if len(unknown) > 0:
+            raise ValueError(f'Unknown resources {sorted(unknown)} '
+                             f'(available: {[*AMOUNTS, *LABELS]})')
+
+        amounts = {}
+        for name, type_ in zip(AMOUNTS, [(int, ), (int, float)]):
+            value = resources.get(name, 0)
+            if (not isinstance(value, type_) or isinstance(value, bool)
+                    or value < 0):
+                raise ValueError(f'{name} must be a non-negative number')
+            amounts[name] = value
+
+        labels = {}
+        for name in LABELS:
+            values = resources.get(name, [])
+            if (not isinstance(values, list)
+                    or not all(isinstance(v, str) for v in values)):
+                raise ValueError(f'{name} must be a list of strings')
+            labels[name] = frozenset(values)
+
+        return Resources(amounts['cores'], float(amounts['memory']),
+                         **labels)
+
+    def to_dict(self) -> dict:
+        return {'cores': self.cores,
+                'memory': self.memory,
+                'datasets': sorted(self.datasets),
+                'tags': sorted(self.tags)}
+
+    def satisfies(self, requirements: 'Resources') -> bool:
+        return (self.cores >= requirements.cores
+                and self.memory >= requirements.memory
+                and self.datasets >= requirements.datasets
+                and self.tags >= requirements.tags)
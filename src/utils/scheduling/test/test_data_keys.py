@@ -0,0 +1,22 @@
+
+import unittest
+
+from utils.scheduling.data_keys import extract_data_keys
+
+
+class DataKeysTest(unittest.TestCase):
+
+    def test_extract(self):
+        config = {'data': {'dataset': 'mnist',
+                           'auxiliary': ['glove', 3, 'fasttext']},
+                  'dataset': {'name': 'cifar'},
+                  'epochs': 10}
+
+        self.assertSetEqual(
+            extract_data_keys(config, ['data.dataset', 'data.auxiliary']),
+            {'mnist', 'glove', 'fasttext'})
+        self.assertSetEqual(
+            extract_data_keys(config, ['dataset.name', 'epochs',
+                                       'data.missing', 'epochs.x']),
+            {'cifar'})
+        self.assertSetEqual(extract_data_keys(config, ['dataset']), set())
@@ -0,0 +1,22 @@
+
+import unittest
+
+from utils.scheduling.dependency_graph import topological_order
+
+
+class DependencyGraphTest(unittest.TestCase):
+
+    def test_order(self):
+        # a diamond: 0 -> (1, 2) -> 3
+        order = topological_order([3, 2, 1, 0],
+                                  [(0, 1), (0, 2), (1, 3), (2, 3)])
+        self.assertListEqual(order, [0, 1, 2, 3])
+
+        self.assertListEqual(topological_order([1, 0], []), [0, 1])
+
+    def test_cycle(self):
+        with self.assertRaises(ValueError):
+            topological_order([0, 1, 2], [(0, 1), (1, 2), (2, 0)])
+
+        with self.assertRaises(ValueError):
+            topological_order([0], [(0, 0)])
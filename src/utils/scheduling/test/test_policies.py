@@ -0,0 +1,88 @@
+
+
+import unittest
+
+from utils.scheduling.policies import (
+    CacheAffinityPolicy, ClientLoad, EarliestCompletionPolicy,
+    LeastLoadedPolicy, PendingJob, RoundRobinPolicy, create_policy
+)
+
+
+class PoliciesTest(unittest.TestCase):
+
+    def test_least_loaded(self):
+        policy = LeastLoadedPolicy()
+        job = PendingJob(1)
+
+        self.assertIsNone(policy.select(job, []))
+
+        clients = [ClientLoad(3, 2), ClientLoad(1, 1), ClientLoad(2, 1)]
+        self.assertEqual(policy.select(job, clients).id, 1)
+
+        clients[1].queued = 3
+        self.assertEqual(policy.select(job, clients).id, 2)
+
+    def test_round_robin(self):
+        policy = RoundRobinPolicy()
+        job = PendingJob(1)
+        clients = [ClientLoad(3), ClientLoad(1), ClientLoad(2)]
+
+        self.assertListEqual(
+            [policy.select(job, clients).id for _ in range(4)], [1, 2, 3, 1])
+
+        # continues after the last selected client if it disappears
+        self.assertEqual(policy.select(job, clients[:1] + clients[2:]).id, 2)
+        self.assertEqual(policy.select(job, clients[:1]).id, 3)
+
+    def test_earliest_completion(self):
+        policy = EarliestCompletionPolicy()
+
+        jobs = [PendingJob(1, 0, 10), PendingJob(2, 1, 1),
+                PendingJob(3, 0, 30), PendingJob(4, 0, 20)]
+        self.assertListEqual([j.id for j in policy.order(jobs)],
+                             [2, 3, 4, 1])
+
+        # a fast client and one at a third of its speed
+        fast = ClientLoad(1, time_per_work=1.)
+        slow = ClientLoad(2, time_per_work=3.)
+        placed = {}
+        for job in policy.order([PendingJob(i, 0, w) for i, w
+                                 in enumerate([30, 20, 10, 10, 10])]):
+            client = policy.select(job, [fast, slow])
+            client.add(job)
+            placed[job.id] = client.id
+
+        self.assertDictEqual(placed, {0: 1, 1: 1, 2: 2, 3: 1, 4: 2})
+        self.assertEqual(fast.backlog, 60)
+        self.assertEqual(slow.backlog, 60)
+
+        self.assertIsNone(policy.select(PendingJob(1), []))
+
+    def test_cache_affinity(self):
+        # a warm cache is worth one queued job
+        policy = CacheAffinityPolicy(LeastLoadedPolicy(), 1.5)
+        job = PendingJob(1, data_keys=frozenset({'mnist'}))
+
+        cold = ClientLoad(1, 1)
+        warm = ClientLoad(2, 2, cached=frozenset({'mnist', 'cifar'}))
+        self.assertEqual(policy.select(job, [cold, warm]).id, 2)
+
+        warm.queued = 3
+        self.assertEqual(policy.select(job, [cold, warm]).id, 1)
+
+        # placed jobs warm the client for the following ones
+        cold.add(job)
+        self.assertEqual(cold.cached, {'mnist'})
+
+        # jobs without data are placed by load only
+        self.assertEqual(policy.select(PendingJob(2), [cold, warm]).id, 1)
+
+    def test_create_policy(self):
+        self.assertIsInstance(create_policy('least_loaded'),
+                              LeastLoadedPolicy)
+        self.assertIsInstance(create_policy('earliest_completion', 10.),
+                              CacheAffinityPolicy)
+        with self.assertRaises(ValueError):
+            create_policy('random')
+        with self.assertRaises(ValueError):
+            create_policy('round_robin', 1.)
@@ -0,0 +1,31 @@
+
+import unittest
+
+from utils.scheduling.ranks import RANK_GAP, ranks_between, spread
+
+
+class RanksTest(unittest.TestCase):
+
+    def test_open_ends(self):
+        self.assertListEqual(ranks_between(None, None, 3), spread(3))
+        self.assertListEqual(ranks_between(5, None, 2),
+                             [5 + RANK_GAP, 5 + 2 * RANK_GAP])
+        self.assertListEqual(ranks_between(None, 0, 2),
+                             [-2 * RANK_GAP, -RANK_GAP])
+
+    def test_between(self):
+        self.assertListEqual(ranks_between(0, 8), [4])
+        self.assertListEqual(ranks_between(0, 9, 2), [3, 6])
+        self.assertListEqual(ranks_between(0, 3, 2), [1, 2])
+
+    def test_no_room(self):
+        self.assertIsNone(ranks_between(0, 1))
+        self.assertIsNone(ranks_between(0, 2, 2))
+
+    def test_halvings_before_rebalance(self):
+        # repeatedly inserting in front of the same job
+        lower, upper, moves = 0, RANK_GAP, 0
+        while (ranks := ranks_between(lower, upper)) is not None:
+            upper = ranks[0]
+            moves += 1
+        self.assertEqual(moves, 10)
@@ -0,0 +1,32 @@
+
+import unittest
+
+from utils.scheduling.resources import Resources
+
+
+class ResourcesTest(unittest.TestCase):
+
+    def test_from_dict(self):
+        resources = Resources.from_dict({'cores': 8, 'memory': 16,
+                                         'tags': ['gpu', 'gpu']})
+        self.assertEqual(resources, Resources(8, 16., tags={'gpu'}))
+        self.assertDictEqual(resources.to_dict(),
+                             {'cores': 8, 'memory': 16., 'datasets': [],
+                              'tags': ['gpu']})
+        self.assertEqual(Resources.from_dict(None), Resources())
+
+        for invalid in [[], {'gpus': 1}, {'cores': -1}, {'cores': 1.5},
+                        {'memory': True}, {'tags': 'gpu'},
+                        {'datasets': [1]}]:
+            with self.assertRaises(ValueError):
+                Resources.from_dict(invalid)
+
+    def test_satisfies(self):
+        client = Resources(8, 32., frozenset({'mnist'}), frozenset({'gpu'}))
+
+        self.assertTrue(client.satisfies(Resources()))
+        self.assertTrue(client.satisfies(Resources(8, 32., {'mnist'})))
+        self.assertFalse(client.satisfies(Resources(16)))
+        self.assertFalse(client.satisfies(Resources(memory=64.)))
+        self.assertFalse(client.satisfies(Resources(datasets={'cifar'})))
+        self.assertFalse(client.satisfies(Resources(tags={'gpu', 'fp16'})))
@@ -0,0 +1,80 @@
+
+
+import unittest
+
+from utils.timing.timing_wheel import TimingWheel
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+class TimingWheelTest(unittest.TestCase):
+
+    def test_expiry(self):
+        clock = Clock()
+        wheel = TimingWheel(1., 8, clock)
+
+        wheel.schedule('a', 2.)
+        wheel.schedule('b', 5.)
+        self.assertEqual(len(wheel), 2)
+        self.assertIn('a', wheel)
+
+        clock.now = 2.
+        self.assertListEqual(wheel.advance(), [])
+
+        # deadlines are rounded up to the next tick
+        clock.now = 3.
+        self.assertListEqual(wheel.advance(), ['a'])
+        self.assertNotIn('a', wheel)
+        self.assertListEqual(wheel.advance(), [])
+
+        clock.now = 10.
+        self.assertListEqual(wheel.advance(), ['b'])
+        self.assertEqual(len(wheel), 0)
+
+    def test_reschedule_and_cancel(self):
+        clock = Clock()
+        wheel = TimingWheel(1., 8, clock)
+
+        wheel.schedule('a', 2.)
+        wheel.schedule('b', 2.)
+        clock.now = 1.5
+        wheel.schedule('a', 2.)
+        self.assertTrue(wheel.cancel('b'))
+        self.assertFalse(wheel.cancel('b'))
+
+        clock.now = 3.
+        self.assertListEqual(wheel.advance(), [])
+        clock.now = 4.
+        self.assertListEqual(wheel.advance(), ['a'])
+
+    def test_multiple_revolutions(self):
+        clock = Clock()
+        wheel = TimingWheel(1., 4, clock)
+
+        wheel.schedule('late', 9.)
+        wheel.schedule('early', 1.)
+
+        for t in range(1, 10):
+            clock.now = float(t)
+            self.assertListEqual(wheel.advance(),
+                                 ['early'] if t == 2 else [])
+
+        clock.now = 10.
+        self.assertListEqual(wheel.advance(), ['late'])
+
+    def test_lagging_advance(self):
+        clock = Clock()
+        wheel = TimingWheel(1., 4, clock)
+
+        for i in range(10):
+            wheel.schedule(i, float(i))
+
+        clock.now = 100.
+        self.assertListEqual(sorted(wheel.advance()), list(range(10)))
+        self.assertEqual(len(wheel), 0)
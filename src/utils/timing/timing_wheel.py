@@ -0,0 +1,76 @@
+
+
+import threading
+import time
+from typing import Callable, Hashable
+
+
+# Hashed timing wheel: deadlines are rounded up to ticks and kept in the slot
+# tick % size, so scheduling, rescheduling and cancelling are O(1) and each
+# tick only visits the keys of one slot. Deadlines more than size ticks ahead
+# stay in their slot for further revolutions.
+class TimingWheel:
+
+    def __init__(self, tick: float, size: int,
+                 clock: Callable[[], float] = time.monotonic):
+        if tick <= 0 or size <= 0:
+            raise ValueError('Tick and size must be positive')
+
+        self._tick = tick
+        self._clock = clock
+        self._slots: list[dict[Hashable, int]] = [{} for _ in range(size)]
+        # key -> deadline tick (its slot follows from it)
+        self._deadlines: dict[Hashable, int] = {}
+        self._current = self._to_tick(clock())
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: Hashable, timeout: float) -> None:
+        # (re)sets the deadline of key to timeout seconds from now
+        deadline = self._to_tick(self._clock() + timeout) + 1
+        with self._lock:
+            self._remove(key)
+            deadline = max(deadline, self._current + 1)
+            self._slots[deadline % len(self._slots)][key] = deadline
+            self._deadlines[key] = deadline
+
+    def cancel(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def advance(self) -> list[Hashable]:
+        # removes and returns all keys whose deadline has passed
+        now = self._to_tick(self._clock())
+        with self._lock:
+            if now <= self._current:
+                return []
+
+            # lagging more than one revolution behind, every slot is visited
+            # once
+            first = max(self._current + 1, now - len(self._slots) + 1)
+            expired = []
+            for tick in range(first, now + 1):
+                slot = self._slots[tick % len(self._slots)]
+                due = [k for k, deadline in slot.items() if deadline <= now]
+                for k in due:
+                    del slot[k]
+                    del self._deadlines[k]
+                expired.extend(due)
+
+            self._current = now
+            return expired
+
+    def _remove(self, key: Hashable) -> bool:
+        deadline = self._deadlines.pop(key, None)
+        if deadline is None:
+            return False
+        del self._slots[deadline % len(self._slots)][key]
+        return True
+
+    def _to_tick(self, t: float) -> int:
+        return int(t // self._tick)